@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 import os
 from pathlib import Path
 import environ
+import structlog
  
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -50,6 +51,81 @@ INSTALLED_APPS = [
 CELERY_BROKER_URL = 'redis://redis:6379/0'
 CELERY_RESULT_BACKEND = 'redis://redis:6379/0'
 
+# Scrape jobs fan out one task per source.  RSS sources run on SCRAPE_QUEUE,
+# HTML/Playwright sources on SCRAPE_BROWSER_QUEUE, e.g.
+#   celery -A ivy_intel worker -Q celery,scrape -c 8
+#   celery -A ivy_intel worker -Q playwright -c 2
+# Each source task is rate limited per worker and time limited, and is put
+# back on the queue while its host has no request token (see below).
+SCRAPE_QUEUE = env('SCRAPE_QUEUE', default='scrape')
+SCRAPE_BROWSER_QUEUE = env('SCRAPE_BROWSER_QUEUE', default='playwright')
+SCRAPE_TASK_RATE_LIMIT = env('SCRAPE_TASK_RATE_LIMIT', default='30/m')
+SCRAPE_TASK_SOFT_TIME_LIMIT = env.int('SCRAPE_TASK_SOFT_TIME_LIMIT', default=120)
+SCRAPE_TASK_TIME_LIMIT = env.int('SCRAPE_TASK_TIME_LIMIT', default=180)
+SCRAPE_BROWSER_TASK_SOFT_TIME_LIMIT = env.int('SCRAPE_BROWSER_TASK_SOFT_TIME_LIMIT', default=300)
+SCRAPE_BROWSER_TASK_TIME_LIMIT = env.int('SCRAPE_BROWSER_TASK_TIME_LIMIT', default=360)
+
+# Adaptive polling: each source's interval follows its observed publishing
+# rate (aiming for ~SCRAPE_POLL_TARGET_ITEMS new items per fetch), doubling
+# while it is quiet and backing off exponentially while it fails.  Beat
+# checks for due sources every SCRAPE_POLL_TICK seconds.
+SCRAPE_POLL_MIN_INTERVAL = env.int('SCRAPE_POLL_MIN_INTERVAL', default=15 * 60)
+SCRAPE_POLL_MAX_INTERVAL = env.int('SCRAPE_POLL_MAX_INTERVAL', default=24 * 60 * 60)
+SCRAPE_POLL_DEFAULT_INTERVAL = env.int('SCRAPE_POLL_DEFAULT_INTERVAL', default=60 * 60)
+SCRAPE_POLL_TARGET_ITEMS = env.int('SCRAPE_POLL_TARGET_ITEMS', default=3)
+SCRAPE_POLL_RATE_ALPHA = env.float('SCRAPE_POLL_RATE_ALPHA', default=0.3)
+SCRAPE_POLL_LEASE = env.int('SCRAPE_POLL_LEASE', default=15 * 60)
+SCRAPE_POLL_TICK = env.int('SCRAPE_POLL_TICK', default=5 * 60)
+
+# Circuit breaker: a source that fails SCRAPE_BREAKER_THRESHOLD times in a
+# row is skipped by every scrape path for SCRAPE_BREAKER_COOLDOWN seconds,
+# then gets a single trial fetch.
+SCRAPE_BREAKER_THRESHOLD = env.int('SCRAPE_BREAKER_THRESHOLD', default=5)
+SCRAPE_BREAKER_COOLDOWN = env.int('SCRAPE_BREAKER_COOLDOWN', default=6 * 60 * 60)
+
+CELERY_BEAT_SCHEDULE = {
+    'scrape-due-sources': {
+        'task': 'scraper.tasks.run_due_scrapes',
+        'schedule': SCRAPE_POLL_TICK,
+    },
+}
+
+# TOML registry of universities and sources (see scraper/sources.toml);
+# edits are picked up without a restart.
+SCRAPE_SOURCES_FILE = env('SCRAPE_SOURCES_FILE', default=str(BASE_DIR / 'scraper' / 'sources.toml'))
+
+# Scraper concurrency: total worker threads per scrape_all() and the
+# maximum number of simultaneous requests against a single host.
+SCRAPE_MAX_WORKERS = env.int('SCRAPE_MAX_WORKERS', default=8)
+SCRAPE_MAX_PER_HOST = env.int('SCRAPE_MAX_PER_HOST', default=2)
+
+# AsyncIvyScraper: fetches kept in flight at once on one event loop
+# (the per-host limit above still applies).
+SCRAPE_ASYNC_MAX_CONCURRENCY = env.int('SCRAPE_ASYNC_MAX_CONCURRENCY', default=32)
+
+# Per-host token buckets shared by every worker: each host earns
+# SCRAPE_HOST_RATE requests per second, up to SCRAPE_HOST_BURST at once,
+# slowed further by its robots.txt Crawl-delay (re-read every
+# SCRAPE_ROBOTS_TTL seconds).  Buckets live in Redis, falling back to
+# per-process buckets when it is unreachable; 0 disables the limiter.
+SCRAPE_HOST_RATE = env.float('SCRAPE_HOST_RATE', default=0.5)
+SCRAPE_HOST_BURST = env.int('SCRAPE_HOST_BURST', default=3)
+SCRAPE_RATE_LIMIT_URL = env('SCRAPE_RATE_LIMIT_URL', default=CELERY_BROKER_URL)
+SCRAPE_ROBOTS_TTL = env.int('SCRAPE_ROBOTS_TTL', default=24 * 60 * 60)
+
+# Shared HTTP session: connection pool size per host and retry/backoff
+# policy for 429/5xx responses (Retry-After is honoured up to the cap).
+SCRAPE_HTTP_POOL_SIZE = env.int('SCRAPE_HTTP_POOL_SIZE', default=10)
+SCRAPE_HTTP_RETRIES = env.int('SCRAPE_HTTP_RETRIES', default=3)
+SCRAPE_HTTP_BACKOFF = env.float('SCRAPE_HTTP_BACKOFF', default=0.5)
+SCRAPE_HTTP_RETRY_AFTER_MAX = env.int('SCRAPE_HTTP_RETRY_AFTER_MAX', default=60)
+
+# Playwright fallback: pages rendered concurrently in the per-process
+# browser, and when that browser is recycled (renders served / seconds).
+SCRAPE_BROWSER_MAX_PAGES = env.int('SCRAPE_BROWSER_MAX_PAGES', default=4)
+SCRAPE_BROWSER_RECYCLE_PAGES = env.int('SCRAPE_BROWSER_RECYCLE_PAGES', default=100)
+SCRAPE_BROWSER_MAX_AGE = env.int('SCRAPE_BROWSER_MAX_AGE', default=30 * 60)
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -92,6 +168,65 @@ DATABASES = {
 }
 
 
+# Cache
+# Scrape job progress, run metrics and dashboard stats are written by Celery
+# workers and read by every web worker, so the cache has to be shared: it
+# defaults to database 1 of the broker's Redis.  A per-process cache
+# (CACHE_URL=locmemcache://) only works for a single process with no
+# worker.  The test runner always swaps in one (ivy_intel.test_runner).
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default=CELERY_BROKER_URL.rsplit('/', 1)[0] + '/1'),
+}
+
+TEST_RUNNER = 'ivy_intel.test_runner.TestRunner'
+
+# Upper bound on how stale cached dashboard stats may get when rows change
+# outside a scrape run (admin edits, manual deletes).
+SCRAPE_STATS_TTL = env.int('SCRAPE_STATS_TTL', default=15 * 60)
+
+# Rendered dashboard pages are cached per data version (bumped on every
+# insert, enrichment pass and admin edit); the TTL only bounds memory.
+SCRAPE_PAGE_CACHE_TTL = env.int('SCRAPE_PAGE_CACHE_TTL', default=60 * 60)
+
+# Rows fetched per round trip by the streaming export API.
+SCRAPE_EXPORT_CHUNK_SIZE = env.int('SCRAPE_EXPORT_CHUNK_SIZE', default=2000)
+
+# Content hashes each process remembers as already stored, so re-scraped
+# items skip the duplicate lookup query (~70 bytes per entry; 0 disables).
+SCRAPE_DEDUPE_CACHE_SIZE = env.int('SCRAPE_DEDUPE_CACHE_SIZE', default=200_000)
+
+# Near-duplicates of a stored item (description SimHash within
+# SCRAPE_SIMHASH_DISTANCE bits, at most 3, and a similar title) are stored
+# with duplicate_of set ('link'), dropped ('suppress'), or not checked ('off').
+SCRAPE_NEAR_DUPLICATES = env('SCRAPE_NEAR_DUPLICATES', default='link')
+SCRAPE_SIMHASH_DISTANCE = env.int('SCRAPE_SIMHASH_DISTANCE', default=3)
+
+# Optional article enrichment: after each scrape, newly inserted items have
+# their article page fetched once (SCRAPE_ENRICH_WORKERS at a time, in
+# batches of SCRAPE_ENRICH_BATCH) for a full-text summary, publish date and
+# deadline.  Off by default; see also `manage.py enrich_opportunities`.
+SCRAPE_ENRICH = env.bool('SCRAPE_ENRICH', default=False)
+SCRAPE_ENRICH_WORKERS = env.int('SCRAPE_ENRICH_WORKERS', default=4)
+SCRAPE_ENRICH_BATCH = env.int('SCRAPE_ENRICH_BATCH', default=100)
+
+# Structured events (per-source scrape timings from scraper.metrics) are
+# rendered as JSON and handed to the standard logging module, so they go
+# wherever the worker's log handlers send them.
+structlog.configure(
+    processors=[
+        structlog.stdlib.filter_by_level,
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+        structlog.processors.TimeStamper(fmt='iso'),
+        structlog.processors.JSONRenderer(),
+    ],
+    logger_factory=structlog.stdlib.LoggerFactory(),
+    wrapper_class=structlog.stdlib.BoundLogger,
+    cache_logger_on_first_use=True,
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -0,0 +1,21 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    The default runner with a per-process cache, so a test run never shares
+    job progress, locks or cached pages with a deployment's Redis whatever
+    CACHE_URL says.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        self._isolated = override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        )
+        self._isolated.enable()
+        super().setup_test_environment(**kwargs)
+
+    def teardown_test_environment(self, **kwargs):
+        super().teardown_test_environment(**kwargs)
+        self._isolated.disable()
@@ -6,4 +6,8 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("", views.dashboard, name="dashboard"),
     path("scrape/", views.trigger_scrape, name="trigger_scrape"),
+    path("scrape/status/<str:job_id>/", views.scrape_status, name="scrape_status"),
+    path("api/opportunities/", views.opportunities_api, name="opportunities_api"),
+    path("api/opportunities/export/", views.export_opportunities, name="export_opportunities"),
+    path("metrics", views.metrics, name="metrics"),
 ]
@@ -1,6 +1,6 @@
 # scraper/admin.py
 from django.contrib import admin
-from .models import Opportunity
+from .models import Opportunity, ScrapeRun, SourceRun, SourceState
 
 @admin.register(Opportunity)
 class OpportunityAdmin(admin.ModelAdmin):
@@ -8,4 +8,32 @@ class OpportunityAdmin(admin.ModelAdmin):
     
     # This adds a search bar and filters
     search_fields = ('title', 'university', 'description')
-    list_filter = ('university', 'source_type', 'created_at')
\ No newline at end of file
+    list_filter = ('university', 'source_type', 'enrichment', 'created_at')
+    raw_id_fields = ('duplicate_of',)
+
+class SourceRunInline(admin.TabularInline):
+    model = SourceRun
+    fields = ('label', 'ok', 'status_code', 'error', 'latency', 'items_parsed', 'new_items')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+@admin.register(ScrapeRun)
+class ScrapeRunAdmin(admin.ModelAdmin):
+    list_display = ('finished_at', 'trigger', 'sources', 'failures', 'new_items')
+    list_filter = ('trigger',)
+    readonly_fields = ('trigger', 'started_at', 'finished_at', 'sources', 'failures', 'new_items', 'metrics')
+    inlines = [SourceRunInline]
+
+@admin.register(SourceRun)
+class SourceRunAdmin(admin.ModelAdmin):
+    list_display = ('started_at', 'university', 'label', 'ok', 'status_code', 'latency', 'new_items')
+    list_filter = ('ok', 'university')
+    search_fields = ('label', 'url', 'error')
+
+@admin.register(SourceState)
+class SourceStateAdmin(admin.ModelAdmin):
+    list_display = ('url', 'failures', 'circuit_open_until', 'last_status_code', 'last_latency',
+                    'last_new', 'interval', 'next_poll_at')
+    list_filter = ('failures',)
+    search_fields = ('url', 'last_error')
@@ -0,0 +1,307 @@
+"""
+Async-native scrape path: ``AsyncIvyScraper``.
+
+Feeds and pages are fetched with ``httpx.AsyncClient`` and Playwright
+renders are awaited on the shared BrowserPool (``playwright.async_api``),
+so one event loop keeps up to ``SCRAPE_ASYNC_MAX_CONCURRENCY`` fetches in
+flight without a thread each.  Per-host caps and token buckets (see
+``scraper.ratelimit``), the 429/5xx retry policy (Retry-After capped at
+``SCRAPE_HTTP_RETRY_AFTER_MAX``), conditional GETs, streaming feed parsing
+and metrics all match ``IvyScraper``.
+
+Parsing reuses the synchronous helpers in ``scraper.logic``.  Database work
+(validators, ``_save_items`` batches, schedule and run bookkeeping) goes
+through ``sync_to_async``; thread-sensitive calls all run on one thread,
+which keeps writes serialised.  Await it from an async view, or run it in a
+Celery worker or command with ``asyncio.run(AsyncIvyScraper().scrape_all())``.
+"""
+
+import asyncio
+import email.utils
+import hashlib
+import logging
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from urllib.parse import urlsplit
+
+import httpx
+import soupsieve
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from lxml import etree
+
+from . import dedupe, enrich, logic, metrics, ratelimit, registry
+from .schedule import claim_due, without_open_circuits
+from .stats import refresh_stats
+
+logger = logging.getLogger(__name__)
+
+ASYNC_MAX_CONCURRENCY = getattr(settings, "SCRAPE_ASYNC_MAX_CONCURRENCY", 32)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def _retry_delay(resp, attempt):
+    """Seconds to wait before retrying ``resp``: Retry-After (capped) or exponential backoff."""
+    retry_after = resp.headers.get("Retry-After")
+    if retry_after:
+        try:
+            seconds = float(retry_after)
+        except ValueError:
+            try:
+                seconds = email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                seconds = None
+        if seconds is not None:
+            return min(max(seconds, 0), logic.HTTP_RETRY_AFTER_MAX)
+    return logic.HTTP_BACKOFF * 2 ** attempt
+
+
+async def _timed_aiter(stage, aiterable):
+    """Async ``metrics.timed_iter``: time spent waiting for each item goes to ``stage``."""
+    iterator = aiterable.__aiter__()
+    while True:
+        with metrics.span(stage):
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+        yield item
+
+
+class AsyncIvyScraper:
+    """
+    Event-loop counterpart of ``IvyScraper``: RSS/Atom first, HTML through
+    httpx + BS4 next, Playwright last.  One instance scrapes one run at a
+    time; its clients and limits are created per run, on the running loop.
+    """
+
+    def __init__(self, max_concurrency=None):
+        self.max_concurrency = max_concurrency or ASYNC_MAX_CONCURRENCY
+        self._clients = None
+        self._slots = None
+        self._hosts = {}
+
+    # ── HTTP ──────────────────────────────────────────────────
+    @asynccontextmanager
+    async def _session(self):
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=logic.HTTP_POOL_SIZE,
+        )
+        async with AsyncExitStack() as stack:
+            # Feeds are fetched without certificate checks, as in logic._scrape_rss
+            self._clients = {
+                verify: await stack.enter_async_context(httpx.AsyncClient(
+                    headers=logic.COMMON_HEADERS,
+                    follow_redirects=True,
+                    transport=httpx.AsyncHTTPTransport(verify=verify, limits=limits, retries=logic.HTTP_RETRIES),
+                ))
+                for verify in (True, False)
+            }
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._hosts = {}
+            try:
+                yield
+            finally:
+                self._clients = self._slots = None
+
+    @asynccontextmanager
+    async def _limit(self, url, limit=None):
+        """One of the run's fetch slots plus one of the host's (``SCRAPE_MAX_PER_HOST``)."""
+        key = (urlsplit(url).netloc.lower(), limit or logic.SCRAPE_MAX_PER_HOST)
+        host = self._hosts.get(key)
+        if host is None:
+            host = self._hosts[key] = asyncio.Semaphore(key[1])
+        async with host, self._slots:
+            yield
+
+    async def _get(self, url, headers=None, timeout=20, verify=True):
+        """
+        Stream a GET, retrying 429/5xx answers like the shared requests
+        session does.  The caller must ``aclose()`` the response.
+        """
+        client = self._clients[verify]
+        for attempt in range(logic.HTTP_RETRIES + 1):
+            request = client.build_request("GET", url, headers=headers, timeout=timeout)
+            resp = await client.send(request, stream=True)
+            if resp.status_code not in RETRY_STATUSES or attempt == logic.HTTP_RETRIES:
+                return resp
+            await resp.aclose()
+            await asyncio.sleep(_retry_delay(resp, attempt))
+
+    # ── strategies ────────────────────────────────────────────
+    async def _scrape_rss(self, feed_url, university_name, source_type="news_event", timeout=25):
+        """Async ``logic._scrape_rss``: stream the feed, saving entries in batches as they parse."""
+        headers, validator = await sync_to_async(logic._feed_request_headers)(feed_url)
+        with metrics.span("throttle"):
+            await ratelimit.aacquire(feed_url)
+        with metrics.span("request"):
+            resp = await self._get(feed_url, headers=headers, timeout=timeout, verify=False)
+        metrics.status(resp.status_code)
+        save = sync_to_async(logic._save_entries)
+        try:
+            if resp.status_code == 304:
+                logger.info("%s not modified since last fetch — skipping", feed_url)
+                return 0
+            resp.raise_for_status()
+
+            hasher = hashlib.sha256()
+            parser = logic._feed_parser()
+            count = 0
+            batch = []
+            flushed = False
+            try:
+                async for chunk in _timed_aiter("download", resp.aiter_bytes(logic.FEED_CHUNK_SIZE)):
+                    hasher.update(chunk)
+                    metrics.incr("bytes", len(chunk))
+                    with metrics.span("parse"):
+                        parser.feed(chunk)
+                        entries = list(logic._drain_entries(parser))
+                    metrics.incr("parsed", len(entries))
+                    batch.extend(entries)
+                    if len(batch) >= logic.FEED_SAVE_BATCH:
+                        count += await save(batch, university_name, source_type)
+                        batch = []
+                        flushed = True
+                with metrics.span("parse"):
+                    parser.close()
+                    entries = list(logic._drain_entries(parser))
+                metrics.incr("parsed", len(entries))
+                batch.extend(entries)
+            except etree.XMLSyntaxError as exc:
+                logger.error("XML parse error for %s: %s", feed_url, exc)
+                return count + await save(batch, university_name, source_type)
+        finally:
+            await resp.aclose()
+
+        body_hash = hasher.hexdigest()
+        store = sync_to_async(logic._store_validators)
+        if not flushed and validator is not None and validator.body_hash == body_hash:
+            logger.info("%s unchanged since last fetch — skipping", feed_url)
+            await store(feed_url, resp, body_hash)
+            return 0
+        count += await save(batch, university_name, source_type)
+        await store(feed_url, resp, body_hash)
+        return count
+
+    async def _scrape_with_httpx(self, url, list_selector, title_selector, university_name,
+                                 source_type="news_event", timeout=20):
+        with metrics.span("throttle"):
+            await ratelimit.aacquire(url)
+        with metrics.span("request"):
+            resp = await self._get(url, timeout=timeout)
+        metrics.status(resp.status_code)
+        try:
+            resp.raise_for_status()
+            with metrics.span("download"):
+                body = await resp.aread()
+        finally:
+            await resp.aclose()
+        metrics.incr("bytes", len(body))
+        items = logic._parse_listing(resp.text, url, list_selector, title_selector)
+        return await sync_to_async(logic._save_items)(items, university_name, source_type)
+
+    async def _scrape_with_playwright(self, url, list_selector, title_selector, university_name,
+                                      source_type="news_event"):
+        from .browser import get_browser_pool
+        list_selector = soupsieve.compile(list_selector)
+        title_selector = soupsieve.compile(title_selector)
+        with metrics.span("throttle"):
+            await ratelimit.aacquire(url)
+        with metrics.span("render"):
+            html = await get_browser_pool().arender(url, list_selector.pattern)
+        metrics.incr("bytes", len(html.encode()))
+        items = logic._parse_rendered(html, list_selector, title_selector)
+        return await sync_to_async(logic._save_items)(items, university_name, source_type)
+
+    async def scrape_university(self, url, list_selector, title_selector,
+                                university_name, source_type="news_event", timeout=20):
+        """Generic HTML scrape with Playwright fallback; raises the httpx error if both fail."""
+        logger.info("Scraping %s via httpx…", url)
+        try:
+            return await self._scrape_with_httpx(url, list_selector, title_selector, university_name,
+                                                 source_type, timeout)
+        except Exception as exc:
+            logger.warning("httpx failed (%s) — trying Playwright", exc)
+            error = exc
+        try:
+            return await self._scrape_with_playwright(url, list_selector, title_selector, university_name,
+                                                      source_type)
+        except Exception as exc:
+            logger.error("Playwright also failed: %s", exc)
+            raise error
+
+    # ── runs ──────────────────────────────────────────────────
+    async def scrape_source(self, university, src):
+        """Scrape one registry Source inside a run; errors are logged and count as 0."""
+        label = src.label
+        n = 0
+        with metrics.source_span(university, label, src.url) as sample:
+            try:
+                async with self._limit(src.url, src.max_per_host):
+                    if src.type == "rss":
+                        n = await self._scrape_rss(src.url, university, src.source_type, src.timeout)
+                    else:
+                        n = await self.scrape_university(
+                            src.url, src.list_select, src.title_select, university, src.source_type, src.timeout,
+                        )
+                logger.info("%s → %d new items", label, n)
+            except httpx.HTTPStatusError as e:
+                logger.error("%s: HTTP %s — skipping", label, e.response.status_code)
+                sample.ok, sample.error = False, f"HTTP {e.response.status_code}"
+                sample.status_code = e.response.status_code
+            except httpx.TimeoutException:
+                logger.error("%s: request timed out — skipping", label)
+                sample.ok, sample.error = False, "Timed out"
+            except Exception as exc:
+                logger.error("%s: unexpected error — %s", label, exc)
+                sample.ok, sample.error = False, f"{type(exc).__name__}: {exc}"
+            sample.new = n
+        return n
+
+    async def _scrape_tracked(self, university, sources, progress=None):
+        if progress:
+            await sync_to_async(progress)(university, "running", 0)
+        counts = await asyncio.gather(*(self.scrape_source(university, src) for src in sources))
+        n = sum(counts)
+        if progress:
+            await sync_to_async(progress)(university, "done", n)
+        return n
+
+    async def scrape_all(self, progress=None, sources=None, trigger="scrape_all_async"):
+        """
+        Scrape every configured source concurrently on the running loop.
+        Same contract as ``IvyScraper.scrape_all``: ``sources`` restricts
+        the run, open circuits are skipped, the run is recorded, and stats
+        are refreshed (and new items enriched) when rows were added.
+        Returns ``{university: new_count}``.
+        """
+        if sources is None:
+            sources = registry.get_registry().sources
+        sources = await sync_to_async(without_open_circuits)(sources)
+        await sync_to_async(dedupe.warm)()
+        with metrics.scrape_run(trigger, persist=False) as run:
+            async with self._session():
+                counts = await asyncio.gather(*(
+                    self._scrape_tracked(uni, srcs, progress) for uni, srcs in sources.items()
+                ))
+        results = dict(zip(sources, counts))
+        await sync_to_async(metrics.record_run)(trigger, run.sources, run.started_at)
+        if any(results.values()):
+            await sync_to_async(refresh_stats)()
+            if enrich.ENRICH:
+                await sync_to_async(enrich.enrich_pending)()
+        return results
+
+    async def scrape_one(self, university, progress=None):
+        """Scrape all configured sources for one university."""
+        configured = registry.get_registry().sources.get(university, ())
+        if not configured:
+            logger.warning("No sources configured for '%s'", university)
+        results = await self.scrape_all(progress, {university: configured}, trigger="scrape_one_async")
+        return results.get(university, 0)
+
+    async def scrape_due(self, progress=None):
+        """Scrape only the sources whose adaptive polling schedule says they are due."""
+        due = await sync_to_async(claim_due)(registry.get_registry().sources)
+        return await self.scrape_all(progress, due, trigger="scrape_due_async")
@@ -0,0 +1,214 @@
+"""
+Long-lived Playwright browser pool for the HTML fallback strategy.
+
+Launching Chromium costs seconds and hundreds of MB, so each process keeps
+one browser alive and hands every render a fresh, isolated context.  The
+browser is driven through ``playwright.async_api`` on a private event-loop
+thread: ``render()`` may be called from any thread (scrape_all's pool,
+Celery), ``arender()`` awaited from any other event loop, and up to
+``max_pages`` pages render concurrently in the same browser.  The browser
+is recycled after ``recycle_pages`` renders or ``max_age`` seconds so
+leaks in long-running workers stay bounded, and relaunched if it has
+disconnected (Chromium crashed or was OOM-killed).
+"""
+
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from .logic import COMMON_HEADERS
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGES = getattr(settings, "SCRAPE_BROWSER_MAX_PAGES", 4)
+RECYCLE_PAGES = getattr(settings, "SCRAPE_BROWSER_RECYCLE_PAGES", 100)
+MAX_AGE = getattr(settings, "SCRAPE_BROWSER_MAX_AGE", 30 * 60)
+
+# Heavy resources that never affect the markup we parse
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media"})
+
+LAUNCH_ARGS = ["--no-sandbox", "--disable-blink-features=AutomationControlled", "--disable-dev-shm-usage"]
+STEALTH_SCRIPT = "Object.defineProperty(navigator,'webdriver',{get:()=>undefined})"
+
+
+async def _block_heavy_resources(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+class BrowserPool:
+    def __init__(self, max_pages=MAX_PAGES, recycle_pages=RECYCLE_PAGES, max_age=MAX_AGE):
+        self.max_pages = max_pages
+        self.recycle_pages = recycle_pages
+        self.max_age = max_age
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # Everything below is only touched from the pool's event loop
+        self._playwright = None
+        self._browser = None
+        self._launched_at = 0.0
+        self._served = 0
+        self._in_flight = {}  # browser -> open contexts
+        self._retired = set()
+        self._slots = None
+        self._browser_lock = None
+
+    # ── event loop thread ─────────────────────────────────────
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="ivy-browser-pool", daemon=True,
+                )
+                self._thread.start()
+        return self._loop
+
+    def _call(self, coro, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result(timeout)
+
+    # ── browser lifecycle ─────────────────────────────────────
+    async def _launch(self):
+        if self._playwright is None:
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+        return await self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+
+    def _needs_recycle(self):
+        if not self._browser.is_connected():
+            logger.warning("Browser disconnected; launching a new one")
+            return True
+        return (
+            self._served >= self.recycle_pages
+            or time.monotonic() - self._launched_at >= self.max_age
+        )
+
+    async def _acquire_browser(self):
+        async with self._browser_lock:
+            if self._browser is not None and self._needs_recycle():
+                old, self._browser = self._browser, None
+                self._retired.add(old)
+                await self._close_if_idle(old)
+            if self._browser is None:
+                self._browser = await self._launch()
+                self._launched_at = time.monotonic()
+                self._served = 0
+                self._in_flight[self._browser] = 0
+            self._served += 1
+            self._in_flight[self._browser] += 1
+            return self._browser
+
+    async def _release_browser(self, browser):
+        self._in_flight[browser] -= 1
+        await self._close_if_idle(browser)
+
+    async def _close_if_idle(self, browser):
+        # Retired browsers are closed once their last in-flight page finishes
+        if browser in self._retired and self._in_flight.get(browser) == 0:
+            self._retired.discard(browser)
+            del self._in_flight[browser]
+            try:
+                await browser.close()
+            except Exception as exc:
+                logger.warning("Closing recycled browser failed: %s", exc)
+
+    # ── rendering ─────────────────────────────────────────────
+    async def _render(self, url, selector, timeout_ms):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pages)
+            self._browser_lock = asyncio.Lock()
+        async with self._slots:
+            browser = await self._acquire_browser()
+            try:
+                context = await browser.new_context(
+                    user_agent=COMMON_HEADERS["User-Agent"],
+                    viewport={"width": 1280, "height": 900},
+                    locale="en-US",
+                    timezone_id="America/New_York",
+                    extra_http_headers={"Accept-Language": "en-US,en;q=0.9", "DNT": "1"},
+                )
+                try:
+                    await context.add_init_script(STEALTH_SCRIPT)
+                    await context.route("**/*", _block_heavy_resources)
+                    page = await context.new_page()
+                    await page.goto(url, wait_until="domcontentloaded", timeout=45_000)
+                    try:
+                        await page.wait_for_selector(selector, timeout=timeout_ms)
+                    except Exception:
+                        logger.warning("Selector '%s' not found; scraping available DOM", selector)
+                    return await page.content()
+                finally:
+                    await context.close()
+            finally:
+                await self._release_browser(browser)
+
+    def render(self, url, selector, timeout_ms=15_000):
+        """Load ``url`` in a fresh context, wait for ``selector`` and return the HTML."""
+        return self._call(self._render(url, selector, timeout_ms))
+
+    async def arender(self, url, selector, timeout_ms=15_000):
+        """``render()`` for callers on another event loop; awaits without blocking it."""
+        future = asyncio.run_coroutine_threadsafe(self._render(url, selector, timeout_ms), self._ensure_loop())
+        return await asyncio.wrap_future(future)
+
+    async def _shutdown(self):
+        for browser in [self._browser, *self._retired]:
+            if browser is not None:
+                try:
+                    await browser.close()
+                except Exception:
+                    pass
+        self._browser = None
+        self._retired.clear()
+        self._in_flight.clear()
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def close(self):
+        """Close the browser and stop the pool's event loop."""
+        if self._loop is None:
+            return
+        try:
+            self._call(self._shutdown(), timeout=30)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """The process-wide BrowserPool, created on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BrowserPool()
+    return _pool
+
+
+def _close_pool():
+    if _pool is not None:
+        _pool.close()
+
+
+def _forget_pool():
+    # A forked child can't use its parent's browser or event-loop thread
+    global _pool
+    _pool = None
+
+
+atexit.register(_close_pool)
+os.register_at_fork(after_in_child=_forget_pool)
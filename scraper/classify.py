@@ -0,0 +1,96 @@
+"""
+Keyword classification of scraped items into the dashboard's opportunity types.
+
+The taxonomy is compiled once into a single case-insensitive regex
+alternation, so classifying an item is one scan of its title and
+description whatever the number of keywords.  Every matched keyword adds
+its category; the item's ``source_type`` becomes the most specific
+category found (``CATEGORY_PRIORITY``), or stays the source's configured
+type when nothing matches.
+
+Most items in a university feed are news, and news is full of professors,
+engineers, directors and awards.  Those ``GENERIC_KEYWORDS`` only count on
+an item that also reads like an opportunity: one with an
+``OPPORTUNITY_CUES`` word ("apply", "hiring", "deadline", "seeking" ...) or
+a keyword naming an opportunity outright ("internship", "postdoc" ...).
+"Professor wins Nobel award" stays news; "Seeking an assistant professor"
+doesn't.
+"""
+
+import re
+
+# category -> keywords (matched as whole words, plurals included)
+TAXONOMY = {
+    "internship": ("internship", "intern", "summer program", "co-op"),
+    "fellowship": ("fellowship", "fellow", "grant", "scholarship", "award", "stipend"),
+    "research_position": (
+        "postdoc", "postdoctoral", "research assistant", "research associate",
+        "research scientist", "research fellow", "lab manager",
+    ),
+    "academic_position": (
+        "lecturer", "professor", "faculty", "tenure track", "instructor",
+    ),
+    "job": (
+        "job", "position", "opening", "hiring", "career", "vacancy", "vacancies", "appointment",
+        "associate", "analyst", "engineer", "coordinator", "administrator", "director",
+        "officer", "specialist",
+    ),
+}
+
+# Keywords that turn up in ordinary news as often as in postings
+GENERIC_KEYWORDS = frozenset({
+    "fellow", "grant", "scholarship", "award",
+    "professor", "faculty", "instructor",
+    "job", "position", "opening", "career", "appointment", "associate", "analyst",
+    "engineer", "coordinator", "administrator", "director", "officer", "specialist",
+})
+
+# Words that make an item read like an opportunity rather than news
+OPPORTUNITY_CUES = (
+    "apply", "application", "applicant", "hiring", "deadline", "seeking", "recruiting",
+    "opportunity", "opportunities", "vacancy", "vacancies", "now accepting", "call for",
+)
+
+# Most specific first: a "research fellow" posting is a research position
+CATEGORY_PRIORITY = ("internship", "research_position", "fellowship", "academic_position", "job")
+
+_SEPARATORS_RE = re.compile(r"[\s-]+")
+
+
+def _normalise(keyword):
+    return _SEPARATORS_RE.sub(" ", keyword.lower())
+
+
+_CATEGORY_BY_KEYWORD = {_normalise(kw): category for category, kws in TAXONOMY.items() for kw in kws}
+_CUES = frozenset(map(_normalise, OPPORTUNITY_CUES))
+
+# Longest keywords first so "research fellow" wins over "fellow"; words in
+# multi-word keywords may be separated by spaces or hyphens ("tenure-track").
+_KEYWORD_RE = re.compile(
+    r"\b(" + "|".join(
+        r"[\s-]+".join(map(re.escape, kw.split()))
+        for kw in sorted(_CATEGORY_BY_KEYWORD.keys() | _CUES, key=len, reverse=True)
+    ) + r")(?:e?s)?\b",
+    re.IGNORECASE,
+)
+
+
+def classify(title, description="", default="news_event"):
+    """Return ``(source_type, categories)`` for one item; categories are sorted by priority."""
+    found, generic, cued = set(), set(), False
+    for match in _KEYWORD_RE.finditer(f"{title}\n{description}"):
+        keyword = _normalise(match.group(1))
+        category = _CATEGORY_BY_KEYWORD.get(keyword)
+        if keyword in _CUES:
+            cued = True
+        if category is None:
+            continue
+        if keyword in GENERIC_KEYWORDS:
+            generic.add(category)
+        else:
+            found.add(category)
+            cued = True
+    if cued:
+        found |= generic
+    categories = [c for c in CATEGORY_PRIORITY if c in found]
+    return (categories[0] if categories else default), categories
@@ -0,0 +1,119 @@
+"""
+Process-level cache of the content hashes already stored.
+
+In a steady-state scrape nearly every item is already in the table, so
+``_save_items`` first drops the items whose hash this process knows and
+only queries the database for the rest; a feed with nothing new costs no
+query at all.
+
+Hashes are kept as 64-bit prefixes in two generations of sets: once the
+current set reaches half of ``DEDUPE_CACHE_SIZE`` it becomes the previous
+one and a fresh set starts, so memory stays bounded while hashes still
+showing up in feeds are carried forward.  Only committed state is learnt
+(additions run on ``transaction.on_commit``), so rolled-back inserts never
+get in.  Deleting an Opportunity bumps a generation counter in the shared
+cache; every process then drops its hashes and reloads the newest ones via
+``warm()``.
+"""
+
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete
+
+from .models import Opportunity
+
+DEDUPE_CACHE_SIZE = getattr(settings, "SCRAPE_DEDUPE_CACHE_SIZE", 200_000)
+GENERATION_KEY = "scraper:dedupe:generation"
+
+
+def _prefix(content_hash):
+    return int(content_hash[:16], 16)
+
+
+class KnownHashes:
+    def __init__(self, max_size=DEDUPE_CACHE_SIZE):
+        self.max_size = max_size
+        self.loaded = False
+        self.generation = None
+        self._current = set()
+        self._previous = set()
+        self._lock = threading.Lock()
+
+    def __contains__(self, content_hash):
+        key = _prefix(content_hash)
+        if key in self._current:
+            return True
+        if key in self._previous:
+            with self._lock:
+                self._add(key)
+            return True
+        return False
+
+    def __len__(self):
+        return len(self._current) + len(self._previous)
+
+    def _add(self, key):
+        self._current.add(key)
+        if len(self._current) >= self.max_size // 2:
+            self._previous, self._current = self._current, set()
+
+    def add_many(self, hashes):
+        if self.max_size < 2:
+            return
+        with self._lock:
+            for content_hash in hashes:
+                self._add(_prefix(content_hash))
+
+    def clear(self):
+        with self._lock:
+            self._current, self._previous = set(), set()
+            self.loaded = False
+
+
+_known = KnownHashes()
+
+
+def _check_generation():
+    generation = cache.get(GENERATION_KEY, 0)
+    if generation != _known.generation:
+        _known.clear()
+        _known.generation = generation
+
+
+def warm():
+    """Load the newest stored hashes, once per process and after deletes."""
+    _check_generation()
+    if _known.loaded or _known.max_size < 2:
+        return
+    _known.loaded = True
+    hashes = list(
+        Opportunity.objects.order_by("-id").values_list("content_hash", flat=True)[: _known.max_size // 2]
+    )
+    transaction.on_commit(lambda: _known.add_many(hashes))
+
+
+def known(hashes):
+    """The members of ``hashes`` this process knows to be stored."""
+    _check_generation()
+    return [content_hash for content_hash in hashes if content_hash in _known]
+
+
+def remember(hashes):
+    """Learn ``hashes`` as stored once the current transaction commits."""
+    hashes = list(hashes)
+    if hashes:
+        transaction.on_commit(lambda: _known.add_many(hashes))
+
+
+def forget_all(**kwargs):
+    _known.clear()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+post_delete.connect(forget_all, sender=Opportunity, dispatch_uid="scraper.dedupe.forget_all")
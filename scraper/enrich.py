@@ -0,0 +1,299 @@
+"""
+Article enrichment: summary, publish date and deadline from each item's page.
+
+Feeds and listing pages give a title and at best a snippet.  With
+``SCRAPE_ENRICH`` on, ``_save_items`` marks every newly inserted row
+``enrichment="pending"`` and each scrape path then calls
+``enrich_pending()``, which walks only those rows (a partial index keeps
+the lookup independent of table size) in batches of ``ENRICH_BATCH``:
+
+- article pages are fetched on a pool of ``ENRICH_WORKERS`` threads, each
+  fetch taking the host's semaphore and a rate-limit token like any scrape;
+- the page's main text becomes the description when it is longer than the
+  feed's snippet, the publish date comes from its metadata, and a deadline
+  is looked for next to cue words ("apply by", "deadline" ...) with
+  precompiled date patterns;
+- results go back in one ``bulk_update`` per batch and the row is marked
+  ``"done"`` or ``"failed"``, so every URL is fetched once.
+
+Parsed articles are also kept in the shared cache for ``ENRICH_CACHE_TTL``,
+so a batch interrupted before its update doesn't fetch its pages again.
+``manage.py enrich_opportunities`` runs the same pass by hand, retries
+failures or backfills rows stored before enrichment was turned on.
+"""
+
+import hashlib
+import logging
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, time, timezone as dt_timezone
+
+import soupsieve
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import pagecache, ratelimit, similarity
+from .models import Opportunity
+
+logger = logging.getLogger(__name__)
+
+ENRICH = getattr(settings, "SCRAPE_ENRICH", False)
+ENRICH_WORKERS = getattr(settings, "SCRAPE_ENRICH_WORKERS", 4)
+ENRICH_BATCH = getattr(settings, "SCRAPE_ENRICH_BATCH", 100)
+ENRICH_TIMEOUT = 15
+ENRICH_MAX_BYTES = 2 * 1024 * 1024
+ENRICH_CACHE_TTL = 24 * 60 * 60
+ENRICH_LOCK_KEY = "scraper:enrich:lock"
+# Held per batch: the lock is refreshed before each one
+ENRICH_LOCK_TTL = 10 * 60
+SUMMARY_CHARS = 1000  # the length _save_items keeps from feeds
+
+PENDING, DONE, FAILED = "pending", "done", "failed"
+UPDATE_FIELDS = ["description", "published_at", "deadline", "enrichment", "simhash", *similarity.BAND_FIELDS]
+
+# ── dates ─────────────────────────────────────────────────────
+_MONTH = (
+    r"(?P<month>jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+)
+_ORDINAL = r"(?:st|nd|rd|th)?"
+# Tried in order at each position; month names first so "March 1, 2027"
+# isn't read as a bare number
+DATE_PATTERNS = (
+    re.compile(rf"\b{_MONTH}\s+(?P<day>\d{{1,2}}){_ORDINAL}(?:,?\s+(?P<year>\d{{4}}))?\b", re.I),
+    re.compile(rf"\b(?P<day>\d{{1,2}}){_ORDINAL}\s+(?:of\s+)?{_MONTH}(?:,?\s+(?P<year>\d{{4}}))?\b", re.I),
+    re.compile(r"\b(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})\b"),
+    re.compile(r"\b(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4}|\d{2})\b"),
+)
+DEADLINE_RE = re.compile(
+    r"\b(?:deadlines?|due(?:\s+date)?|apply\s+(?:by|before|no\s+later\s+than)|submit(?:ted)?\s+by"
+    r"|applications?\s+(?:are\s+|will\s+be\s+)?(?:due|close[sd]?|accepted\s+(?:until|through))"
+    r"|closing\s+date|closes?\s+on|register\s+by|registration\s+closes?|nominations?\s+due)\b",
+    re.I,
+)
+# How far after a cue word its date may start
+DEADLINE_WINDOW = 60
+_MONTHS = {name: i for i, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1
+)}
+
+# ── page structure ────────────────────────────────────────────
+PUBLISHED_META = soupsieve.compile(
+    'meta[property="article:published_time"], meta[itemprop="datePublished"], '
+    'meta[name="date"], meta[name="dcterms.date"], meta[name="DC.date"], meta[name="pubdate"]'
+)
+PUBLISHED_TIME = soupsieve.compile("time[datetime]")
+_JSONLD_PUBLISHED = re.compile(r'"datePublished"\s*:\s*"([^"]+)"')
+ARTICLE_BODY = soupsieve.compile('[itemprop="articleBody"], article, main, [role="main"]')
+PARAGRAPH = soupsieve.compile("p")
+BOILERPLATE = soupsieve.compile("script, style, noscript, nav, header, footer, aside, form")
+DESCRIPTION_META = soupsieve.compile('meta[property="og:description"], meta[name="description"]')
+_CHARSET_RE = re.compile(r"charset=([\w-]+)", re.I)
+_SPACE_RE = re.compile(r"\s+")
+
+
+def parse_date(text, reference=None):
+    """
+    The first date written in ``text`` (ISO, US numeric or with a month
+    name), or None.  A date without a year takes ``reference``'s year, or
+    the next one if that would put it before ``reference``.
+    """
+    best = None
+    for pattern in DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            if best is not None and match.start() >= best[0]:
+                break
+            value = _match_date(match, reference)
+            if value is not None:
+                best = (match.start(), value)
+                break
+    return best[1] if best else None
+
+
+def _match_date(match, reference):
+    month, day, year = match.group("month", "day", "year")
+    month = int(month) if month.isdigit() else _MONTHS[month[:3].lower()]
+    if year is None:
+        reference = reference or timezone.now().date()
+        year = reference.year
+    elif len(year) == 2:
+        year = 2000 + int(year)
+    try:
+        value = date(int(year), month, int(day))
+    except ValueError:
+        return None
+    if match.group("year") is None and value < reference:
+        value = value.replace(year=value.year + 1)
+    return value
+
+
+def find_deadline(text, reference=None):
+    """The date following the first deadline cue in ``text`` that has one, or None."""
+    for cue in DEADLINE_RE.finditer(text):
+        value = parse_date(text[cue.end():cue.end() + DEADLINE_WINDOW], reference)
+        if value is not None:
+            return value
+    return None
+
+
+def _to_datetime(value):
+    """An aware datetime from a metadata date string (ISO or free text), or None."""
+    value = value.strip()
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            return None
+        parsed = datetime.combine(day, time())
+    if timezone.is_naive(parsed):
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+
+# ── articles ──────────────────────────────────────────────────
+@dataclass(frozen=True)
+class Article:
+    summary: str = ""
+    published_at: datetime | None = None
+    deadline: date | None = None
+
+
+def _published_at(soup, html):
+    candidates = [el.get("content", "") for el in PUBLISHED_META.select(soup)]
+    candidates += [el.get("datetime", "") for el in PUBLISHED_TIME.select(soup, limit=1)]
+    jsonld = _JSONLD_PUBLISHED.search(html)
+    if jsonld:
+        candidates.append(jsonld.group(1))
+    for value in candidates:
+        if value and (parsed := _to_datetime(value)) is not None:
+            return parsed
+    return None
+
+
+def parse_article(html):
+    """Summary text, publish date and deadline from an article page."""
+    soup = BeautifulSoup(html, "html.parser")
+    published_at = _published_at(soup, html)
+    for el in BOILERPLATE.select(soup):
+        el.decompose()
+    body = ARTICLE_BODY.select_one(soup) or soup.body or soup
+    paragraphs = (p.get_text(" ", strip=True) for p in PARAGRAPH.select(body))
+    text = _SPACE_RE.sub(" ", " ".join(p for p in paragraphs if p) or body.get_text(" ", strip=True))
+    summary = text[:SUMMARY_CHARS]
+    if len(text) > SUMMARY_CHARS and " " in summary:
+        summary = summary.rsplit(" ", 1)[0]
+    if not summary:
+        meta = DESCRIPTION_META.select_one(soup)
+        summary = (meta.get("content", "") if meta else "").strip()[:SUMMARY_CHARS]
+    reference = published_at.date() if published_at else None
+    return Article(summary, published_at, find_deadline(text, reference))
+
+
+def _cache_key(url):
+    return f"scraper:article:{hashlib.md5(url.encode()).hexdigest()}"
+
+
+def fetch_article(url):
+    """Fetch and parse the article at ``url``, through the shared cache."""
+    key = _cache_key(url)
+    article = cache.get(key)
+    if article is not None:
+        return article
+    # Imported lazily: scraper.logic imports this module
+    from .logic import _host_semaphore, get_session
+    with _host_semaphore(url):
+        ratelimit.acquire(url)
+        resp = get_session().get(url, timeout=ENRICH_TIMEOUT, allow_redirects=True, stream=True)
+        with resp:
+            resp.raise_for_status()
+            content_type = resp.headers.get("Content-Type", "text/html")
+            chunks, size = [], 0
+            if "html" in content_type:
+                for chunk in resp.iter_content(64 * 1024):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= ENRICH_MAX_BYTES:
+                        break
+            body = b"".join(chunks)
+    charset = _CHARSET_RE.search(content_type)
+    try:
+        html = body.decode(charset.group(1) if charset else "utf-8", errors="replace")
+    except LookupError:
+        html = body.decode("utf-8", errors="replace")
+    article = parse_article(html) if html else Article()
+    cache.set(key, article, ENRICH_CACHE_TTL)
+    return article
+
+
+def _fetch_or_none(url):
+    try:
+        return fetch_article(url)
+    except Exception as exc:
+        logger.warning("Enrichment of %s failed: %s", url, exc)
+        return None
+
+
+def apply_article(obj, article):
+    """Copy what ``article`` found onto ``obj`` and mark it done (or failed if None)."""
+    if article is None:
+        obj.enrichment = FAILED
+        return
+    obj.enrichment = DONE
+    if len(article.summary) > len(obj.description):
+        obj.description = article.summary
+        similarity.sign(obj)
+    if article.published_at is not None:
+        obj.published_at = article.published_at
+    if article.deadline is not None and not obj.deadline:
+        obj.deadline = article.deadline.isoformat()
+
+
+def enrich_pending(limit=None, workers=None):
+    """
+    Enrich up to ``limit`` pending rows, oldest first.  Only one pass runs
+    at a time across workers: the pass holds a lock for ``ENRICH_LOCK_TTL``
+    and refreshes it before every batch, so a long backfill keeps it, and
+    stops if the lock expired and another worker took it over.  Returns
+    ``{"done": n, "failed": n}``.
+    """
+    counts = {DONE: 0, FAILED: 0}
+    token = uuid.uuid4().hex
+    if not cache.add(ENRICH_LOCK_KEY, token, ENRICH_LOCK_TTL):
+        logger.info("Enrichment already running — skipping")
+        return counts
+    try:
+        rows = Opportunity.objects.filter(enrichment=PENDING).order_by("pk").only(
+            "pk", "url", "title", "description", "deadline", "published_at", "simhash", *similarity.BAND_FIELDS
+        )
+        last_pk = 0
+        with ThreadPoolExecutor(max_workers=workers or ENRICH_WORKERS, thread_name_prefix="ivy-enrich") as pool:
+            while limit is None or sum(counts.values()) < limit:
+                size = ENRICH_BATCH if limit is None else min(ENRICH_BATCH, limit - sum(counts.values()))
+                if cache.get(ENRICH_LOCK_KEY) != token:
+                    logger.warning("Enrichment lock expired and was taken over — stopping")
+                    break
+                cache.touch(ENRICH_LOCK_KEY, ENRICH_LOCK_TTL)
+                batch = list(rows.filter(pk__gt=last_pk)[:size])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                for obj, article in zip(batch, pool.map(_fetch_or_none, [obj.url for obj in batch])):
+                    apply_article(obj, article)
+                    counts[obj.enrichment] += 1
+                with transaction.atomic():
+                    Opportunity.objects.bulk_update(batch, UPDATE_FIELDS)
+                    transaction.on_commit(pagecache.bump_data_version)
+                logger.info("Enriched %d articles (%d failed)", counts[DONE], counts[FAILED])
+    finally:
+        if cache.get(ENRICH_LOCK_KEY) == token:
+            cache.delete(ENRICH_LOCK_KEY)
+    return counts
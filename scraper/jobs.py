@@ -0,0 +1,137 @@
+"""
+Progress tracking for scrape jobs started from the dashboard.
+
+A job's summary and each university's progress live under separate cache
+keys, so concurrent scrape threads (or Celery tasks) never overwrite each
+other's updates.  An "active" key per scope (one university, or all of
+them) lets a second trigger while a job is still running attach to that
+job instead of starting another.
+
+Jobs fanned out per source (see ``scraper.tasks``) record progress per
+source instead; ``get_job`` folds those back into one entry per university.
+"""
+
+import uuid
+
+from django.core.cache import cache
+from django.utils import timezone
+
+JOB_TTL = 6 * 60 * 60
+FINISHED_STATES = ("done", "error")
+
+
+def _job_key(job_id):
+    return f"scraper:job:{job_id}"
+
+
+def _progress_key(job_id, university):
+    return f"scraper:job:{job_id}:{university}"
+
+
+def _source_key(job_id, university, index):
+    return f"scraper:job:{job_id}:{university}:{index}"
+
+
+def _active_key(scope):
+    return f"scraper:job:active:{scope}"
+
+
+def start_job(universities, scope="all"):
+    """
+    Register a job for ``universities`` and return ``(job_id, created)``.
+
+    If a job for the same scope is still queued or running its id is
+    returned with ``created=False`` and nothing new should be enqueued.
+    """
+    job_id = uuid.uuid4().hex
+    if not cache.add(_active_key(scope), job_id, JOB_TTL):
+        existing = cache.get(_active_key(scope))
+        job = get_job(existing) if existing else None
+        if job is not None and job["state"] not in FINISHED_STATES:
+            return existing, False
+        cache.set(_active_key(scope), job_id, JOB_TTL)
+
+    cache.set(_job_key(job_id), {
+        "id": job_id,
+        "scope": scope,
+        "state": "queued",
+        "universities": list(universities),
+        "message": "",
+        "created_at": timezone.now().isoformat(),
+    }, JOB_TTL)
+    cache.set_many(
+        {_progress_key(job_id, uni): {"status": "pending", "new": 0} for uni in universities},
+        JOB_TTL,
+    )
+    return job_id, True
+
+
+def _update_job(job_id, **fields):
+    job = cache.get(_job_key(job_id))
+    if job is None:
+        return
+    job.update(fields)
+    cache.set(_job_key(job_id), job, JOB_TTL)
+
+
+def mark_running(job_id):
+    _update_job(job_id, state="running")
+
+
+def record_progress(job_id, university, status, new=0):
+    cache.set(_progress_key(job_id, university), {"status": status, "new": new}, JOB_TTL)
+
+
+def expect_sources(job_id, counts):
+    """Switch job ``job_id`` to per-source progress; ``counts`` maps university → sources."""
+    _update_job(job_id, sources=dict(counts))
+
+
+def record_source_progress(job_id, university, index, status, new=0):
+    cache.set(_source_key(job_id, university, index), {"status": status, "new": new}, JOB_TTL)
+
+
+def _fold_sources(found):
+    # A university is done once every one of its sources is
+    if not found:
+        return {"status": "done", "new": 0}
+    statuses = [p["status"] for p in found]
+    if all(s in FINISHED_STATES for s in statuses):
+        status = "error" if "error" in statuses else "done"
+    elif any(s != "pending" for s in statuses):
+        status = "running"
+    else:
+        status = "pending"
+    return {"status": status, "new": sum(p["new"] for p in found)}
+
+
+def finish_job(job_id, state="done", message=""):
+    _update_job(job_id, state=state, message=message)
+    job = cache.get(_job_key(job_id))
+    if job is not None and cache.get(_active_key(job["scope"])) == job_id:
+        cache.delete(_active_key(job["scope"]))
+
+
+def get_job(job_id):
+    """Job summary with per-university progress, or None if unknown/expired."""
+    job = cache.get(_job_key(job_id))
+    if job is None:
+        return None
+    pending = {"status": "pending", "new": 0}
+    if "sources" in job:
+        keys = {
+            _source_key(job_id, uni, i): uni
+            for uni, count in job["sources"].items() for i in range(count)
+        }
+        found = cache.get_many(keys)
+        job["progress"] = {
+            uni: _fold_sources([found.get(k, pending) for k, u in keys.items() if u == uni])
+            for uni in job["universities"]
+        }
+    else:
+        keys = {_progress_key(job_id, uni): uni for uni in job["universities"]}
+        found = cache.get_many(keys)
+        job["progress"] = {uni: found.get(key, pending) for key, uni in keys.items()}
+    job["completed"] = sum(p["status"] in FINISHED_STATES for p in job["progress"].values())
+    job["new"] = sum(p["new"] for p in job["progress"].values())
+    return job
@@ -1,13 +1,27 @@
+import os
 import hashlib
-import time
-import random
 import logging
+import threading
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 urllib3.disable_warnings()
+import soupsieve
 from bs4 import BeautifulSoup
-from django.db import IntegrityError
-from .models import Opportunity
+from lxml import etree
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from . import dedupe, enrich, metrics, pagecache, ratelimit, registry, similarity
+from .classify import classify
+from .models import FeedValidator, Opportunity
+from .schedule import claim_due, without_open_circuits
+from .stats import refresh_stats
+from .text import html_to_text
 
 logger = logging.getLogger(__name__)
 
@@ -27,158 +41,399 @@ COMMON_HEADERS = {
     "DNT": "1",
     "Connection": "keep-alive",
 }
-OPPORTUNITY_KEYWORDS = {
-    "job", "position", "opening", "hiring", "career", "apply",
-    "fellowship", "internship", "postdoc", "postdoctoral", "research assistant",
-    "grant", "scholarship", "opportunity", "vacancy", "appointment",
-    "lecturer", "professor", "faculty", "associate", "analyst", "engineer",
-    "coordinator", "administrator", "director", "officer", "specialist",
-}
 
-def _is_opportunity(title, description=""):
-    text = (title + " " + description).lower()
-    return any(kw in text for kw in OPPORTUNITY_KEYWORDS)
-
-def _save_item(title, link, university_name, source_type="news_event", description=""):
-    """Persist a single scraped item; returns True if newly created."""
-    if not title or not link:
-        return False
-    # Normalise relative URLs
-    if link and not  link.startswith("http"):
-        base_map = {
-            "Harvard":   "https://news.harvard.edu",
-            "Yale":      "https://news.yale.edu",
-            "Princeton": "https://www.princeton.edu",
-            "MIT":       "https://news.mit.edu",
-            "Columbia":  "https://news.columbia.edu",
-            "UPenn":     "https://penntoday.upenn.edu",
-            "Cornell":   "https://news.cornell.edu",
-            "Dartmouth": "https://home.dartmouth.edu",
-            "Brown":     "https://news.brown.edu",
-        }
-        base = base_map.get(university_name, "")
-        link = base + link
-        
-    content_hash = hashlib.sha256(f"{title}{link}".encode()).hexdigest()
-    try:
-        _, created = Opportunity.objects.get_or_create(
-            content_hash=content_hash,
+RSS_ACCEPT = "application/rss+xml, application/xml, text/xml, */*"
+
+# Connection pool / retry policy for the shared HTTP session.
+HTTP_POOL_SIZE = getattr(settings, "SCRAPE_HTTP_POOL_SIZE", 10)
+HTTP_RETRIES = getattr(settings, "SCRAPE_HTTP_RETRIES", 3)
+HTTP_BACKOFF = getattr(settings, "SCRAPE_HTTP_BACKOFF", 0.5)
+HTTP_RETRY_AFTER_MAX = getattr(settings, "SCRAPE_HTTP_RETRY_AFTER_MAX", 60)
+
+
+class _CappedRetry(Retry):
+    """Retry that honours Retry-After but never sleeps longer than HTTP_RETRY_AFTER_MAX."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, HTTP_RETRY_AFTER_MAX)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    retry = _CappedRetry(
+        total=HTTP_RETRIES,
+        read=1,  # a read timeout already cost us the full timeout once
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.headers.update(COMMON_HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """
+    Return the process-wide pooled ``requests.Session``.
+
+    The session is built lazily and shared by every strategy and thread so
+    keep-alive connections and TLS sessions are reused across scrapes.
+    Per-request headers must be passed to ``get()`` rather than set on
+    ``session.headers``.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def _reset_session():
+    global _session
+    _session = None
+
+
+# Never share pooled sockets with a forked child (e.g. Celery prefork workers)
+os.register_at_fork(after_in_child=_reset_session)
+
+# Concurrency limits for IvyScraper.scrape_all — overridable from settings.
+SCRAPE_MAX_WORKERS = getattr(settings, "SCRAPE_MAX_WORKERS", 8)
+SCRAPE_MAX_PER_HOST = getattr(settings, "SCRAPE_MAX_PER_HOST", 2)
+
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+
+def _host_semaphore(url, limit=None):
+    """
+    Return the process-wide semaphore capping concurrent requests to url's
+    host at ``limit`` (default ``SCRAPE_MAX_PER_HOST``).
+    """
+    key = (urlsplit(url).netloc.lower(), limit or SCRAPE_MAX_PER_HOST)
+    with _host_semaphores_lock:
+        sem = _host_semaphores.get(key)
+        if sem is None:
+            sem = _host_semaphores[key] = threading.BoundedSemaphore(key[1])
+        return sem
+
+
+def _save_items(items, university_name, source_type="news_event"):
+    """
+    Persist a batch of scraped ``(title, link, description)`` items.
+
+    Links are canonicalised (tracking parameters stripped) before hashing.
+    Items whose hash this process already knows to be stored are dropped
+    without a query (see ``scraper.dedupe``).  Of the rest, those already
+    stored (same content_hash or URL) are found with a single ``IN`` query,
+    and near-duplicates of stored items with one more (see
+    ``scraper.similarity``).  New items are classified by keyword (see
+    ``scraper.classify``); those matching nothing keep the source's
+    configured ``source_type``.  They go out in one ``bulk_create``, so a
+    feed costs a handful of queries however many items it has; with
+    ``SCRAPE_ENRICH`` on they are queued for ``scraper.enrich``.  Returns
+    the number of rows actually inserted: items another worker stored
+    between the lookup and the insert are counted as duplicates.
+    """
+    base_url = registry.get_registry().base_url(university_name)
+    with metrics.span("dedupe"):
+        valid = 0
+        pending = {}
+        urls = set()
+        for title, link, description in items:
+            if not title or not link:
+                continue
+            valid += 1
+            # Normalise relative URLs
+            if not link.startswith("http"):
+                link = base_url + link
+            link = similarity.canonical_url(link)
+            content_hash = hashlib.sha256(f"{title}{link}".encode()).hexdigest()
+            if content_hash in pending or link in urls:
+                continue
+            urls.add(link)
+            pending[content_hash] = Opportunity(
+                title=title[:500],
+                url=link,
+                university=university_name,
+                source_type=source_type,
+                description=description[:1000],
+                content_hash=content_hash,
+                enrichment=enrich.PENDING if enrich.ENRICH else "",
+            )
+
+        for content_hash in dedupe.known(pending):
+            del pending[content_hash]
+        new, later = [], []
+        if pending:
+            known_hashes, known_urls = set(), set()
+            existing = Opportunity.objects.filter(
+                Q(content_hash__in=list(pending)) | Q(url__in=[obj.url for obj in pending.values()])
+            ).values_list("content_hash", "url")
+            for content_hash, url in existing:
+                known_hashes.add(content_hash)
+                known_urls.add(url)
+
+            new = [
+                obj for content_hash, obj in pending.items()
+                if content_hash not in known_hashes and obj.url not in known_urls
+            ]
+            new, later, near_duplicates = similarity.resolve_near_duplicates(new)
+            if near_duplicates:
+                metrics.incr("near_duplicates", near_duplicates)
+    metrics.incr("duplicates", valid - len(new) - len(later))
+    if not new:
+        dedupe.remember(pending)
+        return 0
+    with metrics.span("classify"):
+        for obj in new + later:
+            obj.source_type, obj.categories = classify(obj.title, obj.description, source_type)
+    with metrics.span("persist"), transaction.atomic():
+        Opportunity.objects.bulk_create(new, ignore_conflicts=True)
+        if later:
+            # Near-duplicates of items in this batch, now that those are stored
+            similarity.link_to_stored(later)
+            Opportunity.objects.bulk_create(later, ignore_conflicts=True)
+        inserted = _count_inserted(new + later)
+        dedupe.remember(pending)
+        transaction.on_commit(pagecache.bump_data_version)
+    if inserted < len(new) + len(later):
+        metrics.incr("duplicates", len(new) + len(later) - inserted)
+    metrics.incr("inserted", inserted)
+    return inserted
+
+
+def _count_inserted(objs):
+    """
+    How many of ``objs`` a ``bulk_create(ignore_conflicts=True)`` really
+    inserted (it returns them all).  A row that lost a unique-URL race to
+    another worker carries that worker's ``created_at``, not ours.
+    """
+    created = {obj.url: obj.created_at for obj in objs}
+    rows = Opportunity.objects.filter(url__in=list(created)).values_list("url", "created_at")
+    return sum(created[url] == created_at for url, created_at in rows)
+
+
+def _store_validators(feed_url, resp, body_hash):
+    """Remember ETag / Last-Modified / body hash for the next conditional GET."""
+    with metrics.span("persist"):
+        FeedValidator.objects.update_or_create(
+            url=feed_url,
             defaults={
-                "title": title[:500],
-                "url": link,
-                "university": university_name,
-                "source_type": source_type,
-                "description": description[:1000],
+                "etag": resp.headers.get("ETag", "")[:255],
+                "last_modified": resp.headers.get("Last-Modified", "")[:100],
+                "body_hash": body_hash,
             },
         )
-        return created
-    except IntegrityError:
-        return False
 
 
 # ---------------------------------------------------------------------------
 # RSS / Atom parser — handles RSS 2.0, Atom, and namespaced feeds (dc:, media:)
 # ---------------------------------------------------------------------------
 
-def _scrape_rss(feed_url, university_name, source_type="news_event"):
+ATOM = "{http://www.w3.org/2005/Atom}"
+CONTENT_ENCODED = "{http://purl.org/rss/1.0/modules/content/}encoded"
+
+# Download granularity for streamed feeds, and how many parsed entries are
+# buffered before they are written to the database.
+FEED_CHUNK_SIZE = 64 * 1024
+FEED_SAVE_BATCH = 50
+
+
+def _rss_entry(item):
+    title = (item.findtext("title") or "").strip()
+    # <link> in RSS 2.0 is a text node *between* sibling tags — lxml returns it via .text
+    link_el = item.find("link")
+    if link_el is not None:
+        # When <link> has no text (e.g. Atom-style inside RSS), fall back to tail
+        link = (link_el.text or link_el.tail or "").strip()
+    else:
+        link = ""
+
+    # Fallback: <guid isPermaLink="true"> or just <guid>
+    if not link:
+        guid_el = item.find("guid")
+        if guid_el is not None:
+            is_permalink = guid_el.attrib.get("isPermaLink", "true").lower()
+            if is_permalink != "false":
+                link = (guid_el.text or "").strip()
+
+    # Description: prefer content:encoded, then description (both HTML)
+    content_enc = item.find(CONTENT_ENCODED)
+    html_parts = (
+        content_enc.text if content_enc is not None else None,
+        item.findtext("description") or "",
+    )
+    return title, link, "", html_parts
+
+
+def _atom_entry(entry):
+    title_el = entry.find(f"{ATOM}title")
+    title = (title_el.text or "").strip() if title_el is not None else ""
+
+    # Prefer link with rel="alternate" or no rel attribute
+    link = ""
+    for link_el in entry.findall(f"{ATOM}link"):
+        rel = link_el.attrib.get("rel", "alternate")
+        if rel in ("alternate", ""):
+            link = link_el.attrib.get("href", "")
+            break
+    if not link:
+        # Any link
+        link_el = entry.find(f"{ATOM}link")
+        if link_el is not None:
+            link = link_el.attrib.get("href", "")
+
+    summary_el = entry.find(f"{ATOM}summary")
+    desc = (summary_el.text or "").strip() if summary_el is not None else ""
+    return title, link, desc, ()
+
+
+def _iter_feed_entries(chunks):
+    """
+    Incrementally parse an RSS or Atom document fed as byte chunks.
+
+    Yields ``(title, link, description, html_parts)`` for every <item> /
+    <entry> as soon as its closing tag arrives, then clears the element so
+    memory stays flat however large the feed is.  ``html_parts`` holds the
+    raw HTML candidates (content:encoded, description) still to be stripped
+    by ``_entry_description``.  lxml's ``recover`` mode copes with raw HTML
+    entities and unescaped ampersands; an unrecoverable document raises
+    ``etree.XMLSyntaxError``.
+    """
+    parser = _feed_parser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from _drain_entries(parser)
+    parser.close()
+    yield from _drain_entries(parser)
+
+
+def _feed_parser():
+    return etree.XMLPullParser(
+        events=("end",),
+        tag=("item", f"{ATOM}entry"),
+        recover=True,
+        resolve_entities=False,
+        no_network=True,
+    )
+
+
+def _drain_entries(parser):
+    """Yield the entries completed by the data fed to ``parser`` so far."""
+    for _, el in parser.read_events():
+        yield _rss_entry(el) if el.tag == "item" else _atom_entry(el)
+        el.clear(keep_tail=True)
+        while el.getprevious() is not None:
+            del el.getparent()[0]
+
+
+def _entry_description(desc, html_parts):
+    for part in html_parts:
+        if part:
+            with metrics.span("strip"):
+                desc = html_to_text(part, 500)
+        if desc:
+            break
+    return desc
+
+
+def _save_entries(entries, university_name, source_type):
+    items = [
+        (title, link, _entry_description(desc, html_parts))
+        for title, link, desc, html_parts in entries
+    ]
+    return _save_items(items, university_name, source_type)
+
+
+def _feed_request_headers(feed_url):
+    """Request headers for a feed, and its stored FeedValidator (or None)."""
+    # Some servers need an explicit Accept header for RSS/XML
+    headers = {"Accept": RSS_ACCEPT}
+
+    # Conditional GET: replay the validators from the last successful fetch
+    validator = FeedValidator.objects.filter(url=feed_url).first()
+    if validator is not None:
+        if validator.etag:
+            headers["If-None-Match"] = validator.etag
+        if validator.last_modified:
+            headers["If-Modified-Since"] = validator.last_modified
+    return headers, validator
+
+
+def _scrape_rss(feed_url, university_name, source_type="news_event", timeout=25):
     """
     Fetch and parse an RSS or Atom feed.  Handles:
       - RSS 2.0  (<item> with <link> as text node OR as CDATA)
       - Atom     (<entry> with <link href="..."/>)
       - dc: namespace (Dublin Core) used by Drupal/Princeton
       - <guid> as fallback link
-    """
-    import xml.etree.ElementTree as ET
 
-    session = requests.Session()
-    session.headers.update(COMMON_HEADERS)
-    # Some servers need an explicit Accept header for RSS/XML
-    session.headers["Accept"] = "application/rss+xml, application/xml, text/xml, */*"
+    The body is streamed straight into an incremental parser and entries
+    are saved in batches of FEED_SAVE_BATCH while the download continues.
+    """
+    headers, validator = _feed_request_headers(feed_url)
+    with metrics.span("throttle"):
+        ratelimit.acquire(feed_url)
+    with metrics.span("request"):
+        resp = get_session().get(
+            feed_url, headers=headers, timeout=timeout, allow_redirects=True, verify=False, stream=True,
+        )
+    metrics.status(resp.status_code)
+    with resp:
+        if resp.status_code == 304:
+            logger.info("%s not modified since last fetch — skipping", feed_url)
+            return 0
+        resp.raise_for_status()
 
-    resp = session.get(feed_url, timeout=25, allow_redirects=True, verify=False)
-    resp.raise_for_status()
+        hasher = hashlib.sha256()
 
-    # ElementTree chokes on encoding declarations sometimes; decode manually
-    content = resp.content
+        def chunks():
+            for chunk in metrics.timed_iter("download", resp.iter_content(FEED_CHUNK_SIZE)):
+                hasher.update(chunk)
+                metrics.incr("bytes", len(chunk))
+                yield chunk
 
-    try:
-        root = ET.fromstring(content)
-    except ET.ParseError:
-        # Some feeds embed raw HTML entities or unescaped ampersands.
-        # Re-parse with BeautifulSoup's lenient XML parser as fallback.
+        count = 0
+        batch = []
+        flushed = False
         try:
-            soup_xml = BeautifulSoup(content, "lxml-xml")
-            root = ET.fromstring(str(soup_xml))
-        except Exception as e2:
-            logger.error("XML parse error for %s (both parsers failed): %s", feed_url, e2)
-            return 0
-
-    # Namespace map — cover common cases
-    ns = {
-        "atom":  "http://www.w3.org/2005/Atom",
-        "dc":    "http://purl.org/dc/elements/1.1/",
-        "media": "http://search.yahoo.com/mrss/",
-        "content": "http://purl.org/rss/1.0/modules/content/",
-    }
-
-    count = 0
-
-    # ── RSS 2.0: <channel><item> ──────────────────────────────
-    for item in root.findall(".//item"):
-        title = (item.findtext("title") or "").strip()
-        # <link> in RSS 2.0 is a text node *between* sibling tags — ET returns it via .text
-        link_el = item.find("link")
-        if link_el is not None:
-            # When <link> has no text (e.g. Atom-style inside RSS), fall back to tail
-            link = (link_el.text or link_el.tail or "").strip()
-        else:
-            link = ""
-
-        # Fallback: <guid isPermaLink="true"> or just <guid>
-        if not link:
-            guid_el = item.find("guid")
-            if guid_el is not None:
-                is_permalink = guid_el.attrib.get("isPermaLink", "true").lower()
-                if is_permalink != "false":
-                    link = (guid_el.text or "").strip()
-
-        # Description: prefer content:encoded, then description
-        desc = ""
-        content_enc = item.find("{http://purl.org/rss/1.0/modules/content/}encoded")
-        if content_enc is not None and content_enc.text:
-            # Strip HTML from content:encoded
-            desc = BeautifulSoup(content_enc.text, "html.parser").get_text(" ", strip=True)[:500]
-        if not desc:
-            raw_desc = item.findtext("description") or ""
-            desc = BeautifulSoup(raw_desc, "html.parser").get_text(" ", strip=True)[:500]
-
-        if _save_item(title, link, university_name, source_type, desc):
-            count += 1
-
-    # ── Atom: <feed><entry> ───────────────────────────────────
-    for entry in root.findall(".//{http://www.w3.org/2005/Atom}entry"):
-        title_el = entry.find("{http://www.w3.org/2005/Atom}title")
-        title = (title_el.text or "").strip() if title_el is not None else ""
-
-        # Prefer link with rel="alternate" or no rel attribute
-        link = ""
-        for link_el in entry.findall("{http://www.w3.org/2005/Atom}link"):
-            rel = link_el.attrib.get("rel", "alternate")
-            if rel in ("alternate", ""):
-                link = link_el.attrib.get("href", "")
-                break
-        if not link:
-            # Any link
-            link_el = entry.find("{http://www.w3.org/2005/Atom}link")
-            if link_el is not None:
-                link = link_el.attrib.get("href", "")
-
-        summary_el = entry.find("{http://www.w3.org/2005/Atom}summary")
-        desc = (summary_el.text or "").strip() if summary_el is not None else ""
-
-        if _save_item(title, link, university_name, source_type, desc):
-            count += 1
-
+            for entry in metrics.timed_iter("parse", _iter_feed_entries(chunks())):
+                metrics.incr("parsed")
+                batch.append(entry)
+                if len(batch) >= FEED_SAVE_BATCH:
+                    count += _save_entries(batch, university_name, source_type)
+                    batch = []
+                    flushed = True
+        except etree.XMLSyntaxError as exc:
+            logger.error("XML parse error for %s: %s", feed_url, exc)
+            return count + _save_entries(batch, university_name, source_type)
+
+    # Servers without validators often still return a byte-identical body;
+    # feeds that fit in one batch then skip the DB entirely.
+    body_hash = hasher.hexdigest()
+    if not flushed and validator is not None and validator.body_hash == body_hash:
+        logger.info("%s unchanged since last fetch — skipping", feed_url)
+        _store_validators(feed_url, resp, body_hash)
+        return 0
+
+    count += _save_entries(batch, university_name, source_type)
+    _store_validators(feed_url, resp, body_hash)
     return count
 
 
@@ -186,35 +441,51 @@ def _scrape_rss(feed_url, university_name, source_type="news_event"):
 # Strategy 2 – requests + BS4 (HTML scrape, no JS)
 # ---------------------------------------------------------------------------
 
-def _scrape_with_requests(url, list_selector, title_selector, university_name, source_type="news_event"):
+def _scrape_with_requests(url, list_selector, title_selector, university_name, source_type="news_event",
+                          timeout=20):
+    with metrics.span("throttle"):
+        ratelimit.acquire(url)
+    with metrics.span("request"):
+        resp = get_session().get(url, timeout=timeout, allow_redirects=True, stream=True)
+    metrics.status(resp.status_code)
+    with resp:
+        resp.raise_for_status()
+        with metrics.span("download"):
+            body = resp.content
+    metrics.incr("bytes", len(body))
+    items = _parse_listing(resp.text, url, list_selector, title_selector)
+    return _save_items(items, university_name, source_type)
+
+
+def _parse_listing(html, url, list_selector, title_selector):
+    """``(title, link, "")`` for every listing entry on a page fetched from ``url``."""
     from urllib.parse import urljoin
-    session = requests.Session()
-    session.headers.update(COMMON_HEADERS)
-    resp = session.get(url, timeout=20, allow_redirects=True)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
-    items = soup.select(list_selector)
-    count = 0
-    for item in items:
-        el = item.select_one(title_selector)
-        if not el:
-            if item.name == "a":
-                el = item
-            else:
+    # Selectors may come precompiled from the registry; strings hit soupsieve's cache
+    list_selector = soupsieve.compile(list_selector)
+    title_selector = soupsieve.compile(title_selector)
+    with metrics.span("parse"):
+        soup = BeautifulSoup(html, "html.parser")
+        items = []
+        for item in list_selector.select(soup):
+            el = title_selector.select_one(item)
+            if not el:
+                if item.name == "a":
+                    el = item
+                else:
+                    continue
+            title = el.get_text(strip=True)
+            if not title:
                 continue
-        title = el.get_text(strip=True)
-        if not title:
-            continue
-        link = el.get("href", "")
-        if not link:
-            a = item.find("a", href=True)
-            link = a["href"] if a else ""
-        # Resolve relative paths like /news/article → https://brown.edu/news/article
-        if link and not link.startswith("http"):
-            link = urljoin(url, link)
-        if _save_item(title, link, university_name, source_type):
-            count += 1
-    return count
+            link = el.get("href", "")
+            if not link:
+                a = item.find("a", href=True)
+                link = a["href"] if a else ""
+            # Resolve relative paths like /news/article → https://brown.edu/news/article
+            if link and not link.startswith("http"):
+                link = urljoin(url, link)
+            items.append((title, link, ""))
+    metrics.incr("parsed", len(items))
+    return items
 
 
 # ---------------------------------------------------------------------------
@@ -222,110 +493,33 @@ def _scrape_with_requests(url, list_selector, title_selector, university_name, s
 # ---------------------------------------------------------------------------
 
 def _scrape_with_playwright(url, list_selector, title_selector, university_name, source_type="news_event"):
-    from playwright.sync_api import sync_playwright
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=True,
-            args=["--no-sandbox", "--disable-blink-features=AutomationControlled", "--disable-dev-shm-usage"],
-        )
-        context = browser.new_context(
-            user_agent=COMMON_HEADERS["User-Agent"],
-            viewport={"width": 1280, "height": 900},
-            locale="en-US",
-            timezone_id="America/New_York",
-            extra_http_headers={"Accept-Language": "en-US,en;q=0.9", "DNT": "1"},
-        )
-        context.add_init_script(
-            "Object.defineProperty(navigator,'webdriver',{get:()=>undefined})"
-        )
-        page = context.new_page()
-        count = 0
-        try:
-            page.goto(url, wait_until="domcontentloaded", timeout=45_000)
-            time.sleep(random.uniform(1.5, 3.0))
-            try:
-                page.wait_for_selector(list_selector, timeout=15_000)
-            except Exception:
-                logger.warning("Selector '%s' not found; scraping available DOM", list_selector)
-            soup = BeautifulSoup(page.content(), "html.parser")
-            for item in soup.select(list_selector):
-                el = item.select_one(title_selector)
-                if not el:
-                    continue
-                title = el.get_text(strip=True)
-                link = el.get("href", "")
-                if _save_item(title, link, university_name, source_type):
-                    count += 1
-        finally:
-            browser.close()
-    return count
-
+    # Imported lazily: the pool module pulls in Playwright on first render
+    from .browser import get_browser_pool
+    list_selector = soupsieve.compile(list_selector)
+    title_selector = soupsieve.compile(title_selector)
+    with metrics.span("throttle"):
+        ratelimit.acquire(url)
+    with metrics.span("render"):
+        html = get_browser_pool().render(url, list_selector.pattern)
+    metrics.incr("bytes", len(html.encode()))
+    return _save_items(_parse_rendered(html, list_selector, title_selector), university_name, source_type)
+
+
+def _parse_rendered(html, list_selector, title_selector):
+    with metrics.span("parse"):
+        soup = BeautifulSoup(html, "html.parser")
+        items = []
+        for item in list_selector.select(soup):
+            el = title_selector.select_one(item)
+            if not el:
+                continue
+            title = el.get_text(strip=True)
+            link = el.get("href", "")
+            items.append((title, link, ""))
+    metrics.incr("parsed", len(items))
+    return items
 
-# ---------------------------------------------------------------------------
-# Verified source configs  (URLs confirmed from official RSS listing pages)
-# ---------------------------------------------------------------------------
-#
-# Harvard: https://news.harvard.edu/gazette/rss-feeds/
-#   → All stories: https://news.harvard.edu/gazette/feed
-#
-# MIT: https://news.mit.edu/rss/feed   (confirmed working)
-#
-# Yale: https://news.yale.edu/rss-feeds
-#   → All topics: https://news.yale.edu/news-rss
-#
-# Princeton: https://www.princeton.edu/feed  (RSS 2.0, uses dc: namespace)
-# ---------------------------------------------------------------------------
 
-SOURCES = {
-    "Harvard": [
-        {
-            "url": "https://news.harvard.edu/gazette/feed",
-            "type": "rss",
-            "source_type": "news_event",
-            "label": "Harvard Gazette",
-        },
-    ],
-    "MIT": [
-        {
-            "url": "https://news.mit.edu/rss/feed",
-            "type": "rss",
-            "source_type": "news_event",
-            "label": "MIT News",
-        },
-    ],
-    "Yale": [
-        {
-            "url": "https://news.yale.edu/news-rss",
-            "type": "rss",
-            "source_type": "news_event",
-            "label": "Yale News",
-        },
-    ],
-    "Princeton": [
-        {
-            "url": "https://www.princeton.edu/feed",
-            "type": "rss",
-            "source_type": "news_event",
-            "label": "Princeton News",
-        },
-    ],
-    "Cornell": [
-        {
-            "url": "https://news.cornell.edu/rss",
-            "type": "rss",
-            "source_type": "news_event",
-            "label": "Cornell Chronicle",
-        },
-    ],
-    "Dartmouth": [
-        {
-            "url": "https://news.dartmouth.edu/feed",
-            "type": "rss",
-            "source_type": "news_event",
-            "label": "Dartmouth News",
-        },
-    ],
-}
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
@@ -339,55 +533,139 @@ class IvyScraper:
     """
 
     def scrape_university(self, url, list_selector, title_selector,
-                          university_name, source_type="news_event"):
-        """Generic HTML scrape entry point with Playwright fallback."""
+                          university_name, source_type="news_event", timeout=20):
+        """
+        Generic HTML scrape entry point with Playwright fallback.  If both
+        fail, the requests error is raised so the source counts as failed.
+        """
         logger.info("Scraping %s via requests…", url)
         try:
-            return _scrape_with_requests(url, list_selector, title_selector, university_name, source_type)
+            return _scrape_with_requests(url, list_selector, title_selector, university_name, source_type, timeout)
         except Exception as exc:
             logger.warning("requests failed (%s) — trying Playwright", exc)
+            error = exc
         try:
             return _scrape_with_playwright(url, list_selector, title_selector, university_name, source_type)
         except Exception as exc:
             logger.error("Playwright also failed: %s", exc)
-            return 0
-
-    def scrape_one(self, university):
-        """Scrape all configured sources for one university."""
-        sources = SOURCES.get(university, [])
-        if not sources:
-            logger.warning("No sources configured for '%s'", university)
-            return 0
-
-        total = 0
-        for src in sources:
-            label = src.get("label", src["url"])
+            raise error
+
+    def scrape_source(self, university, src):
+        """
+        Scrape a single registry Source; errors are logged and count as 0.
+        The outcome, status and stage timings go to the enclosing metrics
+        run, which updates the source's polling schedule when it ends.
+        """
+        label = src.label
+        n = 0
+        dedupe.warm()
+        with metrics.source_span(university, label, src.url) as sample:
             try:
-                if src["type"] == "rss":
-                    n = _scrape_rss(src["url"], university, src.get("source_type", "news_event"))
-                else:
-                    n = self.scrape_university(
-                        src["url"],
-                        src["list_selector"],
-                        src["title_selector"],
-                        university,
-                        src.get("source_type", "news_event"),
-                    )
+                with _host_semaphore(src.url, src.max_per_host):
+                    if src.type == "rss":
+                        n = _scrape_rss(src.url, university, src.source_type, src.timeout)
+                    else:
+                        n = self.scrape_university(
+                            src.url,
+                            src.list_select,
+                            src.title_select,
+                            university,
+                            src.source_type,
+                            src.timeout,
+                        )
                 logger.info("%s → %d new items", label, n)
-                total += n
             except requests.HTTPError as e:
                 logger.error("%s: HTTP %s — skipping", label, e.response.status_code)
+                sample.ok, sample.error = False, f"HTTP {e.response.status_code}"
+                sample.status_code = e.response.status_code
             except requests.Timeout:
                 logger.error("%s: request timed out — skipping", label)
+                sample.ok, sample.error = False, "Timed out"
             except Exception as exc:
                 logger.error("%s: unexpected error — %s", label, exc)
-
+                sample.ok, sample.error = False, f"{type(exc).__name__}: {exc}"
+            sample.new = n
+        return n
+
+    def _scrape_sources(self, university, sources=None):
+        if sources is None:
+            sources = registry.get_registry().sources.get(university, ())
+            if not sources:
+                logger.warning("No sources configured for '%s'", university)
+        return sum(self.scrape_source(university, src) for src in sources)
+
+    def _scrape_tracked(self, university, progress=None, sources=None):
+        # progress(university, status, new_count) lets callers (e.g. the
+        # Celery job tracker) follow each university as it runs.
+        if progress:
+            progress(university, "running", 0)
+        n = self._scrape_sources(university, sources)
+        if progress:
+            progress(university, "done", n)
+        return n
+
+    def scrape_one(self, university, progress=None):
+        """Scrape all configured sources for one university."""
+        configured = registry.get_registry().sources.get(university, ())
+        if not configured:
+            logger.warning("No sources configured for '%s'", university)
+        sources = without_open_circuits({university: configured})[university]
+        with metrics.scrape_run("scrape_one"):
+            total = self._scrape_tracked(university, progress, sources)
+        if total:
+            refresh_stats()
+            if enrich.ENRICH:
+                enrich.enrich_pending()
         return total
 
-    def scrape_all(self):
-        """Scrape every configured university."""
-        return {uni: self.scrape_one(uni) for uni in SOURCES}
+    def _scrape_tracked_in_thread(self, university, progress, sources=None):
+        # Worker threads get their own DB connection; release it when done
+        # so the pool doesn't leak connections across scrape cycles.
+        try:
+            return self._scrape_tracked(university, progress, sources)
+        finally:
+            connection.close()
+
+    def scrape_all(self, max_workers=None, progress=None, sources=None):
+        """
+        Scrape every configured university concurrently.
+
+        Feeds are fetched on a bounded thread pool (``SCRAPE_MAX_WORKERS``)
+        and each host is capped at ``SCRAPE_MAX_PER_HOST`` in-flight
+        requests, so a full cycle takes roughly as long as the slowest feed.
+        ``sources`` ({university: [Source, ...]}) restricts the run to a
+        subset of the registry.  Sources with an open circuit breaker are
+        skipped.  New items are enriched afterwards if ``SCRAPE_ENRICH`` is
+        on.  Returns ``{university: new_count}`` in registry order.
+        """
+        if sources is None:
+            sources = registry.get_registry().sources
+        sources = without_open_circuits(sources)
+        workers = min(max_workers or SCRAPE_MAX_WORKERS, len(sources))
+        with metrics.scrape_run("scrape_all"):
+            if workers <= 1:
+                results = {uni: self._scrape_tracked(uni, progress, srcs) for uni, srcs in sources.items()}
+            else:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ivy-scrape") as pool:
+                    # Each worker runs in a copy of this context so its
+                    # sources are counted towards this run
+                    futures = {
+                        uni: pool.submit(copy_context().run, self._scrape_tracked_in_thread, uni, progress, srcs)
+                        for uni, srcs in sources.items()
+                    }
+                    results = {uni: fut.result() for uni, fut in futures.items()}
+
+        # Dashboard counters are recomputed once per run, not per feed
+        if any(results.values()):
+            refresh_stats()
+            if enrich.ENRICH:
+                enrich.enrich_pending()
+        return results
+
+    def scrape_due(self, max_workers=None, progress=None):
+        """Scrape only the sources whose adaptive polling schedule says they are due."""
+        return self.scrape_all(max_workers, progress, sources=claim_due(registry.get_registry().sources))
 
     @property
     def universities(self):
-        return list(SOURCES.keys())
+        return registry.get_registry().universities
@@ -0,0 +1,332 @@
+import json
+import platform
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from django.utils import timezone
+from scraper import logic, ratelimit
+from scraper.models import FeedValidator, Opportunity, ScrapeRun, SourceState
+from scraper.registry import build_registry, get_registry
+
+TESTDATA_DIR = Path(__file__).resolve().parents[2] / 'testdata'
+PAYLOADS = {
+    # kind: (fixture directory, extension, content type)
+    'rss': ('feeds', 'xml', 'application/rss+xml'),
+    'atom': ('atom', 'xml', 'application/atom+xml'),
+    'html': ('html', 'html', 'text/html; charset=utf-8'),
+}
+LIST_SELECTOR = 'article.news-item'
+TITLE_SELECTOR = 'h3 a'
+STAGES = ('fetch', 'parse', 'strip', 'dedupe', 'persist')
+SCENARIOS = ('rss', 'atom', 'html', 'scrape_all')
+
+
+class ReplayServer:
+    """Serves one university's recorded payloads from a local port."""
+
+    def __init__(self, university):
+        self.payloads = {}
+        for kind, (directory, ext, content_type) in PAYLOADS.items():
+            path = TESTDATA_DIR / directory / f'{university.lower()}.{ext}'
+            if path.exists():
+                self.payloads[f'/{kind}'] = (path.read_bytes(), content_type)
+        payloads = self.payloads
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if self.path not in payloads:
+                    self.send_error(404)
+                    return
+                body, content_type = payloads[self.path]
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f'http://127.0.0.1:{self.httpd.server_port}'
+
+    def url(self, kind):
+        return f'{self.base_url}/{kind}' if f'/{kind}' in self.payloads else None
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class Probe:
+    """
+    Attributes wall time to scrape stages and counts items and queries.
+
+    Stage time is exclusive: entering a nested stage (e.g. the download
+    that the streaming parser pulls chunks from) pauses the outer one.
+    Stacks are per thread and totals are summed, so in ``scrape_all`` the
+    stage seconds add up to more than the elapsed time.
+    """
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.queries = defaultdict(int)
+        self.items = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def stage(self, name):
+        stack = self._local.__dict__.setdefault('stack', [])
+        now = time.perf_counter()
+        if stack:
+            self._add(stack[-1][0], now - stack[-1][1])
+        stack.append([name, now])
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._add(name, end - stack.pop()[1])
+            if stack:
+                stack[-1][1] = end
+
+    def _count(self, items):
+        with self._lock:
+            self.items += items
+
+    def _add(self, name, seconds):
+        with self._lock:
+            self.seconds[name] += seconds
+
+    def timed(self, name, fn):
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def timed_iter(self, name, iterable):
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        verb = sql.lstrip().split(None, 1)[0].upper()
+        with self._lock:
+            self.queries[verb.lower() if verb in ('SELECT', 'INSERT', 'UPDATE', 'DELETE') else 'other'] += 1
+        if verb == 'SELECT':
+            # Reads count towards whatever stage issued them (dedupe lookups)
+            return execute(sql, params, many, context)
+        with self.stage('persist'):
+            return execute(sql, params, many, context)
+
+    @contextmanager
+    def installed(self):
+        session = logic.get_session()
+        real_get = session.get
+
+        def get(*args, **kwargs):
+            with self.stage('fetch'):
+                resp = real_get(*args, **kwargs)
+            real_iter_content = resp.iter_content
+            resp.iter_content = lambda *a, **kw: self.timed_iter('fetch', real_iter_content(*a, **kw))
+            return resp
+
+        real_scrape_rss = logic._scrape_rss
+        real_iter_entries = logic._iter_feed_entries
+        real_save_items = logic._save_items
+
+        # Items processed: every parsed feed entry (even when an unchanged
+        # body skips the database), or every row extracted from a page.
+        def scrape_rss(*args, **kwargs):
+            self._local.in_feed = True
+            try:
+                return real_scrape_rss(*args, **kwargs)
+            finally:
+                self._local.in_feed = False
+
+        def iter_entries(chunks):
+            for entry in self.timed_iter('parse', real_iter_entries(chunks)):
+                self._count(1)
+                yield entry
+
+        def save_items(items, *args, **kwargs):
+            if not getattr(self._local, 'in_feed', False):
+                self._count(len(items))
+            with self.stage('dedupe'):
+                return real_save_items(items, *args, **kwargs)
+
+        def track_connection(sender, connection, **kwargs):
+            if self.execute_wrapper not in connection.execute_wrappers:
+                connection.execute_wrappers.append(self.execute_wrapper)
+
+        with ExitStack() as stack:
+            stack.enter_context(mock.patch.object(session, 'get', get))
+            stack.enter_context(mock.patch.object(logic, '_scrape_rss', scrape_rss))
+            stack.enter_context(mock.patch.object(logic, '_iter_feed_entries', iter_entries))
+            stack.enter_context(mock.patch.object(logic, 'BeautifulSoup', self.timed('parse', logic.BeautifulSoup)))
+            stack.enter_context(mock.patch.object(logic, 'html_to_text', self.timed('strip', logic.html_to_text)))
+            stack.enter_context(mock.patch.object(logic, '_save_items', save_items))
+            stack.enter_context(mock.patch.object(logic, '_store_validators', self.timed('persist', logic._store_validators)))
+            # scrape_all's worker threads open their own connections
+            connection_created.connect(track_connection)
+            stack.callback(connection_created.disconnect, track_connection)
+            connection.ensure_connection()
+            stack.enter_context(connection.execute_wrapper(self.execute_wrapper))
+            yield self
+
+
+def _clear_tables():
+    for model in (Opportunity, FeedValidator, SourceState, ScrapeRun):
+        model.objects.all().delete()
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the scrape pipeline against recorded RSS, Atom and HTML payloads '
+        'served from a local HTTP stub; prints JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', '-s', action='append', choices=SCENARIOS,
+            help='Scenario to run (repeatable; default: all).')
+        parser.add_argument('--repeat', '-r', type=int, default=3,
+            help='Timed runs per pass; the fastest run is reported.')
+        parser.add_argument('--output', '-o',
+            help='Write the JSON report to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        universities = get_registry().universities
+        missing = [u for u in universities if not (TESTDATA_DIR / 'feeds' / f'{u.lower()}.xml').exists()]
+        if missing:
+            raise CommandError(f'No recorded payloads for: {", ".join(missing)}')
+
+        report = {
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'repeat': options['repeat'],
+            'scenarios': {},
+        }
+        # A throwaway test database keeps benchmark rows out of real data;
+        # locmem keeps the stats refresh out of a shared cache.
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}), \
+                    ExitStack() as stack:
+                servers = {u: stack.enter_context(ReplayServer(u)) for u in universities}
+                # Replays hit one local host per university far faster than
+                # any real host allows; measure the pipeline, not the pacing
+                stack.enter_context(mock.patch.object(ratelimit, 'HOST_RATE', 0))
+                for name in options['scenario'] or SCENARIOS:
+                    run = getattr(self, f'_run_{name}')
+                    report['scenarios'][name] = self._measure(lambda: run(servers), options['repeat'])
+                if 'scrape_all' in report['scenarios']:
+                    report['scenarios']['scrape_all']['workers'] = self._scrape_all_workers()
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        payload = json.dumps(report, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(payload + '\n')
+            self.stderr.write(self.style.SUCCESS(f'Wrote {options["output"]}'))
+        else:
+            self.stdout.write(payload)
+
+    # ── scenarios ─────────────────────────────────────────────
+    def _run_feeds(self, servers, kind):
+        return sum(logic._scrape_rss(s.url(kind), uni) for uni, s in servers.items())
+
+    def _run_rss(self, servers):
+        return self._run_feeds(servers, 'rss')
+
+    def _run_atom(self, servers):
+        return self._run_feeds(servers, 'atom')
+
+    def _run_html(self, servers):
+        return sum(
+            logic._scrape_with_requests(s.url('html'), LIST_SELECTOR, TITLE_SELECTOR, uni)
+            for uni, s in servers.items()
+        )
+
+    def _run_scrape_all(self, servers):
+        sources = build_registry({'universities': {
+            uni: {'sources': [
+                {'url': s.url('rss'), 'type': 'rss', 'label': f'{uni} RSS'},
+                {'url': s.url('html'), 'type': 'html', 'label': f'{uni} HTML',
+                 'list_selector': LIST_SELECTOR, 'title_selector': TITLE_SELECTOR},
+            ]}
+            for uni, s in servers.items()
+        }}).sources
+        return sum(logic.IvyScraper().scrape_all(max_workers=self._scrape_all_workers(), sources=sources).values())
+
+    def _scrape_all_workers(self):
+        # SQLite fails concurrent writers outright instead of queueing them
+        return 1 if connection.vendor == 'sqlite' else logic.SCRAPE_MAX_WORKERS
+
+    # ── measurement ───────────────────────────────────────────
+    def _measure(self, run, repeat):
+        """
+        ``cold`` runs start from empty tables (every item is new); ``warm``
+        runs replay the same payloads over them (every item is a duplicate).
+        Peak memory comes from a separate cold run under tracemalloc so its
+        overhead doesn't skew the timings.
+        """
+        result = {}
+        for phase in ('cold', 'warm'):
+            best = None
+            for _ in range(max(repeat, 1)):
+                _clear_tables()
+                if phase == 'warm':
+                    run()
+                sample = self._timed_run(run)
+                if best is None or sample['seconds'] < best['seconds']:
+                    best = sample
+            result[phase] = best
+
+        _clear_tables()
+        tracemalloc.start()
+        try:
+            run()
+            result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        _clear_tables()
+        return result
+
+    def _timed_run(self, run):
+        probe = Probe()
+        with probe.installed():
+            started = time.perf_counter()
+            new = run()
+            elapsed = time.perf_counter() - started
+        return {
+            'seconds': round(elapsed, 4),
+            'items': probe.items,
+            'new': new,
+            'items_per_sec': round(probe.items / elapsed, 1) if elapsed else None,
+            'stages': {name: round(probe.seconds[name], 4) for name in STAGES},
+            'queries': dict(sorted(probe.queries.items())),
+        }
@@ -0,0 +1,64 @@
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand, CommandError
+from scraper.logic import _iter_feed_entries
+from scraper.text import html_to_text
+
+FIXTURE_DIR = Path(__file__).resolve().parents[2] / 'testdata' / 'feeds'
+
+
+def _bs4_strip(html):
+    return BeautifulSoup(html, 'html.parser').get_text(' ', strip=True)[:500]
+
+
+def _time(fn, fragments, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for html in fragments:
+            fn(html)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark feed description stripping: BeautifulSoup vs html_to_text'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*',
+            help=f'RSS/Atom files to replay (default: {FIXTURE_DIR}/*.xml)')
+        parser.add_argument('--repeat', '-r', type=int, default=5,
+            help='Timing runs per strategy; the best run is reported.')
+
+    def handle(self, *args, **options):
+        paths = [Path(p) for p in options['paths']] or sorted(FIXTURE_DIR.glob('*.xml'))
+        if not paths:
+            raise CommandError(f'No feed fixtures found in {FIXTURE_DIR}')
+
+        self.stdout.write(self.style.WARNING('--- Description strip benchmark ---'))
+        self.stdout.write(f'{"feed":<16}{"fragments":>10}{"bs4 ms":>10}{"fast ms":>10}{"speedup":>9}')
+        total_bs4 = total_fast = 0.0
+        for path in paths:
+            fragments = [
+                part
+                for _, _, _, html_parts in _iter_feed_entries([path.read_bytes()])
+                for part in html_parts if part
+            ]
+            mismatches = sum(_bs4_strip(h) != html_to_text(h, 500) for h in fragments)
+            if mismatches:
+                raise CommandError(f'{path.name}: {mismatches} fragments differ from the bs4 output')
+
+            bs4_s = _time(_bs4_strip, fragments, options['repeat'])
+            fast_s = _time(lambda h: html_to_text(h, 500), fragments, options['repeat'])
+            total_bs4 += bs4_s
+            total_fast += fast_s
+            self.stdout.write(
+                f'{path.stem:<16}{len(fragments):>10}{bs4_s * 1000:>10.1f}'
+                f'{fast_s * 1000:>10.1f}{bs4_s / fast_s:>8.1f}x'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Total: bs4 {total_bs4 * 1000:.1f} ms, html_to_text {total_fast * 1000:.1f} ms '
+            f'({total_bs4 / total_fast:.1f}x faster, identical output)'
+        ))
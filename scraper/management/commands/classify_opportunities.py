@@ -0,0 +1,73 @@
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+from scraper.classify import classify
+from scraper.models import Opportunity
+from scraper.pagecache import bump_data_version
+from scraper import registry as source_registry
+from scraper.stats import refresh_stats
+
+
+def configured_type(registry, university, url, default='news_event'):
+    """
+    The ``source_type`` configured for the source a stored row came from:
+    the university's sources on the row's host (or all of its sources),
+    if they agree on one, else ``default``.
+    """
+    sources = registry.sources.get(university, ())
+    host = urlsplit(url).netloc.lower()
+    same_host = [s for s in sources if urlsplit(s.url).netloc.lower() == host]
+    types = {s.source_type for s in same_host or sources}
+    return types.pop() if len(types) == 1 else default
+
+
+class Command(BaseCommand):
+    help = (
+        'Reclassify stored opportunities with the keyword taxonomy, in primary-key '
+        "chunks. Rows matching no keyword get their registry source's source_type "
+        '(news_event when no source matches), so earlier misclassifications are undone.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000,
+            help='Rows read and updated per batch.')
+        parser.add_argument('--university', '-u', type=str, default='',
+            help='Only reclassify this university.')
+
+    def handle(self, *args, **options):
+        chunk_size = max(options['chunk_size'], 1)
+        rows = Opportunity.objects.order_by('pk').only(
+            'pk', 'title', 'description', 'url', 'university', 'source_type', 'categories'
+        )
+        if options['university']:
+            rows = rows.filter(university=options['university'])
+
+        registry = source_registry.get_registry()
+        defaults = {}  # (university, host) -> configured source_type
+        seen = changed = 0
+        last_pk = 0
+        while True:
+            # Keyset over the primary key: each chunk is an indexed range scan
+            chunk = list(rows.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+            seen += len(chunk)
+            updates = []
+            for obj in chunk:
+                key = (obj.university, urlsplit(obj.url).netloc.lower())
+                if key not in defaults:
+                    defaults[key] = configured_type(registry, obj.university, obj.url)
+                source_type, categories = classify(obj.title, obj.description, defaults[key])
+                if (source_type, categories) != (obj.source_type, obj.categories):
+                    obj.source_type, obj.categories = source_type, categories
+                    updates.append(obj)
+            if updates:
+                Opportunity.objects.bulk_update(updates, ['source_type', 'categories'])
+                changed += len(updates)
+            self.stdout.write(f'  {seen} rows checked, {changed} reclassified')
+
+        if changed:
+            bump_data_version()
+            refresh_stats()
+        self.stdout.write(self.style.SUCCESS(f'Reclassified {changed} of {seen} opportunities'))
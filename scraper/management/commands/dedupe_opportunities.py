@@ -0,0 +1,97 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from scraper.models import Opportunity
+from scraper.pagecache import bump_data_version
+from scraper.similarity import BAND_FIELDS, SIMHASH_DISTANCE, canonical_url, find_originals, signature_fields
+from scraper.stats import refresh_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Canonicalise stored URLs, backfill SimHash signatures and link (or delete) '
+        'near-duplicates to the oldest matching item, in primary-key chunks.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000,
+            help='Rows read and updated per batch.')
+        parser.add_argument('--distance', type=int, default=SIMHASH_DISTANCE,
+            help='Maximum SimHash bit distance for a near-duplicate (at most 3).')
+        parser.add_argument('--delete', action='store_true',
+            help='Delete near-duplicates instead of setting duplicate_of.')
+
+    def handle(self, *args, **options):
+        chunk_size = max(options['chunk_size'], 1)
+        max_distance = min(options['distance'], len(BAND_FIELDS) - 1)
+        rows = Opportunity.objects.order_by('pk').only(
+            'pk', 'title', 'description', 'url', 'duplicate_of', 'simhash', *BAND_FIELDS
+        )
+
+        # duplicate pk -> original pk, so chains (C ~ B ~ A) all point at A
+        links = {}
+        seen = rewritten = found = 0
+        last_pk = 0
+        while True:
+            chunk = list(rows.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+            seen += len(chunk)
+            with transaction.atomic():
+                rewritten += self._rewrite(chunk, links)
+                found += self._link(chunk, links, max_distance, options['delete'])
+            self.stdout.write(f'  {seen} rows checked, {found} near-duplicates')
+
+        if rewritten or found:
+            bump_data_version()
+            refresh_stats()
+        action = 'Deleted' if options['delete'] else 'Linked'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {found} near-duplicates; updated {rewritten} of {seen} opportunities'
+        ))
+
+    def _rewrite(self, chunk, links):
+        """Store canonical URLs and current signatures; a URL clash is an exact duplicate."""
+        changed, urls = {}, {}
+        for obj in chunk:
+            fields = signature_fields(obj.title, obj.description)
+            dirty = any(getattr(obj, name) != value for name, value in fields.items())
+            for name, value in fields.items():
+                setattr(obj, name, value)
+            url = canonical_url(obj.url)
+            if url != obj.url:
+                urls[obj.pk] = url
+            if dirty:
+                changed[obj.pk] = obj
+        if urls:
+            taken = dict(Opportunity.objects.filter(url__in=urls.values()).values_list('url', 'pk'))
+            for obj in chunk:
+                url = urls.get(obj.pk)
+                if url is None:
+                    continue
+                if url in taken:
+                    if obj.duplicate_of_id is None:
+                        links[obj.pk] = links.get(taken[url], taken[url])
+                    continue
+                obj.url = url
+                taken[url] = obj.pk
+                changed[obj.pk] = obj
+        if changed:
+            Opportunity.objects.bulk_update(changed.values(), ['url', 'simhash', *BAND_FIELDS])
+        return len(changed)
+
+    def _link(self, chunk, links, max_distance, delete):
+        candidates = [obj for obj in chunk if obj.duplicate_of_id is None and obj.pk not in links]
+        for obj, original in zip(candidates, find_originals(candidates, max_distance)):
+            if original is not None:
+                links[obj.pk] = links.get(original, original)
+        duplicates = [obj for obj in chunk if obj.pk in links and obj.duplicate_of_id is None]
+        if not duplicates:
+            return 0
+        if delete:
+            Opportunity.objects.filter(pk__in=[obj.pk for obj in duplicates]).delete()
+        else:
+            for obj in duplicates:
+                obj.duplicate_of_id = links[obj.pk]
+            Opportunity.objects.bulk_update(duplicates, ['duplicate_of'])
+        return len(duplicates)
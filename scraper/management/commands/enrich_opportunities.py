@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from scraper import enrich
+from scraper.models import Opportunity
+
+
+class Command(BaseCommand):
+    help = (
+        'Fetch the article pages of opportunities waiting for enrichment and store '
+        'their full-text summary, publish date and deadline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None,
+            help='Enrich at most this many rows.')
+        parser.add_argument('--workers', type=int, default=enrich.ENRICH_WORKERS,
+            help='Article pages fetched at once.')
+        parser.add_argument('--retry-failed', action='store_true',
+            help='Queue rows whose enrichment failed again first.')
+        parser.add_argument('--backfill', action='store_true',
+            help='Queue rows stored before enrichment was turned on first.')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            n = Opportunity.objects.filter(enrichment=enrich.FAILED).update(enrichment=enrich.PENDING)
+            self.stdout.write(f'  {n} failed rows queued again')
+        if options['backfill']:
+            n = Opportunity.objects.filter(enrichment='').update(enrichment=enrich.PENDING)
+            self.stdout.write(f'  {n} rows queued for backfill')
+
+        counts = enrich.enrich_pending(limit=options['limit'], workers=max(options['workers'], 1))
+        self.stdout.write(self.style.SUCCESS(
+            f'Enriched {counts[enrich.DONE]} opportunities; {counts[enrich.FAILED]} failed'
+        ))
@@ -1,5 +1,9 @@
+import asyncio
+
 from django.core.management.base import BaseCommand
-from scraper.logic import IvyScraper, SOURCES
+from scraper.async_scraper import AsyncIvyScraper
+from scraper.logic import IvyScraper
+from scraper.registry import get_registry
 
 
 class Command(BaseCommand):
@@ -7,17 +11,29 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('--university', '-u', type=str, default='',
-            help=f'One of: {", ".join(SOURCES.keys())}. Omit for all.')
+            help=f'One of: {", ".join(get_registry().universities)}. Omit for all.')
+        parser.add_argument('--due', action='store_true',
+            help='Only scrape sources whose adaptive polling schedule says they are due.')
+        parser.add_argument('--async', action='store_true', dest='use_async',
+            help='Fetch on one event loop with AsyncIvyScraper instead of a thread pool.')
 
     def handle(self, *args, **options):
-        scraper = IvyScraper()
+        if options['use_async']:
+            scraper = AsyncIvyScraper()
+            run = asyncio.run
+        else:
+            scraper = IvyScraper()
+            run = lambda result: result
         uni = options['university'].strip()
         self.stdout.write(self.style.WARNING('--- IvyIntel Scrape ---'))
         if uni:
-            n = scraper.scrape_one(uni)
+            n = run(scraper.scrape_one(uni))
             self.stdout.write(self.style.SUCCESS(f'{uni}: {n} new items'))
         else:
-            for name, n in scraper.scrape_all().items():
+            results = run(scraper.scrape_due() if options['due'] else scraper.scrape_all())
+            if not results:
+                self.stdout.write(self.style.WARNING('  No sources due'))
+            for name, n in results.items():
                 fn = self.style.SUCCESS if n > 0 else self.style.WARNING
                 self.stdout.write(fn(f'  {name}: {n} new'))
         self.stdout.write(self.style.SUCCESS('--- Done ---'))
@@ -0,0 +1,378 @@
+"""
+Per-stage timings and counters for scrape runs.
+
+Each fetch of a source runs inside ``source_span``.  The scrape code marks
+its stages with ``span`` / ``timed_iter`` and bumps ``incr`` counters
+(bytes fetched, items parsed, duplicates skipped, near-duplicates found,
+inserts).  Stage time is exclusive: the download a streaming parser pulls
+chunks from is not also counted as parse time.  ``requests`` does not
+report DNS or connect time on its own, so ``request`` covers everything up
+to the response headers.
+
+When a source finishes, one structlog ``scrape.source`` event carries its
+timings and counters, and the sample joins the enclosing ``scrape_run``.  A
+run (one ``scrape_all`` / ``scrape_one`` call, or one Celery job folded
+together by ``finish_scrape``) is stored in bulk when it ends: a ScrapeRun
+row with one SourceRun per fetch, each source's SourceState (see
+``scraper.schedule``), and totals that ``/metrics`` serves in the
+Prometheus text format.  The totals live in the shared cache (the broker's
+Redis unless ``CACHE_URL`` says otherwise), so runs executed by any Celery
+worker add up to the same totals whichever web process serves the scrape.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+import structlog
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ScrapeRun, SourceRun
+from .schedule import record_fetches
+
+logger = logging.getLogger(__name__)
+log = structlog.get_logger(__name__)
+
+STAGES = ("throttle", "request", "download", "parse", "strip", "dedupe", "classify", "persist", "render")
+# Counted on every source; "near_duplicates" (in COUNTER_METRICS) only
+# appears on sources that found some
+COUNTERS = ("bytes", "parsed", "duplicates", "inserted")
+# Histogram bucket upper bounds in seconds, for stage and per-source latency
+BUCKETS = tuple(getattr(
+    settings, "SCRAPE_METRICS_BUCKETS",
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+))
+
+METRICS_CACHE_KEY = "scraper:metrics"
+METRICS_LOCK_KEY = "scraper:metrics:lock"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+COUNTER_METRICS = {
+    "bytes": ("scraper_fetched_bytes_total", "Response body bytes downloaded."),
+    "parsed": ("scraper_items_parsed_total", "Items parsed from feeds and pages."),
+    "duplicates": ("scraper_duplicates_skipped_total", "Parsed items skipped as already stored."),
+    "near_duplicates": ("scraper_near_duplicates_total", "New items found to be near-duplicates of another."),
+    "inserted": ("scraper_items_inserted_total", "New opportunities inserted."),
+}
+
+_source = ContextVar("scrape_source", default=None)
+_run = ContextVar("scrape_run", default=None)
+
+
+class SourceSample:
+    """Stage seconds and counters for one fetch of one source (one thread)."""
+
+    def __init__(self, university, label, url):
+        self.university = university
+        self.label = label
+        self.url = url
+        self.started_at = timezone.now()
+        self.seconds = 0.0
+        self.ok = True
+        self.new = 0
+        self.status_code = None
+        self.error = ""
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            # Pause the enclosing stage while this one runs
+            self.stages[self._stack[-1][0]] += now - self._stack[-1][1]
+        self._stack.append([name, now])
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.stages[name] += end - self._stack.pop()[1]
+            if self._stack:
+                self._stack[-1][1] = end
+
+    def as_dict(self):
+        return {
+            "university": self.university,
+            "source": self.label,
+            "url": self.url,
+            "started_at": self.started_at.isoformat(),
+            "seconds": round(self.seconds, 6),
+            "ok": self.ok,
+            "new": self.new,
+            "status_code": self.status_code,
+            "error": self.error,
+            "stages": {name: round(s, 6) for name, s in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+
+class RunMetrics:
+    """Source samples collected by the threads of one scrape run."""
+
+    def __init__(self, trigger):
+        self.trigger = trigger
+        self.started_at = timezone.now()
+        self.sources = []
+        self._lock = threading.Lock()
+
+    def add(self, sample):
+        with self._lock:
+            self.sources.append(sample)
+
+
+# ── recording ─────────────────────────────────────────────────
+@contextmanager
+def span(stage):
+    """Attribute the enclosed time to ``stage`` of the current source, if any."""
+    sample = _source.get()
+    if sample is None:
+        yield
+        return
+    with sample.stage(stage):
+        yield
+
+
+def timed_iter(stage, iterable):
+    """Yield from ``iterable``, attributing the time spent producing items to ``stage``."""
+    iterator = iter(iterable)
+    while True:
+        with span(stage):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def incr(counter, n=1):
+    sample = _source.get()
+    if sample is not None:
+        sample.counters[counter] = sample.counters.get(counter, 0) + n
+
+
+def status(code):
+    """Note the HTTP status the current source answered with."""
+    sample = _source.get()
+    if sample is not None:
+        sample.status_code = code
+
+
+@contextmanager
+def source_span(university, label, url):
+    """
+    Collect timings for one source fetch.  The caller fills in the outcome:
+    ``sample.new``, and ``sample.ok = False`` with ``sample.error`` on failure.
+    """
+    sample = SourceSample(university, label, url)
+    token = _source.set(sample)
+    started = time.perf_counter()
+    try:
+        yield sample
+    finally:
+        sample.seconds = time.perf_counter() - started
+        _source.reset(token)
+        data = sample.as_dict()
+        log.info("scrape.source", **data)
+        run = _run.get()
+        if run is not None:
+            run.add(data)
+
+
+@contextmanager
+def scrape_run(trigger, persist=True):
+    """
+    Gather every source fetched inside the block into one run.  With
+    ``persist=False`` the caller ships ``run.sources`` elsewhere (a Celery
+    task returns them to ``finish_scrape``) and nothing is stored here.
+    Worker threads only see the run if started under ``copy_context()``.
+    """
+    run = RunMetrics(trigger)
+    token = _run.set(run)
+    try:
+        yield run
+    finally:
+        _run.reset(token)
+        if persist:
+            record_run(trigger, run.sources, run.started_at)
+
+
+# ── persistence ───────────────────────────────────────────────
+def summarise(sources):
+    """Stage seconds and counters summed over a run's source samples."""
+    stages = dict.fromkeys(STAGES, 0.0)
+    counters = dict.fromkeys(COUNTERS, 0)
+    for sample in sources:
+        for name, seconds in sample["stages"].items():
+            stages[name] = stages.get(name, 0.0) + seconds
+        for name, n in sample["counters"].items():
+            counters[name] = counters.get(name, 0) + n
+    return {
+        "seconds": round(sum(s["seconds"] for s in sources), 6),
+        "stages": {name: round(s, 6) for name, s in stages.items()},
+        "counters": counters,
+    }
+
+
+def record_run(trigger, sources, started_at=None):
+    """
+    Update each fetched source's polling state, then store the run as a
+    ScrapeRun with its SourceRuns and add it to the /metrics totals.
+    """
+    if not sources:
+        return None
+    finished_at = timezone.now()
+    if started_at is None:
+        started_at = min(datetime.fromisoformat(s["started_at"]) for s in sources)
+    summary = summarise(sources)
+    try:
+        record_fetches(sources, now=finished_at)
+        _merge_totals(sources)
+        with transaction.atomic():
+            run = ScrapeRun.objects.create(
+                trigger=trigger,
+                started_at=started_at,
+                finished_at=finished_at,
+                sources=len(sources),
+                failures=sum(not s["ok"] for s in sources),
+                new_items=sum(s["new"] for s in sources),
+                metrics={"totals": summary},
+            )
+            SourceRun.objects.bulk_create([
+                SourceRun(
+                    run=run,
+                    university=s["university"],
+                    label=s["source"][:200],
+                    url=s["url"],
+                    started_at=datetime.fromisoformat(s["started_at"]),
+                    ok=s["ok"],
+                    status_code=s["status_code"],
+                    error=s["error"][:500],
+                    latency=s["seconds"],
+                    items_parsed=s["counters"].get("parsed", 0),
+                    new_items=s["new"],
+                    metrics={"stages": s["stages"], "counters": s["counters"]},
+                )
+                for s in sources
+            ])
+        return run
+    except Exception:
+        # Metrics are best effort; never fail the scrape over them
+        logger.exception("Recording %s scrape run metrics failed", trigger)
+        return None
+
+
+def _empty_totals():
+    return {"runs": 0, "buckets": BUCKETS, "counters": {}, "failures": {}, "stages": {}, "sources": {}}
+
+
+def _empty_histogram():
+    return {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+
+
+def _observe(histogram, seconds):
+    index = bisect.bisect_left(BUCKETS, seconds)
+    if index < len(BUCKETS):
+        histogram["buckets"][index] += 1
+    histogram["sum"] += seconds
+    histogram["count"] += 1
+
+
+@contextmanager
+def _totals_lock(timeout=2.0):
+    # Read-modify-write of the shared totals; after ``timeout`` the merge
+    # goes ahead unlocked rather than dropping the run.
+    deadline = time.monotonic() + timeout
+    while not (locked := cache.add(METRICS_LOCK_KEY, 1, 10)) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        if locked:
+            cache.delete(METRICS_LOCK_KEY)
+
+
+def _merge_totals(sources):
+    with _totals_lock():
+        totals = cache.get(METRICS_CACHE_KEY) or _empty_totals()
+        if totals.get("buckets") != BUCKETS:
+            # Bucket bounds changed in settings; old observations don't fit
+            totals.update(buckets=BUCKETS, stages={}, sources={})
+        totals["runs"] += 1
+        for sample in sources:
+            key = (sample["university"], sample["source"])
+            counters = totals["counters"].setdefault(key, dict.fromkeys(COUNTERS, 0))
+            for name, n in sample["counters"].items():
+                counters[name] = counters.get(name, 0) + n
+            if not sample["ok"]:
+                totals["failures"][key] = totals["failures"].get(key, 0) + 1
+            _observe(totals["sources"].setdefault(key, _empty_histogram()), sample["seconds"])
+            for stage, seconds in sample["stages"].items():
+                if seconds:
+                    _observe(totals["stages"].setdefault(stage, _empty_histogram()), seconds)
+        cache.set(METRICS_CACHE_KEY, totals, None)
+
+
+# ── exposition ────────────────────────────────────────────────
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram_lines(name, labels, histogram):
+    cumulative = 0
+    for bound, n in zip(BUCKETS, histogram["buckets"]):
+        cumulative += n
+        yield f"{name}_bucket{_labels(**labels, le=_number(bound))} {cumulative}"
+    yield f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram['count']}"
+    yield f"{name}_sum{_labels(**labels)} {_number(histogram['sum'])}"
+    yield f"{name}_count{_labels(**labels)} {histogram['count']}"
+
+
+def render_prometheus():
+    """The accumulated totals in the Prometheus text exposition format."""
+    totals = cache.get(METRICS_CACHE_KEY) or _empty_totals()
+    lines = [
+        "# HELP scraper_runs_total Scrape runs recorded.",
+        "# TYPE scraper_runs_total counter",
+        f"scraper_runs_total {totals['runs']}",
+    ]
+    for counter, (name, help_text) in COUNTER_METRICS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (university, source), counters in sorted(totals["counters"].items()):
+            lines.append(f"{name}{_labels(university=university, source=source)} {counters.get(counter, 0)}")
+    lines += [
+        "# HELP scraper_source_failures_total Source fetches that failed.",
+        "# TYPE scraper_source_failures_total counter",
+    ]
+    for (university, source), n in sorted(totals["failures"].items()):
+        lines.append(f"scraper_source_failures_total{_labels(university=university, source=source)} {n}")
+    lines += [
+        "# HELP scraper_stage_duration_seconds Time spent in each scrape stage per source fetch.",
+        "# TYPE scraper_stage_duration_seconds histogram",
+    ]
+    for stage, histogram in sorted(totals["stages"].items()):
+        lines += _histogram_lines("scraper_stage_duration_seconds", {"stage": stage}, histogram)
+    lines += [
+        "# HELP scraper_source_duration_seconds Wall time of each source fetch.",
+        "# TYPE scraper_source_duration_seconds histogram",
+    ]
+    for (university, source), histogram in sorted(totals["sources"].items()):
+        lines += _histogram_lines(
+            "scraper_source_duration_seconds", {"university": university, "source": source}, histogram,
+        )
+    return "\n".join(lines) + "\n"
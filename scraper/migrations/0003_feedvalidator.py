@@ -0,0 +1,32 @@
+# Generated by Django 5.0.2 on 2026-10-17 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0002_alter_opportunity_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedValidator",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("url", models.URLField(max_length=500, unique=True)),
+                ("etag", models.CharField(blank=True, max_length=255)),
+                ("last_modified", models.CharField(blank=True, max_length=100)),
+                ("body_hash", models.CharField(blank=True, max_length=64)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
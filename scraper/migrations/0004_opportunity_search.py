@@ -0,0 +1,111 @@
+# Generated by Django 5.0.2 on 2026-10-17 01:35
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRES_INSTALL = [
+    """
+    CREATE OR REPLACE FUNCTION scraper_opportunity_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER scraper_opportunity_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON scraper_opportunity
+    FOR EACH ROW EXECUTE FUNCTION scraper_opportunity_search_vector_update()
+    """,
+    """
+    UPDATE scraper_opportunity SET search_vector =
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    """,
+    "CREATE INDEX scraper_opportunity_search_gin"
+    " ON scraper_opportunity USING gin (search_vector)",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS scraper_opportunity_search_gin",
+    "DROP TRIGGER IF EXISTS scraper_opportunity_search_vector_trigger"
+    " ON scraper_opportunity",
+    "DROP FUNCTION IF EXISTS scraper_opportunity_search_vector_update()",
+]
+
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE scraper_opportunity_fts USING fts5(
+        title, description, content='scraper_opportunity', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER scraper_opportunity_fts_ai AFTER INSERT ON scraper_opportunity
+    BEGIN
+        INSERT INTO scraper_opportunity_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER scraper_opportunity_fts_ad AFTER DELETE ON scraper_opportunity
+    BEGIN
+        INSERT INTO scraper_opportunity_fts(scraper_opportunity_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER scraper_opportunity_fts_au
+    AFTER UPDATE OF title, description ON scraper_opportunity
+    BEGIN
+        INSERT INTO scraper_opportunity_fts(scraper_opportunity_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO scraper_opportunity_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO scraper_opportunity_fts(scraper_opportunity_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS scraper_opportunity_fts_ai",
+    "DROP TRIGGER IF EXISTS scraper_opportunity_fts_ad",
+    "DROP TRIGGER IF EXISTS scraper_opportunity_fts_au",
+    "DROP TABLE IF EXISTS scraper_opportunity_fts",
+]
+
+
+def _statements(schema_editor, postgres, sqlite):
+    return {"postgresql": postgres, "sqlite": sqlite}.get(
+        schema_editor.connection.vendor, []
+    )
+
+
+def install_search_index(apps, schema_editor):
+    for sql in _statements(schema_editor, POSTGRES_INSTALL, SQLITE_INSTALL):
+        schema_editor.execute(sql)
+
+
+def uninstall_search_index(apps, schema_editor):
+    for sql in _statements(schema_editor, POSTGRES_UNINSTALL, SQLITE_UNINSTALL):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0003_feedvalidator"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="opportunity",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
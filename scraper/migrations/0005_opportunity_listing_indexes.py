@@ -0,0 +1,37 @@
+# Generated by Django 5.0.2 on 2026-10-17 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0004_opportunity_search"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="opportunity",
+            index=models.Index(fields=["-created_at", "-id"], name="opp_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="opportunity",
+            index=models.Index(
+                fields=["university", "-created_at", "-id"], name="opp_uni_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="opportunity",
+            index=models.Index(
+                fields=["source_type", "-created_at", "-id"],
+                name="opp_type_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="opportunity",
+            index=models.Index(
+                fields=["university", "source_type", "-created_at", "-id"],
+                name="opp_uni_type_created_idx",
+            ),
+        ),
+    ]
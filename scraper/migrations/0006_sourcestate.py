@@ -0,0 +1,38 @@
+# Generated by Django 5.0.2 on 2026-10-17 02:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0005_opportunity_listing_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SourceState",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("url", models.URLField(max_length=500, unique=True)),
+                ("last_fetched_at", models.DateTimeField(blank=True, null=True)),
+                ("last_new", models.PositiveIntegerField(default=0)),
+                ("item_rate", models.FloatField(default=0.0)),
+                ("interval", models.PositiveIntegerField(default=3600)),
+                ("failures", models.PositiveIntegerField(default=0)),
+                (
+                    "next_poll_at",
+                    models.DateTimeField(blank=True, db_index=True, null=True),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
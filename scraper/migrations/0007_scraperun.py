@@ -0,0 +1,37 @@
+# Generated by Django 5.0.2 on 2026-10-17 04:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0006_sourcestate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScrapeRun",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("trigger", models.CharField(max_length=50)),
+                ("started_at", models.DateTimeField()),
+                ("finished_at", models.DateTimeField(db_index=True)),
+                ("sources", models.PositiveIntegerField(default=0)),
+                ("failures", models.PositiveIntegerField(default=0)),
+                ("new_items", models.PositiveIntegerField(default=0)),
+                ("metrics", models.JSONField(default=dict)),
+            ],
+            options={
+                "ordering": ["-finished_at"],
+            },
+        ),
+    ]
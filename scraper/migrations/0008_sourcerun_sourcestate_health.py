@@ -0,0 +1,77 @@
+# Generated by Django 5.0.2 on 2026-10-17 02:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0007_scraperun"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sourcestate",
+            name="circuit_open_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="sourcestate",
+            name="last_error",
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name="sourcestate",
+            name="last_latency",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="sourcestate",
+            name="last_status_code",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="SourceRun",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("university", models.CharField(max_length=200)),
+                ("label", models.CharField(max_length=200)),
+                ("url", models.URLField(max_length=500)),
+                ("started_at", models.DateTimeField()),
+                ("ok", models.BooleanField(default=True)),
+                (
+                    "status_code",
+                    models.PositiveSmallIntegerField(blank=True, null=True),
+                ),
+                ("error", models.CharField(blank=True, max_length=500)),
+                ("latency", models.FloatField(default=0.0)),
+                ("items_parsed", models.PositiveIntegerField(default=0)),
+                ("new_items", models.PositiveIntegerField(default=0)),
+                ("metrics", models.JSONField(default=dict)),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="source_runs",
+                        to="scraper.scraperun",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["url", "-started_at"], name="sourcerun_url_started_idx"
+                    )
+                ],
+            },
+        ),
+    ]
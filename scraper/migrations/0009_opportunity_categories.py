@@ -0,0 +1,34 @@
+# Generated by Django 5.0.2 on 2026-10-17 02:18
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+search_migration = import_module("scraper.migrations.0004_opportunity_search")
+
+
+def reinstall_sqlite_search_index(apps, schema_editor):
+    # SQLite adds the column by rebuilding the table, which drops the FTS5
+    # sync triggers created in 0004.
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in search_migration.SQLITE_UNINSTALL + search_migration.SQLITE_INSTALL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0008_sourcerun_sourcestate_health"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="opportunity",
+            name="categories",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(
+            reinstall_sqlite_search_index, reinstall_sqlite_search_index
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.0.2 on 2026-10-17 02:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0009_opportunity_categories"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="opportunity",
+            name="duplicate_of",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="near_duplicates",
+                to="scraper.opportunity",
+            ),
+        ),
+        migrations.AddField(
+            model_name="opportunity",
+            name="simhash",
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="opportunity",
+            name="simhash_band0",
+            field=models.IntegerField(
+                blank=True, db_index=True, editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="opportunity",
+            name="simhash_band1",
+            field=models.IntegerField(
+                blank=True, db_index=True, editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="opportunity",
+            name="simhash_band2",
+            field=models.IntegerField(
+                blank=True, db_index=True, editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="opportunity",
+            name="simhash_band3",
+            field=models.IntegerField(
+                blank=True, db_index=True, editable=False, null=True
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.2 on 2026-10-17 02:43
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+search_migration = import_module("scraper.migrations.0004_opportunity_search")
+
+
+def reinstall_sqlite_search_index(apps, schema_editor):
+    # SQLite adds a column with a default by rebuilding the table, which
+    # drops the FTS5 sync triggers created in 0004.
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in search_migration.SQLITE_UNINSTALL + search_migration.SQLITE_INSTALL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0010_opportunity_simhash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="opportunity",
+            name="enrichment",
+            field=models.CharField(blank=True, default="", max_length=10),
+        ),
+        migrations.AddField(
+            model_name="opportunity",
+            name="published_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="opportunity",
+            index=models.Index(
+                condition=models.Q(("enrichment", "pending")),
+                fields=["id"],
+                name="opp_enrich_pending_idx",
+            ),
+        ),
+        migrations.RunPython(
+            reinstall_sqlite_search_index, reinstall_sqlite_search_index
+        ),
+    ]
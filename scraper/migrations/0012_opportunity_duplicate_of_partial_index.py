@@ -0,0 +1,50 @@
+# Generated by Django 5.0.2 on 2026-10-17 09:12
+
+from importlib import import_module
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+search_migration = import_module("scraper.migrations.0004_opportunity_search")
+
+
+def reinstall_sqlite_search_index(apps, schema_editor):
+    # SQLite alters the foreign key by rebuilding the table, which drops
+    # the FTS5 sync triggers created in 0004.
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in search_migration.SQLITE_UNINSTALL + search_migration.SQLITE_INSTALL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0011_opportunity_enrichment"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="opportunity",
+            name="duplicate_of",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="near_duplicates",
+                to="scraper.opportunity",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="opportunity",
+            index=models.Index(
+                condition=models.Q(("duplicate_of__isnull", False)),
+                fields=["duplicate_of"],
+                name="opp_duplicate_of_idx",
+            ),
+        ),
+        migrations.RunPython(
+            reinstall_sqlite_search_index, reinstall_sqlite_search_index
+        ),
+    ]
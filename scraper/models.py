@@ -1,4 +1,6 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Q
 
 class Opportunity(models.Model):
     title = models.CharField(max_length=500)
@@ -6,9 +8,123 @@ class Opportunity(models.Model):
     url = models.URLField(unique=True)
     university = models.CharField(max_length=200)
     source_type = models.CharField(max_length=100) # events, careers, etc.
+    # Every taxonomy category matched by scraper.classify, most specific first
+    categories = models.JSONField(default=list, blank=True)
     deadline = models.CharField(max_length=200, null=True, blank=True)
+    # Publish date from the article page (see scraper.enrich)
+    published_at = models.DateTimeField(null=True, blank=True)
+    # Article-page enrichment: "" (not requested), "pending", "done" or "failed"
+    enrichment = models.CharField(max_length=10, blank=True, default="")
     content_hash = models.CharField(max_length=64, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Maintained by a database trigger on PostgreSQL (see scraper.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # SimHash of title + description and its four indexed 16-bit bands, for
+    # near-duplicate lookups (see scraper.similarity)
+    simhash = models.BigIntegerField(null=True, blank=True, editable=False)
+    simhash_band0 = models.IntegerField(null=True, blank=True, editable=False, db_index=True)
+    simhash_band1 = models.IntegerField(null=True, blank=True, editable=False, db_index=True)
+    simhash_band2 = models.IntegerField(null=True, blank=True, editable=False, db_index=True)
+    simhash_band3 = models.IntegerField(null=True, blank=True, editable=False, db_index=True)
+    # The earlier item this one is a near-duplicate of; listings skip these
+    duplicate_of = models.ForeignKey(
+        "self", null=True, blank=True, on_delete=models.SET_NULL, related_name="near_duplicates",
+        db_index=False,  # see opp_duplicate_of_idx
+    )
+
+    class Meta:
+        # One index per dashboard filter combination, each ending in the
+        # (created_at, id) keyset used for newest-first pagination.
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="opp_created_idx"),
+            models.Index(fields=["university", "-created_at", "-id"], name="opp_uni_created_idx"),
+            models.Index(fields=["source_type", "-created_at", "-id"], name="opp_type_created_idx"),
+            models.Index(
+                fields=["university", "source_type", "-created_at", "-id"],
+                name="opp_uni_type_created_idx",
+            ),
+            # Linked near-duplicates only.  Listings filter on
+            # duplicate_of IS NULL; a full index on the column would tempt
+            # the planner to fetch every original through it and sort,
+            # instead of walking one of the keyset indexes above.
+            models.Index(fields=["duplicate_of"], condition=Q(duplicate_of__isnull=False), name="opp_duplicate_of_idx"),
+            # Only the rows still waiting for enrichment, so finding them
+            # doesn't grow with the table
+            models.Index(fields=["id"], condition=Q(enrichment="pending"), name="opp_enrich_pending_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.university} - {self.title}"
+
+class FeedValidator(models.Model):
+    """HTTP cache validators from the last successful fetch of a feed."""
+    url = models.URLField(max_length=500, unique=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=100, blank=True)
+    body_hash = models.CharField(max_length=64, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.url
+
+class SourceState(models.Model):
+    """Polling history and next scheduled fetch for one configured source."""
+    url = models.URLField(max_length=500, unique=True)
+    last_fetched_at = models.DateTimeField(null=True, blank=True)
+    last_new = models.PositiveIntegerField(default=0)
+    # Exponentially weighted average of new items per hour
+    item_rate = models.FloatField(default=0.0)
+    # Polling cadence in seconds while the feed is healthy
+    interval = models.PositiveIntegerField(default=3600)
+    # Consecutive failed fetches; the circuit opens at SCRAPE_BREAKER_THRESHOLD
+    failures = models.PositiveIntegerField(default=0)
+    next_poll_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    circuit_open_until = models.DateTimeField(null=True, blank=True)
+    last_status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    last_error = models.CharField(max_length=500, blank=True)
+    # Seconds the last fetch took
+    last_latency = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.url
+
+class ScrapeRun(models.Model):
+    """Stage timings and counters collected over one scrape run (see scraper.metrics)."""
+    trigger = models.CharField(max_length=50)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(db_index=True)
+    sources = models.PositiveIntegerField(default=0)
+    failures = models.PositiveIntegerField(default=0)
+    new_items = models.PositiveIntegerField(default=0)
+    # {"totals": {"seconds", "stages", "counters"}} summed over the sources
+    metrics = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ["-finished_at"]
+
+    def __str__(self):
+        return f"{self.trigger} run at {self.finished_at:%Y-%m-%d %H:%M}"
+
+class SourceRun(models.Model):
+    """Outcome of one source fetch within a ScrapeRun."""
+    run = models.ForeignKey(ScrapeRun, on_delete=models.CASCADE, related_name="source_runs")
+    university = models.CharField(max_length=200)
+    label = models.CharField(max_length=200)
+    url = models.URLField(max_length=500)
+    started_at = models.DateTimeField()
+    ok = models.BooleanField(default=True)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    error = models.CharField(max_length=500, blank=True)
+    # Seconds, including time spent waiting for the host's semaphore
+    latency = models.FloatField(default=0.0)
+    items_parsed = models.PositiveIntegerField(default=0)
+    new_items = models.PositiveIntegerField(default=0)
+    # {"stages": {...}, "counters": {...}} from scraper.metrics
+    metrics = models.JSONField(default=dict)
+
+    class Meta:
+        indexes = [models.Index(fields=["url", "-started_at"], name="sourcerun_url_started_idx")]
 
     def __str__(self):
-        return f"{self.university} - {self.title}"
\ No newline at end of file
+        return f"{self.label} at {self.started_at:%Y-%m-%d %H:%M}"
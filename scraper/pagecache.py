@@ -0,0 +1,78 @@
+"""
+Rendered-page cache and HTTP validators for the dashboard.
+
+A single "data version" in the shared cache (the time of the last change,
+in microseconds) is bumped whenever what the dashboard shows can change:
+rows committed by ``_save_items`` or by enrichment, admin saves and deletes
+(signals), and the bulk maintenance commands.  Only writes bump it;
+recomputing the stats (see ``scraper.stats``) doesn't.  Rendered pages are
+cached under the version and the request's full path, so each filter /
+search / cursor combination is rendered once per version and old entries
+simply stop being read.
+
+The version doubles as the page's ETag and Last-Modified, so a browser or
+fronting proxy revalidating an unchanged dashboard gets a 304 without the
+page even being looked up.  Last-Modified only has whole seconds, so it is
+left out while the second of the last change is still running: a client
+revalidating with If-Modified-Since alone would otherwise get a 304 after
+a second write within that same second.
+"""
+
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from .models import Opportunity
+
+DATA_VERSION_KEY = "scraper:data-version"
+PAGE_CACHE_TTL = getattr(settings, "SCRAPE_PAGE_CACHE_TTL", 60 * 60)
+
+
+def _now():
+    return time.time_ns() // 1000
+
+
+def data_version():
+    """The current data version, started at the current time if unset (or evicted)."""
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_KEY, _now(), None)
+        version = cache.get(DATA_VERSION_KEY)
+    return version
+
+
+def bump_data_version(**kwargs):
+    """Invalidate every cached page and validator; kwargs let it serve as a signal receiver."""
+    cache.set(DATA_VERSION_KEY, max(_now(), (cache.get(DATA_VERSION_KEY) or 0) + 1), None)
+
+
+def request_version(request):
+    """The data version for this request, read once however often it is asked for."""
+    if not hasattr(request, "_data_version"):
+        request._data_version = data_version()
+    return request._data_version
+
+
+def etag(request):
+    return f'"{request_version(request)}"'
+
+
+def last_modified(request):
+    """The version's second, or None while that second isn't over yet."""
+    seconds = request_version(request) // 1_000_000
+    if _now() // 1_000_000 <= seconds:
+        return None
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+def page_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"scraper:page:{request_version(request)}:{path}"
+
+
+post_save.connect(bump_data_version, sender=Opportunity, dispatch_uid="scraper.pagecache.saved")
+post_delete.connect(bump_data_version, sender=Opportunity, dispatch_uid="scraper.pagecache.deleted")
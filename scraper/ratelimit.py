@@ -0,0 +1,216 @@
+"""
+Per-host politeness: a token bucket per host, shared by every worker.
+
+Each host earns ``HOST_RATE`` request tokens per second up to ``HOST_BURST``
+and every feed, page or render takes one before it goes out; ``acquire()``
+sleeps until a token is free.  Buckets live in Redis
+(``SCRAPE_RATE_LIMIT_URL``, the Celery broker by default) and are updated
+by one Lua script on Redis's clock, so thread pools, Celery workers and
+the async scraper on any machine draw from the same budget.  If Redis is
+unreachable the limiter logs it and falls back to buckets in this process
+for ``REDIS_RETRY_INTERVAL`` seconds before trying again.
+
+A host's robots.txt can only slow it down: a ``Crawl-delay`` (or
+``Request-rate``) stricter than ``HOST_RATE`` becomes the bucket's rate,
+with a burst of one.  The delay parsed from each robots file is kept in
+the shared cache for ``ROBOTS_TTL`` seconds and in this process for as long.
+
+``SCRAPE_HOST_RATE = 0`` turns the limiter off.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import redis
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+HOST_RATE = getattr(settings, "SCRAPE_HOST_RATE", 0.5)
+HOST_BURST = getattr(settings, "SCRAPE_HOST_BURST", 3)
+RATE_LIMIT_URL = getattr(settings, "SCRAPE_RATE_LIMIT_URL", "")
+REDIS_RETRY_INTERVAL = 30
+ROBOTS_TTL = getattr(settings, "SCRAPE_ROBOTS_TTL", 24 * 60 * 60)
+# Unreachable robots files are asked for again sooner than parsed ones
+ROBOTS_ERROR_TTL = 5 * 60
+ROBOTS_TIMEOUT = 5
+ROBOTS_USER_AGENT = getattr(settings, "SCRAPE_ROBOTS_USER_AGENT", "IvyIntel")
+
+# KEYS[1]: bucket; ARGV: rate, burst, cost.  Refills the bucket on the
+# server's clock and takes ``cost`` tokens if one is available.  Returns
+# 0, or the seconds until the next token (as a string: Lua numbers are
+# truncated to integers in replies).
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - cost
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+def _host(url):
+    return urlsplit(url).netloc.lower()
+
+
+# ── robots.txt ────────────────────────────────────────────────
+_robots = {}  # origin -> (expires at, crawl delay)
+_robots_lock = threading.Lock()
+
+
+def _fetch_crawl_delay(origin):
+    """``(crawl delay or 0, seconds to trust it)`` from ``origin``'s robots.txt."""
+    from .logic import get_session
+    try:
+        resp = get_session().get(f"{origin}/robots.txt", timeout=ROBOTS_TIMEOUT, verify=False)
+    except requests.RequestException as exc:
+        logger.info("robots.txt for %s unavailable: %s", origin, exc)
+        return 0, ROBOTS_ERROR_TTL
+    if resp.status_code >= 500:
+        return 0, ROBOTS_ERROR_TTL
+    if resp.status_code >= 400:
+        return 0, ROBOTS_TTL  # no robots file: no rules
+    parser = RobotFileParser()
+    parser.parse(resp.text.splitlines())
+    delay = parser.crawl_delay(ROBOTS_USER_AGENT) or 0
+    rate = parser.request_rate(ROBOTS_USER_AGENT)
+    if rate and rate.requests:
+        delay = max(delay, rate.seconds / rate.requests)
+    return float(delay), ROBOTS_TTL
+
+
+def crawl_delay(url):
+    """The robots.txt crawl delay for ``url``'s host, fetched at most once per ``ROBOTS_TTL``."""
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc.lower()}"
+    cached = _robots.get(origin)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    key = f"scraper:robots:{origin}"
+    delay = cache.get(key)
+    ttl = ROBOTS_TTL
+    if delay is None:
+        delay, ttl = _fetch_crawl_delay(origin)
+        cache.set(key, delay, ttl)
+    with _robots_lock:
+        _robots[origin] = (time.monotonic() + ttl, delay)
+    return delay
+
+
+def bucket(url):
+    """``(rate, burst)`` for ``url``'s host: the configured bucket, slowed to its crawl delay."""
+    delay = crawl_delay(url)
+    if delay and 1 / delay < HOST_RATE:
+        return 1 / delay, 1
+    return HOST_RATE, HOST_BURST
+
+
+# ── buckets ───────────────────────────────────────────────────
+class LocalBuckets:
+    """In-process token buckets, used while Redis is unavailable."""
+
+    def __init__(self):
+        self._buckets = {}  # host -> (tokens, last refill)
+        self._lock = threading.Lock()
+
+    def take(self, host, rate, burst, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.get(host, (burst, now))
+            tokens = min(burst, tokens + max(0, now - ts) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= cost
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[host] = (tokens, now)
+        return wait
+
+
+_local = LocalBuckets()
+_script = None
+_redis_retry_at = 0.0
+_redis_lock = threading.Lock()
+
+
+def _redis_script():
+    global _script
+    if _script is None:
+        with _redis_lock:
+            if _script is None:
+                client = redis.Redis.from_url(RATE_LIMIT_URL, socket_connect_timeout=1, socket_timeout=1)
+                _script = client.register_script(TOKEN_BUCKET_LUA)
+    return _script
+
+
+def _reset():
+    global _local, _script, _redis_retry_at
+    _local, _script, _redis_retry_at = LocalBuckets(), None, 0.0
+    _robots.clear()
+
+
+# Never share Redis sockets with a forked child (e.g. Celery prefork workers)
+os.register_at_fork(after_in_child=_reset)
+
+
+def _take(url, cost=1):
+    global _redis_retry_at
+    rate, burst = bucket(url)
+    host = _host(url)
+    if RATE_LIMIT_URL and time.monotonic() >= _redis_retry_at:
+        try:
+            return float(_redis_script()(keys=[f"scraper:bucket:{host}"], args=[rate, burst, cost]))
+        except redis.RedisError as exc:
+            logger.warning("Rate limiter falling back to in-process buckets: %s", exc)
+            _redis_retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+    return _local.take(host, rate, burst, cost)
+
+
+def delay(url):
+    """Seconds until ``url``'s host has a token, without taking it (0 if one is free)."""
+    if HOST_RATE <= 0:
+        return 0
+    return _take(url, cost=0)
+
+
+def acquire(url):
+    """Take a token for ``url``'s host, sleeping until one is free; returns the seconds waited."""
+    if HOST_RATE <= 0:
+        return 0
+    waited = 0
+    while wait := _take(url):
+        time.sleep(wait)
+        waited += wait
+    return waited
+
+
+async def aacquire(url):
+    """``acquire()`` for the event loop: sleeps without blocking it."""
+    if HOST_RATE <= 0:
+        return 0
+    waited = 0
+    # Redis round trips and robots.txt fetches are blocking I/O
+    while wait := await asyncio.to_thread(_take, url):
+        await asyncio.sleep(wait)
+        waited += wait
+    return waited
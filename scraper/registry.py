@@ -0,0 +1,171 @@
+"""
+Declarative source registry.
+
+The universities to scrape, their base URLs and every feed or page with its
+selectors, timeout, per-host concurrency and polling bounds live in a TOML
+file (``SCRAPE_SOURCES_FILE``, ``scraper/sources.toml`` by default).  It is
+parsed into an immutable Registry of frozen Source entries, with CSS
+selectors compiled once at load time.  ``get_registry()`` is shared by
+IvyScraper, the Celery tasks, the management commands and the views; it
+stats the file on each call and rebuilds the registry only when the mtime
+changes.  A broken edit (invalid TOML, a wrong shape or type, an unreadable
+or missing file) is logged and the previous registry stays in use.
+"""
+
+import logging
+import os
+import threading
+import tomllib
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from types import MappingProxyType
+
+import soupsieve
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+SOURCES_FILE = getattr(settings, "SCRAPE_SOURCES_FILE", Path(__file__).resolve().parent / "sources.toml")
+
+SOURCE_TYPES = ("rss", "html")
+
+
+@dataclass(frozen=True)
+class Source:
+    university: str
+    label: str
+    url: str
+    type: str = "rss"
+    source_type: str = "news_event"
+    list_selector: str = ""
+    title_selector: str = ""
+    timeout: float = 25
+    # None falls back to SCRAPE_MAX_PER_HOST / the SCRAPE_POLL_* bounds
+    max_per_host: int | None = None
+    min_interval: int | None = None
+    max_interval: int | None = None
+    list_select: soupsieve.SoupSieve | None = field(default=None, init=False, repr=False, compare=False)
+    title_select: soupsieve.SoupSieve | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.type not in SOURCE_TYPES:
+            raise ImproperlyConfigured(f"{self.label}: type must be one of {', '.join(SOURCE_TYPES)}")
+        if self.type == "html":
+            if not (self.list_selector and self.title_selector):
+                raise ImproperlyConfigured(f"{self.label}: html sources need list_selector and title_selector")
+            try:
+                object.__setattr__(self, "list_select", soupsieve.compile(self.list_selector))
+                object.__setattr__(self, "title_select", soupsieve.compile(self.title_selector))
+            except soupsieve.SelectorSyntaxError as exc:
+                raise ImproperlyConfigured(f"{self.label}: invalid selector: {exc}") from exc
+
+    def as_dict(self):
+        """Plain fields, e.g. to pass the source to a Celery task."""
+        return {f.name: getattr(self, f.name) for f in fields(self) if f.init}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+@dataclass(frozen=True)
+class Registry:
+    # {university: (Source, ...)} in file order
+    sources: MappingProxyType
+    base_urls: MappingProxyType
+    by_url: MappingProxyType
+
+    @property
+    def universities(self):
+        return list(self.sources)
+
+    def base_url(self, university):
+        return self.base_urls.get(university, "")
+
+
+_SOURCE_FIELDS = {f.name for f in fields(Source) if f.init} - {"university"}
+# TOML types accepted for each source field (TOML has no null); str otherwise
+_FIELD_TYPES = {"timeout": (int, float), "max_per_host": int, "min_interval": int, "max_interval": int}
+
+
+def _table(value, what):
+    if not isinstance(value, dict):
+        raise ImproperlyConfigured(f"{what} must be a table")
+    return value
+
+
+def _check_types(university, entry):
+    for key, value in entry.items():
+        if isinstance(value, bool) or not isinstance(value, _FIELD_TYPES.get(key, str)):
+            raise ImproperlyConfigured(f"{university}: source key {key} has the wrong type ({type(value).__name__})")
+
+
+def build_registry(data):
+    """
+    Build a Registry from parsed TOML (``{"defaults": ..., "universities":
+    ...}``).  Raises ImproperlyConfigured for anything that isn't a valid
+    registry, including well-formed TOML of the wrong shape.
+    """
+    defaults = _table(data.get("defaults", {}), "defaults")
+    sources, base_urls, by_url = {}, {}, {}
+    for university, config in _table(data.get("universities", {}), "universities").items():
+        config = _table(config, f"universities.{university}")
+        base_urls[university] = config.get("base_url", "")
+        if not isinstance(base_urls[university], str):
+            raise ImproperlyConfigured(f"{university}: base_url must be a string")
+        configured = config.get("sources", [])
+        if not isinstance(configured, list):
+            raise ImproperlyConfigured(f"{university}: sources must be an array of tables")
+        entries = []
+        for i, entry in enumerate(configured):
+            entry = {**defaults, **_table(entry, f"{university} source {i + 1}")}
+            unknown = set(entry) - _SOURCE_FIELDS
+            if unknown:
+                raise ImproperlyConfigured(f"{university}: unknown source keys {', '.join(sorted(unknown))}")
+            if "url" not in entry:
+                raise ImproperlyConfigured(f"{university}: every source needs a url")
+            _check_types(university, entry)
+            entry.setdefault("label", entry["url"])
+            source = Source(university=university, **entry)
+            if source.url in by_url:
+                raise ImproperlyConfigured(f"{source.url} is configured twice")
+            by_url[source.url] = source
+            entries.append(source)
+        sources[university] = tuple(entries)
+    return Registry(
+        sources=MappingProxyType(sources),
+        base_urls=MappingProxyType(base_urls),
+        by_url=MappingProxyType(by_url),
+    )
+
+
+def load_registry(path):
+    with open(path, "rb") as f:
+        return build_registry(tomllib.load(f))
+
+
+_registry = None
+_loaded_from = None  # (path, mtime_ns) of the current registry
+_lock = threading.Lock()
+
+
+def get_registry():
+    """The current Registry, reloaded if the sources file changed."""
+    global _registry, _loaded_from
+    path = SOURCES_FILE
+    try:
+        stamp = (str(path), os.stat(path).st_mtime_ns)
+    except OSError:
+        stamp = (str(path), None)  # load_registry() raises, and it is logged once
+    if stamp != _loaded_from:
+        with _lock:
+            if stamp != _loaded_from:
+                try:
+                    _registry = load_registry(path)
+                except (OSError, tomllib.TOMLDecodeError, ImproperlyConfigured) as exc:
+                    if _registry is None:
+                        raise
+                    logger.error("Keeping the previous source registry; %s is invalid: %s", path, exc)
+                _loaded_from = stamp
+    return _registry
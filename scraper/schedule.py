@@ -0,0 +1,181 @@
+"""
+Adaptive per-source polling.
+
+Every fetch of a configured source updates its SourceState: an
+exponentially weighted rate of new items per hour, the healthy polling
+interval derived from it, and the time of the next poll.  Busy feeds are
+polled often enough to pick up roughly ``TARGET_ITEMS`` new items per
+fetch, quiet ones back off by doubling their interval, and failing ones
+retry on an exponential backoff without losing their healthy cadence.
+Celery beat (``run_due_scrapes``) and ``run_scrape --due`` only fetch the
+sources that are due.
+
+A source that fails ``BREAKER_THRESHOLD`` times in a row trips its circuit
+breaker: every scrape path, dashboard triggers included, skips it until
+``BREAKER_COOLDOWN`` has passed, then a single trial fetch either closes
+the circuit or opens it for another cooldown.  Fetch outcomes arrive in
+bulk at the end of each run (see ``scraper.metrics.record_run``).
+"""
+
+import logging
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import registry
+from .models import SourceState
+
+logger = logging.getLogger(__name__)
+
+MIN_INTERVAL = getattr(settings, "SCRAPE_POLL_MIN_INTERVAL", 15 * 60)
+MAX_INTERVAL = getattr(settings, "SCRAPE_POLL_MAX_INTERVAL", 24 * 60 * 60)
+DEFAULT_INTERVAL = getattr(settings, "SCRAPE_POLL_DEFAULT_INTERVAL", 60 * 60)
+TARGET_ITEMS = getattr(settings, "SCRAPE_POLL_TARGET_ITEMS", 3)
+RATE_ALPHA = getattr(settings, "SCRAPE_POLL_RATE_ALPHA", 0.3)
+# How long a dispatched source stays claimed before it is considered due again
+CLAIM_LEASE = getattr(settings, "SCRAPE_POLL_LEASE", 15 * 60)
+BREAKER_THRESHOLD = getattr(settings, "SCRAPE_BREAKER_THRESHOLD", 5)
+BREAKER_COOLDOWN = getattr(settings, "SCRAPE_BREAKER_COOLDOWN", 6 * 60 * 60)
+
+_FETCH_FIELDS = [
+    "last_fetched_at", "last_new", "item_rate", "interval", "failures", "next_poll_at",
+    "circuit_open_until", "last_status_code", "last_error", "last_latency", "updated_at",
+]
+
+
+def _bounds(url):
+    # Per-source polling bounds from the registry, else the global ones
+    source = registry.get_registry().by_url.get(url)
+    if source is None:
+        return MIN_INTERVAL, MAX_INTERVAL
+    return source.min_interval or MIN_INTERVAL, source.max_interval or MAX_INTERVAL
+
+
+def _clamp(seconds, bounds=(MIN_INTERVAL, MAX_INTERVAL)):
+    low, high = bounds
+    return int(min(max(seconds, low), high))
+
+
+def _healthy_interval(state, new, now, bounds=(MIN_INTERVAL, MAX_INTERVAL)):
+    """Update ``state.item_rate`` for this fetch and return the new cadence."""
+    if state.last_fetched_at is None:
+        # The first fetch returns the feed's whole backlog, which says
+        # nothing about how often it publishes
+        return state.interval
+    hours = max((now - state.last_fetched_at).total_seconds(), 1) / 3600
+    state.item_rate = RATE_ALPHA * (new / hours) + (1 - RATE_ALPHA) * state.item_rate
+    if new == 0 or state.item_rate <= 0:
+        return _clamp(state.interval * 2, bounds)
+    return _clamp(TARGET_ITEMS / state.item_rate * 3600, bounds)
+
+
+def _apply_fetch(state, fetch, now):
+    bounds = _bounds(state.url)
+    if fetch["ok"]:
+        state.interval = _healthy_interval(state, fetch["new"], now, bounds)
+        state.failures = 0
+        state.circuit_open_until = None
+        state.last_fetched_at = now
+        state.last_new = fetch["new"]
+        delay = state.interval
+    else:
+        state.failures += 1
+        delay = min(bounds[0] * 2 ** state.failures, bounds[1])
+        if state.failures >= BREAKER_THRESHOLD:
+            state.circuit_open_until = now + timedelta(seconds=BREAKER_COOLDOWN)
+            delay = max(delay, BREAKER_COOLDOWN)
+    state.last_status_code = fetch.get("status_code")
+    state.last_error = (fetch.get("error") or "")[:500]
+    state.last_latency = fetch.get("seconds")
+    state.next_poll_at = now + timedelta(seconds=delay)
+    state.updated_at = now
+
+
+def record_fetches(fetches, now=None):
+    """
+    Record a run's fetches and schedule each source's next one.  Each fetch
+    is a dict with ``url``, ``new`` and ``ok``, plus optional
+    ``status_code``, ``error`` and ``seconds``.  All states are written in
+    one transaction with a bulk update; returns them in ``fetches`` order.
+    """
+    now = now or timezone.now()
+    fetches = list(fetches)
+    urls = [fetch["url"] for fetch in fetches]
+    with transaction.atomic():
+        states = {s.url: s for s in SourceState.objects.select_for_update().filter(url__in=urls)}
+        created = {
+            url: SourceState(url=url, interval=DEFAULT_INTERVAL)
+            for url in urls if url not in states
+        }
+        states.update(created)
+        for fetch in fetches:
+            _apply_fetch(states[fetch["url"]], fetch, now)
+        SourceState.objects.bulk_update(
+            [s for url, s in states.items() if url not in created], _FETCH_FIELDS,
+        )
+        SourceState.objects.bulk_create(created.values(), ignore_conflicts=True)
+    return [states[url] for url in urls]
+
+
+def record_fetch(url, new, ok=True, now=None):
+    """Record a fetch of ``url`` that found ``new`` items and schedule the next one."""
+    return record_fetches([{"url": url, "new": new, "ok": ok}], now)[0]
+
+
+def without_open_circuits(sources, now=None):
+    """
+    ``sources`` ({university: [Source, ...]}) minus the sources whose circuit
+    breaker is open.  Every university is kept, possibly with no sources.
+    """
+    now = now or timezone.now()
+    urls = [src.url for srcs in sources.values() for src in srcs]
+    open_until = dict(
+        SourceState.objects.filter(url__in=urls, circuit_open_until__gt=now)
+        .values_list("url", "circuit_open_until")
+    )
+    for url, until in open_until.items():
+        logger.info("%s: circuit open until %s — skipping", url, until.isoformat())
+    return {
+        uni: [src for src in srcs if src.url not in open_until]
+        for uni, srcs in sources.items()
+    }
+
+
+def claim_due(sources, now=None):
+    """
+    Return the subset of ``sources`` ({university: [Source, ...]}) due for
+    a poll, keeping registry order.  Sources never fetched are always due.
+
+    Claimed sources have their next poll pushed back by ``CLAIM_LEASE`` so
+    an overlapping beat tick doesn't queue them twice; the fetch itself
+    then sets the real next poll time.
+    """
+    now = now or timezone.now()
+    urls = [src.url for srcs in sources.values() for src in srcs]
+    with transaction.atomic():
+        next_polls = dict(
+            SourceState.objects.select_for_update()
+            .filter(url__in=urls)
+            .values_list("url", "next_poll_at")
+        )
+
+        def is_due(url):
+            next_poll = next_polls.get(url)
+            return next_poll is None or next_poll <= now
+
+        due = {uni: [src for src in srcs if is_due(src.url)] for uni, srcs in sources.items()}
+        due = {uni: srcs for uni, srcs in due.items() if srcs}
+        due_urls = [src.url for srcs in due.values() for src in srcs]
+        lease = now + timedelta(seconds=CLAIM_LEASE)
+        SourceState.objects.filter(url__in=due_urls).update(next_poll_at=lease)
+        SourceState.objects.bulk_create(
+            [
+                SourceState(url=url, interval=DEFAULT_INTERVAL, next_poll_at=lease)
+                for url in due_urls if url not in next_polls
+            ],
+            ignore_conflicts=True,
+        )
+    return due
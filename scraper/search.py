@@ -0,0 +1,71 @@
+"""
+Full-text search over Opportunity titles and descriptions.
+
+PostgreSQL keeps a precomputed ``search_vector`` (title weighted above
+description) that a trigger refreshes on every insert/update and a GIN
+index serves; results are ranked with ``ts_rank``.  SQLite, used for local
+and test runs, gets an FTS5 external-content table kept in sync by
+triggers and ranked with ``bm25()``.  Any other backend falls back to a
+plain ``icontains`` scan.
+"""
+
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Opportunity
+
+TABLE = Opportunity._meta.db_table
+FTS_TABLE = f"{TABLE}_fts"
+SEARCH_CONFIG = "english"
+
+# Only word characters reach the engines, so user input can't inject
+# tsquery / FTS5 syntax; every term is a prefix match to keep the behaviour
+# users got from icontains ("fellow" → "fellowship").
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _tsquery(query):
+    return " & ".join(f"{token}:*" for token in _TOKEN_RE.findall(query))
+
+
+def _fts5_query(query):
+    return " ".join(f'"{token}"*' for token in _TOKEN_RE.findall(query))
+
+
+def search_opportunities(qs, query):
+    """
+    Restrict an Opportunity queryset to rows matching ``query`` in the title
+    or description, annotated with ``search_rank`` and ordered best-first.
+    """
+    vendor = connections[qs.db].vendor
+    if vendor == "postgresql":
+        terms = _tsquery(query)
+        if not terms:
+            return qs.none()
+        search = SearchQuery(terms, search_type="raw", config=SEARCH_CONFIG)
+        return (
+            qs.filter(search_vector=search)
+            .annotate(search_rank=SearchRank(F("search_vector"), search))
+            .order_by("-search_rank", "-created_at")
+        )
+    if vendor == "sqlite":
+        match = _fts5_query(query)
+        if not match:
+            return qs.none()
+        # bm25() is lower-is-better; weight title matches 10x description
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = {TABLE}.id",
+            (match,),
+        )
+        matching = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+        return (
+            qs.filter(id__in=matching)
+            .annotate(search_rank=rank)
+            .order_by("-search_rank", "-created_at")
+        )
+    return qs.filter(Q(title__icontains=query) | Q(description__icontains=query)).order_by("-created_at")
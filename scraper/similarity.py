@@ -0,0 +1,234 @@
+"""
+Near-duplicate detection: URL canonicalisation and SimHash signatures.
+
+The same story is often syndicated across feeds with a reworded title or a
+tracking-parameter URL, which the exact ``content_hash`` can't catch.
+``canonical_url`` strips tracking parameters (``utm_*``, ``fbclid`` ...) and
+normalises case, default ports and query order before an item is hashed.
+
+Each item also gets a 64-bit SimHash of the word pairs (2-word shingles)
+in its description, stop words left out, or in its title when there is no
+description to speak of.  Copies of one text (re-cased, re-punctuated,
+truncated a little differently) get signatures within a few bits, while
+texts that merely share a vocabulary (boilerplate, a department's stock
+phrases) don't, since word order has to match too; on feed-sized snippets
+a reworded sentence already moves the signature past the threshold, so
+only the body has to be (nearly) the same text.  Titles are left out of
+the signature because syndicated copies reword them most; instead a
+candidate close in bits is only a near-duplicate if the titles also share
+at least ``TITLE_SIMILARITY`` of their words (Jaccard), so stories with
+similar bodies but different headlines stay apart.  The signature is
+stored split into ``BANDS`` 16-bit bands, each an indexed column; two
+signatures within ``SIMHASH_DISTANCE`` (< ``BANDS``) bits of each other
+must agree on at least one whole band, so one indexed ``band0 IN (...) OR
+band1 IN (...) ...`` query finds every candidate and only those few are
+compared.  Texts of fewer than
+``SIMHASH_MIN_WORDS`` distinct words ("Weekly update") get no signature,
+since unrelated items share them too often.
+
+``SCRAPE_NEAR_DUPLICATES`` decides what ingestion does with an item close
+to a stored one: ``"link"`` (the default) stores it with ``duplicate_of``
+pointing at the original (listings show originals only, and nothing is
+lost if the match was wrong), ``"suppress"`` drops it, ``"off"`` skips the
+check.
+"""
+
+import hashlib
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Opportunity
+
+NEAR_DUPLICATES = getattr(settings, "SCRAPE_NEAR_DUPLICATES", "link")
+SIMHASH_DISTANCE = getattr(settings, "SCRAPE_SIMHASH_DISTANCE", 3)
+SIMHASH_MIN_WORDS = getattr(settings, "SCRAPE_SIMHASH_MIN_WORDS", 4)
+TITLE_SIMILARITY = getattr(settings, "SCRAPE_TITLE_SIMILARITY", 0.6)
+SHINGLE_SIZE = 2
+
+BITS = 64
+BANDS = 4
+BAND_BITS = BITS // BANDS
+BAND_FIELDS = tuple(f"simhash_band{i}" for i in range(BANDS))
+_MASK = (1 << BITS) - 1
+
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid",
+    "_hsenc", "_hsmi", "mkt_tok", "ref", "ref_src", "cmpid", "spm",
+})
+_DEFAULT_PORTS = {"http": ":80", "https": ":443"}
+_WORD_RE = re.compile(r"\w+")
+# Too common to say anything about the story; left out of signatures
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in into is it its of on or "
+    "that the their this to was were will with".split()
+)
+
+
+def _is_tracking(param):
+    key = param.split("=", 1)[0].lower()
+    return key.startswith("utm_") or key in TRACKING_PARAMS
+
+
+def canonical_url(url):
+    """``url`` without tracking parameters, with a lowercase scheme/host and sorted query."""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc
+    if "@" not in netloc:
+        netloc = netloc.lower()
+        default_port = _DEFAULT_PORTS.get(scheme)
+        if default_port and netloc.endswith(default_port):
+            netloc = netloc[: -len(default_port)]
+    # Parameters are kept verbatim (no re-encoding), only filtered and sorted
+    query = "&".join(sorted(p for p in parts.query.split("&") if p and not _is_tracking(p)))
+    path = parts.path or ("/" if netloc else "")
+    return urlunsplit((scheme, netloc, path, query, parts.fragment))
+
+
+def _words(text):
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in STOP_WORDS]
+
+
+def simhash(text):
+    """64-bit SimHash of the word shingles in ``text``, or None if it has too few words."""
+    words = _words(text)
+    if len(set(words)) < SIMHASH_MIN_WORDS:
+        return None
+    shingles = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+    # One bit string per shingle occurrence; zip() turns them into per-bit
+    # columns so each vote is a C-level count rather than a Python loop.
+    rows = [format(int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest()), "064b") for s in shingles]
+    half = len(rows) / 2
+    return int("".join("1" if column.count("1") > half else "0" for column in zip(*rows)), 2)
+
+
+def title_similarity(a, b):
+    """Jaccard similarity of the words in two titles, stop words left out (0 to 1)."""
+    a, b = set(_words(a)), set(_words(b))
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def is_near_duplicate(obj, simhash, title, max_distance=SIMHASH_DISTANCE):
+    """Whether signed ``obj`` is within ``max_distance`` bits of ``simhash`` with a similar title."""
+    return (
+        distance(obj.simhash, simhash) <= max_distance
+        and title_similarity(obj.title, title) >= TITLE_SIMILARITY
+    )
+
+
+def distance(a, b):
+    """Hamming distance between two signatures (signed or unsigned)."""
+    return ((a ^ b) & _MASK).bit_count()
+
+
+def signature_fields(title, description=""):
+    """Model field values for an item's signature: ``simhash`` plus its bands."""
+    value = simhash(description) if description else None
+    if value is None:
+        value = simhash(title)
+    if value is None:
+        return dict.fromkeys(("simhash",) + BAND_FIELDS)
+    fields = {name: (value >> (i * BAND_BITS)) & ((1 << BAND_BITS) - 1) for i, name in enumerate(BAND_FIELDS)}
+    # Stored in a signed 64-bit column
+    fields["simhash"] = value - (1 << BITS) if value >= 1 << (BITS - 1) else value
+    return fields
+
+
+def sign(obj):
+    """Set the signature fields on an Opportunity from its description (or title)."""
+    for name, value in signature_fields(obj.title, obj.description).items():
+        setattr(obj, name, value)
+
+
+def _bands(obj):
+    return [(name, getattr(obj, name)) for name in BAND_FIELDS]
+
+
+def find_originals(objs, max_distance=SIMHASH_DISTANCE, exclude=()):
+    """
+    The id of the closest stored original (a row that isn't itself a
+    duplicate) within ``max_distance`` bits of each signed object in
+    ``objs`` and with a similar title, or None; a list in ``objs`` order.
+    Stored objects only match rows with a lower id, and ids in ``exclude``
+    never match.  One query for the whole batch.
+    """
+    originals = [None] * len(objs)
+    signed = [obj for obj in objs if obj.simhash is not None]
+    if not signed:
+        return originals
+    bands = Q()
+    for name in BAND_FIELDS:
+        bands |= Q(**{f"{name}__in": {getattr(obj, name) for obj in signed}})
+    buckets = {}
+    rows = Opportunity.objects.filter(bands, duplicate_of__isnull=True).values_list(
+        "id", "simhash", "title", *BAND_FIELDS
+    )
+    for pk, value, title, *band_values in rows:
+        if pk not in exclude:
+            for key in zip(BAND_FIELDS, band_values):
+                buckets.setdefault(key, []).append((pk, value, title))
+
+    for i, obj in enumerate(objs):
+        if obj.simhash is None:
+            continue
+        best = None
+        for key in _bands(obj):
+            for pk, value, title in buckets.get(key, ()):
+                if obj.pk is not None and pk >= obj.pk:
+                    continue
+                d = distance(obj.simhash, value)
+                if (best is None or (d, pk) < best) and is_near_duplicate(obj, value, title, max_distance):
+                    best = (d, pk)
+        if best is not None:
+            originals[i] = best[1]
+    return originals
+
+
+def resolve_near_duplicates(objs, mode=None):
+    """
+    Sign unsaved ``objs`` and apply ``mode`` to the near-duplicates among
+    them: one of a stored row is dropped (``"suppress"``) or linked to it
+    (``"link"``).  A near-duplicate of an earlier item in the same batch
+    has nothing to link to until that item is stored, so it is dropped
+    (``"suppress"``) or held back to go through ``link_to_stored()`` after
+    the batch is inserted (``"link"``).  Returns ``(objs to insert now,
+    objs held back, near-duplicates found)``.
+    """
+    mode = mode or NEAR_DUPLICATES
+    if mode == "off":
+        return objs, [], 0
+    kept, later, buckets = [], [], {}
+    for obj in objs:
+        sign(obj)
+        if obj.simhash is not None:
+            keys = _bands(obj)
+            if any(
+                is_near_duplicate(obj, other.simhash, other.title)
+                for key in keys for other in buckets.get(key, ())
+            ):
+                later.append(obj)
+                continue
+            for key in keys:
+                buckets.setdefault(key, []).append(obj)
+        kept.append(obj)
+    originals = find_originals(kept)
+    found = len(later) + sum(pk is not None for pk in originals)
+    if mode == "link":
+        for obj, original_id in zip(kept, originals):
+            obj.duplicate_of_id = original_id
+        return kept, later, found
+    return [obj for obj, original_id in zip(kept, originals) if original_id is None], [], found
+
+
+def link_to_stored(objs):
+    """Point each signed, unsaved object in ``objs`` at its closest stored original (one query)."""
+    for obj, original_id in zip(objs, find_originals(objs)):
+        obj.duplicate_of_id = original_id
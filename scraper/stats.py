@@ -0,0 +1,61 @@
+"""
+Dashboard statistics served from Django's cache.
+
+Per-university and per-source_type counts are computed with two GROUP BY
+queries and cached; ``IvyScraper`` calls ``refresh_stats()`` once at the end
+of a scrape run that inserted rows, so dashboard hits never touch the table.
+The cached copy is tagged with the dashboard's data version (see
+``scraper.pagecache``) it was computed at: a write bumps the version, so
+the next page rendered recounts instead of showing stale totals next to
+new rows.  Recounting never bumps the version itself, so a stats expiry
+doesn't invalidate any page.  ``SCRAPE_STATS_TTL`` bounds staleness from
+writes that don't bump it (raw SQL).
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Opportunity
+from .pagecache import data_version
+
+STATS_CACHE_KEY = "scraper:stats"
+STATS_TTL = getattr(settings, "SCRAPE_STATS_TTL", 15 * 60)
+
+
+def compute_stats():
+    by_university = list(
+        Opportunity.objects.filter(duplicate_of__isnull=True).values("university")
+        .annotate(count=Count("id"))
+        .order_by("-count")
+    )
+    by_source_type = list(
+        Opportunity.objects.filter(duplicate_of__isnull=True).values("source_type")
+        .annotate(count=Count("id"))
+        .order_by("-count")
+    )
+    return {
+        "total": sum(row["count"] for row in by_university),
+        "by_university": by_university,
+        "by_source_type": by_source_type,
+    }
+
+
+def refresh_stats():
+    """Recompute the counters and replace the cached copy."""
+    version = data_version()
+    stats = compute_stats()
+    cache.set(STATS_CACHE_KEY, (version, stats), STATS_TTL)
+    return stats
+
+
+def invalidate_stats():
+    cache.delete(STATS_CACHE_KEY)
+
+
+def get_stats():
+    """Cached stats, recomputed on a miss or when the data version has moved on."""
+    cached = cache.get(STATS_CACHE_KEY)
+    if cached is None or cached[0] != data_version():
+        return refresh_stats()
+    return cached[1]
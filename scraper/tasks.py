@@ -1,17 +1,164 @@
-from celery import shared_task
-from .logic import IvyScraper
+"""
+Celery tasks behind the dashboard's scrape buttons.
+
+A scrape job fans out into one ``scrape_source`` task per registry source,
+grouped in a chord whose ``finish_scrape`` callback aggregates the
+``{university: new_count}`` summary, so a slow feed only holds up its own
+task and the work spreads across every available worker.  RSS sources go
+to ``SCRAPE_QUEUE``; HTML sources, which may fall back to Playwright, go to
+``SCRAPE_BROWSER_QUEUE`` so browser work can be given its own workers.
+Celery beat runs ``run_due_scrapes`` to poll each source on its own
+adaptive schedule (see ``scraper.schedule``).  Each source task returns its
+stage timings, and ``finish_scrape`` records them as one run (see
+``scraper.metrics``); with ``SCRAPE_ENRICH`` on it then queues
+``enrich_new_items`` for the rows the job added.  Tasks for a host that is
+out of request tokens are retried once it has one (see
+``scraper.ratelimit``).
+"""
+
+import math
+
+from celery import chord, shared_task
+from django.conf import settings
+
+from . import enrich, logic, metrics, ratelimit, registry
+from .jobs import expect_sources, finish_job, mark_running, record_source_progress
+from .schedule import claim_due, without_open_circuits
+from .stats import refresh_stats
+
+SCRAPE_QUEUE = getattr(settings, "SCRAPE_QUEUE", "scrape")
+SCRAPE_BROWSER_QUEUE = getattr(settings, "SCRAPE_BROWSER_QUEUE", "playwright")
+RATE_LIMIT = getattr(settings, "SCRAPE_TASK_RATE_LIMIT", "30/m")
+SOFT_TIME_LIMIT = getattr(settings, "SCRAPE_TASK_SOFT_TIME_LIMIT", 120)
+TIME_LIMIT = getattr(settings, "SCRAPE_TASK_TIME_LIMIT", 180)
+BROWSER_SOFT_TIME_LIMIT = getattr(settings, "SCRAPE_BROWSER_TASK_SOFT_TIME_LIMIT", 300)
+BROWSER_TIME_LIMIT = getattr(settings, "SCRAPE_BROWSER_TASK_TIME_LIMIT", 360)
+
+
+def _summarise_all(results):
+    total = sum(results.values())
+    detail = ", ".join(f"{u}: {n}" for u, n in results.items() if n > 0) or "none"
+    return f"✓ {total} new items — {detail}"
+
+
+def _host_wait(url):
+    """
+    0 if ``url``'s host has a request token free, else the whole seconds
+    until it will.  Buckets are shared by every worker (see
+    ``scraper.ratelimit``), so a task for a busy host goes back on the queue
+    instead of holding a worker while the fetch waits for its token.
+    """
+    return math.ceil(ratelimit.delay(url))
+
+
+@shared_task(
+    bind=True,
+    rate_limit=RATE_LIMIT,
+    soft_time_limit=SOFT_TIME_LIMIT,
+    time_limit=TIME_LIMIT,
+    max_retries=20,
+)
+def scrape_source(self, university, index, src, job_id=None):
+    # ``src`` travels as Source.as_dict() so a queued task keeps the config
+    # it was dispatched with even if the registry reloads meanwhile
+    src = registry.Source.from_dict(src)
+    wait = _host_wait(src.url)
+    if wait:
+        raise self.retry(countdown=wait)
+    if job_id:
+        record_source_progress(job_id, university, index, "running")
+    # IvyScraper.scrape_source logs and swallows errors, including
+    # SoftTimeLimitExceeded, so a failed feed counts as 0 new items.
+    with metrics.scrape_run("celery", persist=False) as run:
+        n = logic.IvyScraper().scrape_source(university, src)
+    if job_id:
+        record_source_progress(job_id, university, index, "done", n)
+    return [university, n, run.sources]
+
+
+@shared_task
+def finish_scrape(results, universities, job_id=None, single=False):
+    totals = {uni: 0 for uni in universities}
+    samples = []
+    for university, n, sources in results:
+        totals[university] += n
+        samples.extend(sources)
+    metrics.record_run("celery", samples)
+    # Dashboard counters are recomputed once per job, not per feed
+    if any(totals.values()):
+        refresh_stats()
+        if enrich.ENRICH:
+            enrich_new_items.apply_async(queue=SCRAPE_QUEUE)
+    if single:
+        university, n = next(iter(totals.items()))
+        message = f"✓ {n} new items from {university}"
+    else:
+        message = _summarise_all(totals)
+    if job_id:
+        finish_job(job_id, "done", message)
+    return message
+
+
+@shared_task(soft_time_limit=enrich.ENRICH_LOCK_TTL - 60, time_limit=enrich.ENRICH_LOCK_TTL)
+def enrich_new_items():
+    """Fetch the article pages of rows inserted since the last pass (see ``scraper.enrich``)."""
+    counts = enrich.enrich_pending()
+    return f"✓ {counts['done']} enriched, {counts['failed']} failed"
+
+
+@shared_task
+def scrape_failed(request, exc, traceback, job_id=None):
+    # Only reached when a source task dies outright (hard time limit,
+    # lost worker); ordinary scrape errors are absorbed per source.
+    if job_id:
+        finish_job(job_id, "error", f"Scrape failed: {exc}")
+
+
+def _source_signature(university, index, src, job_id):
+    if src.type == "rss":
+        options = {"queue": SCRAPE_QUEUE}
+    else:
+        options = {
+            "queue": SCRAPE_BROWSER_QUEUE,
+            "soft_time_limit": BROWSER_SOFT_TIME_LIMIT,
+            "time_limit": BROWSER_TIME_LIMIT,
+        }
+    return scrape_source.signature((university, index, src.as_dict(), job_id), **options)
+
+
+def _fan_out(universities, job_id=None, single=False, sources=None):
+    if sources is None:
+        configured = registry.get_registry().sources
+        sources = {uni: configured.get(uni, ()) for uni in universities}
+    sources = without_open_circuits(sources)
+    if job_id:
+        mark_running(job_id)
+        expect_sources(job_id, {uni: len(srcs) for uni, srcs in sources.items()})
+    header = [
+        _source_signature(uni, i, src, job_id)
+        for uni, srcs in sources.items() for i, src in enumerate(srcs)
+    ]
+    if not header:
+        return finish_scrape([], universities, job_id, single)
+    callback = finish_scrape.s(universities, job_id, single).on_error(scrape_failed.s(job_id))
+    chord(header)(callback)
+    return f"Dispatched {len(header)} sources"
+
+
+@shared_task
+def run_ivy_scrape(job_id=None):
+    return _fan_out(registry.get_registry().universities, job_id)
 
 
 @shared_task
-def run_ivy_scrape():
-    scraper = IvyScraper()
-    results = scraper.scrape_all()
-    summary = ", ".join(f"{uni}: {n} new" for uni, n in results.items())
-    return f"Scraped — {summary}"
+def run_scrape_university(university, job_id=None):
+    return _fan_out([university], job_id, single=True)
 
 
 @shared_task
-def run_scrape_university(university):
-    scraper = IvyScraper()
-    n = scraper.scrape_one(university)
-    return f"Scraped {n} new items from {university}"
+def run_due_scrapes():
+    """Beat entry point: scrape only the sources whose next poll time has passed."""
+    due = claim_due(registry.get_registry().sources)
+    if not due:
+        return "No sources due"
+    return _fan_out(list(due), sources=due)
@@ -1,3 +1,2189 @@
-from django.test import TestCase
+import asyncio
+import csv
+import dataclasses
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import unittest
+from io import StringIO
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+import requests
+from bs4 import BeautifulSoup
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q, QuerySet
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ivy_intel.celery import app as celery_app
+
+from . import (
+    async_scraper, dedupe, enrich, export, logic, metrics, pagecache, ratelimit, registry, schedule, similarity,
+    tasks, views,
+)
+from .async_scraper import AsyncIvyScraper
+from .browser import BrowserPool
+from .classify import classify
+from .jobs import FINISHED_STATES, get_job, start_job
+from .logic import IvyScraper, _iter_feed_entries, _save_items, _scrape_rss, get_session
+from .management.commands.bench_scrape import LIST_SELECTOR, TITLE_SELECTOR, Probe, ReplayServer
+from .models import FeedValidator, Opportunity, ScrapeRun, SourceRun, SourceState
+from .pagination import decode_cursor, keyset_page
+from .registry import build_registry
+from .schedule import claim_due, record_fetch
+from .search import search_opportunities
+from .stats import STATS_CACHE_KEY, compute_stats, get_stats, refresh_stats
+from .text import html_to_text
+
+FEED_FIXTURES = Path(__file__).resolve().parent / "testdata" / "feeds"
+
+
+def _registry_for(config):
+    return build_registry({"universities": {uni: {"sources": srcs} for uni, srcs in config.items()}})
+
+
+def as_sources(config):
+    """``{university: [source fields, ...]}`` as registry Sources."""
+    return _registry_for(config).sources
+
+
+def use_sources(config):
+    """Serve ``config`` from the shared source registry."""
+    return mock.patch.object(registry, "get_registry", return_value=_registry_for(config))
+
+
+def setUpModule():
+    # The per-host limiter is off unless a test turns it on (HostRateLimitTests),
+    # and never talks to a real Redis: tests share no bucket state and fetch
+    # no robots.txt from the stub servers.
+    for patcher in (
+        mock.patch.object(ratelimit, "HOST_RATE", 0),
+        mock.patch.object(ratelimit, "RATE_LIMIT_URL", ""),
+    ):
+        patcher.start()
+        unittest.addModuleCleanup(patcher.stop)
+    ratelimit._reset()
+
+RSS_FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">
+  <channel>
+    <title>Test Gazette</title>
+    <item>
+      <title>Fellowship applications open</title>
+      <link>https://news.example.edu/fellowship</link>
+      <description>&lt;p&gt;Apply by &lt;b&gt;March 1&lt;/b&gt;.&lt;/p&gt;</description>
+    </item>
+    <item>
+      <title>Campus lecture series</title>
+      <link>https://news.example.edu/lecture</link>
+      <content:encoded><![CDATA[<div>Talks <em>every</em> Friday.</div>]]></content:encoded>
+    </item>
+  </channel>
+</rss>
+"""
+
+
+class StubServer:
+    """
+    Local HTTP server on a free port, serving from a thread while used as a
+    context manager.  Subclasses answer each GET in ``handle(request)``.
+    """
+
+    def __init__(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    @staticmethod
+    def respond(request, status, body=b"", **headers):
+        request.send_response(status)
+        for name, value in headers.items():
+            request.send_header(name.replace("_", "-"), value)
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FeedServer(StubServer):
+    """Tiny local HTTP stand-in for a university feed."""
+
+    def __init__(self, body=RSS_FEED, etag='"v1"', last_modified="Mon, 05 Oct 2026 10:00:00 GMT"):
+        super().__init__()
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.requests = []
+        self.robots_requests = 0
+        self.failures = []  # status codes to answer with before serving the feed
+        self.robots = None  # robots.txt body, 404 if None
+        self.url = f"{self.base_url}/feed"
+
+    def handle(self, request):
+        if request.path == "/robots.txt":
+            self.robots_requests += 1
+            if self.robots is None:
+                request.send_error(404)
+            else:
+                self.respond(request, 200, self.robots.encode(), Content_Type="text/plain")
+            return
+        self.requests.append(dict(request.headers))
+        if self.failures:
+            self.respond(request, self.failures.pop(0), Retry_After="0")
+            return
+        if self.etag and request.headers.get("If-None-Match") == self.etag:
+            request.send_response(304)
+            request.end_headers()
+            return
+        headers = {"Content_Type": "application/rss+xml"}
+        if self.etag:
+            headers["ETag"] = self.etag
+        if self.last_modified:
+            headers["Last_Modified"] = self.last_modified
+        self.respond(request, 200, self.body, **headers)
+
+
+class ScrapeAllConcurrencyTests(SimpleTestCase):
+    def setUp(self):
+        # Circuit-breaker and run bookkeeping need the database
+        for patcher in (
+            mock.patch.object(logic, "without_open_circuits", side_effect=lambda sources: sources),
+            mock.patch.object(logic.dedupe, "warm"),
+            mock.patch.object(metrics, "record_run"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _fake_sources(self, urls):
+        return {
+            f"Uni{i}": [{"url": url, "type": "rss", "label": f"Feed {i}"}]
+            for i, url in enumerate(urls)
+        }
+
+    def test_feeds_are_fetched_in_parallel(self):
+        sources = self._fake_sources(f"https://host{i}.example/feed" for i in range(4))
+
+        def slow_feed(url, university, source_type="news_event", timeout=25):
+            time.sleep(0.2)
+            return int(university[-1])
+
+        with use_sources(sources), \
+                mock.patch.object(logic, "_scrape_rss", side_effect=slow_feed), \
+                mock.patch.object(logic.connection, "close"), \
+                mock.patch.object(logic, "refresh_stats"):
+            started = time.monotonic()
+            results = IvyScraper().scrape_all(max_workers=4)
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(results, {"Uni0": 0, "Uni1": 1, "Uni2": 2, "Uni3": 3})
+        self.assertEqual(list(results), list(sources))
+        self.assertLess(elapsed, 0.6)
+
+    def test_per_host_limit_is_respected(self):
+        sources = self._fake_sources(f"https://same.example/feed{i}" for i in range(4))
+        lock = threading.Lock()
+        in_flight = peak = 0
+
+        def tracked_feed(url, university, source_type="news_event", timeout=25):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.05)
+            with lock:
+                in_flight -= 1
+            return 1
+
+        with use_sources(sources), \
+                mock.patch.object(logic, "SCRAPE_MAX_PER_HOST", 1), \
+                mock.patch.object(logic, "_host_semaphores", {}), \
+                mock.patch.object(logic, "_scrape_rss", side_effect=tracked_feed), \
+                mock.patch.object(logic.connection, "close"), \
+                mock.patch.object(logic, "refresh_stats"):
+            results = IvyScraper().scrape_all(max_workers=4)
+
+        self.assertEqual(sum(results.values()), 4)
+        self.assertEqual(peak, 1)
+
+    def test_failing_feed_counts_as_zero(self):
+        sources = self._fake_sources(["https://a.example/feed", "https://b.example/feed"])
+
+        def flaky(url, university, source_type="news_event", timeout=25):
+            if "a.example" in url:
+                raise ValueError("boom")
+            return 5
+
+        with use_sources(sources), \
+                mock.patch.object(logic, "_scrape_rss", side_effect=flaky), \
+                mock.patch.object(logic.connection, "close"), \
+                mock.patch.object(logic, "refresh_stats"):
+            results = IvyScraper().scrape_all()
+
+        self.assertEqual(results, {"Uni0": 0, "Uni1": 5})
+
+
+class ConditionalGetTests(TestCase):
+    def test_first_fetch_stores_validators(self):
+        with FeedServer() as server:
+            n = _scrape_rss(server.url, "Harvard")
+
+        self.assertEqual(n, 2)
+        validator = FeedValidator.objects.get(url=server.url)
+        self.assertEqual(validator.etag, '"v1"')
+        self.assertEqual(validator.last_modified, "Mon, 05 Oct 2026 10:00:00 GMT")
+        self.assertEqual(len(validator.body_hash), 64)
+
+    def test_not_modified_skips_parsing_and_db_work(self):
+        with FeedServer() as server:
+            _scrape_rss(server.url, "Harvard")
+            with mock.patch.object(logic, "_save_items") as save:
+                n = _scrape_rss(server.url, "Harvard")
+
+        self.assertEqual(n, 0)
+        save.assert_not_called()
+        self.assertEqual(server.requests[-1]["If-None-Match"], '"v1"')
+        self.assertEqual(server.requests[-1]["If-Modified-Since"], "Mon, 05 Oct 2026 10:00:00 GMT")
+
+    def test_identical_body_without_validators_is_skipped(self):
+        with FeedServer(etag="", last_modified="") as server:
+            _scrape_rss(server.url, "Harvard")
+            with mock.patch.object(logic, "_save_items") as save:
+                n = _scrape_rss(server.url, "Harvard")
+
+        self.assertEqual(n, 0)
+        save.assert_not_called()
+        self.assertNotIn("If-None-Match", server.requests[-1])
+
+    def test_changed_body_is_parsed(self):
+        with FeedServer(etag="") as server:
+            _scrape_rss(server.url, "Harvard")
+            server.body = RSS_FEED.replace(b"/lecture", b"/concert")
+            n = _scrape_rss(server.url, "Harvard")
+
+        self.assertEqual(n, 1)
+        self.assertEqual(Opportunity.objects.count(), 3)
+
+
+class BulkSaveTests(TestCase):
+    def _items(self, n, prefix="Story"):
+        return [(f"{prefix} {i}", f"https://news.example.edu/{prefix.lower()}-{i}", "") for i in range(n)]
+
+    def test_new_items_are_inserted_in_bulk(self):
+        # 50 rows fit one INSERT within SQLite's 999 bound parameters
+        with self.assertNumQueries(5):  # prefetch + savepoint + INSERT + inserted check + release
+            n = _save_items(self._items(50), "Harvard")
+        self.assertEqual(n, 50)
+        self.assertEqual(Opportunity.objects.count(), 50)
+
+    def test_already_stored_feed_costs_one_query(self):
+        _save_items(self._items(100), "Harvard")
+        with self.assertNumQueries(1):
+            n = _save_items(self._items(100), "Harvard")
+        self.assertEqual(n, 0)
+
+    def test_count_only_includes_new_rows(self):
+        _save_items(self._items(10), "Harvard")
+        items = self._items(15) + [("Renamed story", "https://news.example.edu/story-3", "")]
+        self.assertEqual(_save_items(items, "Harvard"), 5)
+        self.assertEqual(Opportunity.objects.count(), 15)
+
+    def test_rows_lost_to_a_concurrent_worker_are_not_counted(self):
+        items = self._items(3)
+        resolve = similarity.resolve_near_duplicates
+
+        def race(objs):
+            # Another worker stores one of the items after our lookup
+            Opportunity.objects.create(
+                title="Story 1", url="https://news.example.edu/story-1", university="Harvard",
+                source_type="news_event", content_hash="f" * 64,
+            )
+            return resolve(objs)
+
+        with mock.patch.object(similarity, "resolve_near_duplicates", side_effect=race), \
+                metrics.source_span("Harvard", "Gazette", "https://news.harvard.edu/feed") as sample:
+            n = _save_items(items, "Harvard")
+        self.assertEqual(n, 2)
+        self.assertEqual(Opportunity.objects.count(), 3)
+        self.assertEqual((sample.counters["inserted"], sample.counters["duplicates"]), (2, 1))
+
+    def test_duplicates_within_batch_and_relative_links(self):
+        items = [
+            ("Gazette story", "/gazette/story/1", "desc"),
+            ("Gazette story", "/gazette/story/1", "desc"),
+            ("", "https://news.harvard.edu/empty", ""),
+        ]
+        self.assertEqual(_save_items(items, "Harvard"), 1)
+        self.assertEqual(Opportunity.objects.get().url, "https://news.harvard.edu/gazette/story/1")
+
+
+class SharedSessionTests(TestCase):
+    def test_session_is_shared_and_pooled(self):
+        session = get_session()
+        self.assertIs(session, get_session())
+        adapter = session.get_adapter("https://news.harvard.edu/gazette/feed")
+        self.assertEqual(adapter._pool_maxsize, logic.HTTP_POOL_SIZE)
+        self.assertIn(429, adapter.max_retries.status_forcelist)
+        self.assertTrue(adapter.max_retries.respect_retry_after_header)
+
+    def test_retries_transient_errors(self):
+        with FeedServer() as server:
+            server.failures = [503, 429]
+            n = _scrape_rss(server.url, "Harvard")
+        self.assertEqual(n, 2)
+        self.assertEqual(len(server.requests), 3)
+
+    def test_retry_after_is_capped(self):
+        retry = get_session().get_adapter("http://x").max_retries
+        response = mock.Mock(headers={"Retry-After": "86400"})
+        with mock.patch.object(logic, "HTTP_RETRY_AFTER_MAX", 5):
+            self.assertEqual(retry.get_retry_after(response), 5)
+
+
+class StreamingFeedParserTests(TestCase):
+    ATOM_FEED = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <entry>
+    <title>Atom story</title>
+    <link rel="self" href="https://news.example.edu/self"/>
+    <link rel="alternate" href="https://news.example.edu/atom-story"/>
+    <summary> Short summary </summary>
+  </entry>
+</feed>
+"""
+
+    def test_rss_items(self):
+        entries = list(_iter_feed_entries([RSS_FEED]))
+        self.assertEqual([e[:2] for e in entries], [
+            ("Fellowship applications open", "https://news.example.edu/fellowship"),
+            ("Campus lecture series", "https://news.example.edu/lecture"),
+        ])
+
+    def test_atom_entries(self):
+        entries = list(_iter_feed_entries([self.ATOM_FEED]))
+        self.assertEqual(entries, [("Atom story", "https://news.example.edu/atom-story", "Short summary", ())])
+
+    def test_recovers_from_unescaped_entities(self):
+        feed = (b"<rss><channel><item><title>Q&A with the dean &nbsp;</title>"
+                b"<guid>https://news.example.edu/qa</guid></item></channel></rss>")
+        [(title, link, _, _)] = list(_iter_feed_entries([feed]))
+        self.assertIn("with the dean", title)
+        self.assertEqual(link, "https://news.example.edu/qa")
+
+    def test_entries_are_yielded_before_the_download_finishes(self):
+        head, tail = RSS_FEED.split(b"<item>\n      <title>Campus")
+        consumed = []
+
+        def chunks():
+            for chunk in (head, b"<item>\n      <title>Campus" + tail):
+                consumed.append(chunk)
+                yield chunk
+
+        entries = _iter_feed_entries(chunks())
+        self.assertEqual(next(entries)[0], "Fellowship applications open")
+        self.assertEqual(len(consumed), 1)
+
+    def test_large_feed_is_saved_in_batches(self):
+        items = b"".join(
+            b"<item><title>Story %d</title><link>https://news.example.edu/%d</link></item>" % (i, i)
+            for i in range(120)
+        )
+        body = b"<rss><channel>" + items + b"</channel></rss>"
+        with FeedServer(body=body) as server, \
+                mock.patch.object(logic, "_save_items", wraps=_save_items) as save:
+            n = _scrape_rss(server.url, "Harvard")
+        self.assertEqual(n, 120)
+        self.assertEqual([len(c.args[0]) for c in save.call_args_list], [50, 50, 20])
+
+    def test_unparseable_body_is_not_cached(self):
+        with FeedServer(body=b"") as server:
+            n = _scrape_rss(server.url, "Harvard")
+        self.assertEqual(n, 0)
+        self.assertFalse(FeedValidator.objects.exists())
+
+
+class HtmlToTextTests(SimpleTestCase):
+    def assertMatchesBs4(self, html, limit=500):
+        expected = BeautifulSoup(html, "html.parser").get_text(" ", strip=True)[:limit]
+        self.assertEqual(html_to_text(html, limit), expected)
+
+    def test_matches_bs4_on_feed_fixtures(self):
+        for path in sorted(FEED_FIXTURES.glob("*.xml")):
+            for _, _, _, html_parts in _iter_feed_entries([path.read_bytes()]):
+                for part in html_parts:
+                    self.assertMatchesBs4(part or "")
+
+    def test_matches_bs4_quirks(self):
+        for html in [
+            "<p>a<script>var x = 1;</script>b</p><style>p{}</style>",
+            "<template><b>hidden</b></template><ruby>K<rt>kan</rt></ruby>",
+            "a &foo; b &copy c &nbsp; &#147;quoted&#148; &#1114112;",
+            "x<!-- comment -->y<![CDATA[cdata]]><?pi ?>z<!DOCTYPE html>",
+            "<p>unclosed <i>italic</p> tail</i> a<p",
+        ]:
+            self.assertMatchesBs4(html)
+
+    def test_stops_at_limit(self):
+        html = "<p>" + "word " * 10000 + "</p><p>never reached</p>"
+        self.assertMatchesBs4(html, 20)
+        self.assertEqual(html_to_text("", 500), "")
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()  # no page rendered for another test's rows
+        _save_items([
+            ("Postdoctoral fellowship in neuroscience", "https://news.example.edu/postdoc", "Apply by May."),
+            ("Campus news roundup", "https://news.example.edu/roundup", "Includes a fellowship announcement."),
+            ("Library hours change", "https://news.example.edu/library", "Open late during finals."),
+        ], "Harvard")
+
+    def _titles(self, query, qs=None):
+        return [o.title for o in search_opportunities(qs or Opportunity.objects.all(), query)]
+
+    def test_matches_title_and_description_ranked(self):
+        self.assertEqual(self._titles("fellowship"), [
+            "Postdoctoral fellowship in neuroscience",
+            "Campus news roundup",
+        ])
+
+    def test_prefix_and_multiword_queries(self):
+        self.assertEqual(self._titles("fellow neuro"), ["Postdoctoral fellowship in neuroscience"])
+        self.assertEqual(self._titles("finals"), ["Library hours change"])
+
+    def test_fts_syntax_is_not_interpreted(self):
+        self.assertEqual(self._titles('"*) OR ('), [])
+        self.assertEqual(self._titles("(library: * &"), ["Library hours change"])
+
+    def test_index_tracks_updates_and_deletes(self):
+        Opportunity.objects.filter(url="https://news.example.edu/library").update(title="Archive hours change")
+        self.assertEqual(self._titles("archive"), ["Archive hours change"])
+        Opportunity.objects.filter(url="https://news.example.edu/library").delete()
+        self.assertEqual(self._titles("archive"), [])
+
+    def test_dashboard_uses_search(self):
+        response = self.client.get("/", {"q": "finals"})
+        self.assertEqual([o.title for o in response.context["opportunities"]], ["Library hours change"])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()  # no page rendered for another test's rows
+        _save_items(
+            [(f"Harvard story {i}", f"https://news.harvard.edu/{i}", "") for i in range(5)], "Harvard",
+        )
+        _save_items(
+            [(f"MIT story {i}", f"https://news.mit.edu/{i}", "") for i in range(3)], "MIT",
+        )
+        # Equal timestamps exercise the id tie-breaker
+        Opportunity.objects.filter(university="Harvard").update(created_at=timezone.now())
+
+    def _walk(self, params):
+        ids, cursor = [], None
+        while True:
+            response = self.client.get("/api/opportunities/", {**params, **({"cursor": cursor} if cursor else {})})
+            data = response.json()
+            ids += [row["id"] for row in data["results"]]
+            cursor = data["next_cursor"]
+            if not cursor:
+                return ids
+
+    def test_pages_cover_every_row_once_in_order(self):
+        with mock.patch("scraper.views.keyset_page", partial(keyset_page, limit=2)):
+            ids = self._walk({})
+            harvard = self._walk({"university": "Harvard"})
+        expected = list(Opportunity.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(harvard), 5)
+
+    def test_dashboard_links_to_next_page(self):
+        with mock.patch("scraper.views.keyset_page", partial(keyset_page, limit=3)):
+            first = self.client.get("/", {"university": "Harvard"})
+            self.assertIn("cursor=", first.context["next_query"])
+            second = self.client.get("/?" + first.context["next_query"])
+        titles = {o.title for o in first.context["opportunities"]} | {o.title for o in second.context["opportunities"]}
+        self.assertEqual(len(titles), 5)
+        self.assertIsNone(second.context["next_query"])
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(self.client.get("/api/opportunities/", {"cursor": "garbage!"}).status_code, 400)
+        self.assertEqual(self.client.get("/", {"cursor": "Zm9v"}).status_code, 400)
+
+    LISTING_INDEXES = ("opp_created_idx", "opp_uni_created_idx", "opp_type_created_idx", "opp_uni_type_created_idx")
+
+    def assertUsesIndex(self, qs, index):
+        if connection.vendor == "postgresql":
+            # Tiny test tables make scan-and-sort look cheap, so disable the
+            # alternatives: a Sort node then only appears if no index can
+            # serve the ORDER BY.  Without real statistics the planner may
+            # pick any listing index that does.
+            with connection.cursor() as cursor:
+                for knob in ("enable_seqscan", "enable_bitmapscan", "enable_sort"):
+                    cursor.execute(f"SET LOCAL {knob} = off")
+            plan = qs.explain()
+            self.assertTrue(any(name in plan for name in self.LISTING_INDEXES), plan)
+            self.assertNotIn("Sort", plan)
+        else:
+            plan = qs.explain()
+            self.assertIn(index, plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_listing_queries_use_the_composite_indexes(self):
+        _, cursor = keyset_page(Opportunity.objects.all(), limit=2)
+        created_at, pk = decode_cursor(cursor)
+        # The querysets the dashboard and API actually page through
+        cases = {
+            "opp_created_idx": {},
+            "opp_uni_created_idx": {"university": "Harvard"},
+            "opp_type_created_idx": {"source_type": "news_event"},
+            "opp_uni_type_created_idx": {"university": "MIT", "source_type": "news_event"},
+        }
+        for index, params in cases.items():
+            qs = views._filter_opportunities(RequestFactory().get("/", params))[0]
+            first = qs.order_by("-created_at", "-id")
+            deep = first.filter(created_at__lte=created_at).filter(Q(created_at__lt=created_at) | Q(id__lt=pk))
+            with self.subTest(index=index):
+                self.assertUsesIndex(first[:80], index)
+                self.assertUsesIndex(deep[:80], index)
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _save_items([(f"Story {i}", f"https://news.harvard.edu/{i}", "") for i in range(3)], "Harvard")
+        _save_items([("Fellowship", "https://news.mit.edu/f", "")], "MIT", "fellowship")
+
+    def test_stats_are_served_from_cache(self):
+        with self.assertNumQueries(2):
+            stats = get_stats()
+        self.assertEqual(stats["total"], 4)
+        self.assertEqual(stats["by_university"][0], {"university": "Harvard", "count": 3})
+        self.assertIn({"source_type": "fellowship", "count": 1}, stats["by_source_type"])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_stats(), stats)
+
+    def test_scrape_with_new_rows_refreshes_stats(self):
+        get_stats()
+
+        def new_rows(url, university, source_type="news_event", timeout=25):
+            return _save_items([("New", f"https://news.yale.edu/{url}", "")], university)
+
+        sources = {"Yale": [{"url": "https://news.yale.edu/feed", "type": "rss"}]}
+        with use_sources(sources), \
+                mock.patch.object(logic, "_scrape_rss", side_effect=new_rows):
+            IvyScraper().scrape_one("Yale")
+        with self.assertNumQueries(0):
+            self.assertEqual(get_stats()["total"], 5)
+
+    def test_dashboard_does_not_count_rows_per_hit(self):
+        self.client.get("/")
+        with CaptureQueriesContext(connection) as queries:
+            # Another filter, so the page is rendered rather than served from the page cache
+            response = self.client.get("/", {"university": "Harvard"})
+        self.assertEqual(response.context["total_count"], 4)
+        self.assertFalse(any("COUNT" in q["sql"].upper() for q in queries.captured_queries))
+
+
+class AsyncScrapeTriggerTests(TestCase):
+    SOURCES = {
+        "Harvard": [{"url": "https://news.harvard.edu/gazette/feed", "type": "rss"}],
+        "MIT": [{"url": "https://news.mit.edu/rss/feed", "type": "rss"}],
+    }
+
+    def setUp(self):
+        cache.clear()
+        for patcher in (
+            use_sources(self.SOURCES),
+            mock.patch.object(logic, "SCRAPE_MAX_WORKERS", 1),
+            mock.patch.object(ratelimit, "HOST_RATE", 0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _eager(self):
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, "task_always_eager", False)
+
+    def test_trigger_returns_job_and_status_reports_progress(self):
+        self._eager()
+        with mock.patch.object(logic, "_scrape_rss", side_effect=[3, 0]):
+            response = self.client.post("/scrape/")
+        self.assertEqual(response.status_code, 202)
+        data = response.json()
+        status = self.client.get(data["status_url"]).json()["job"]
+        self.assertEqual(status["id"], data["job_id"])
+        self.assertEqual(status["state"], "done")
+        self.assertEqual(status["progress"], {
+            "Harvard": {"status": "done", "new": 3},
+            "MIT": {"status": "done", "new": 0},
+        })
+        self.assertEqual(status["completed"], 2)
+        self.assertEqual(status["new"], 3)
+        self.assertIn("Harvard: 3", status["message"])
+
+    def test_single_university_job(self):
+        self._eager()
+        with mock.patch.object(logic, "_scrape_rss", return_value=2):
+            data = self.client.post("/scrape/", {"university": "MIT"}).json()
+        job = self.client.get(data["status_url"]).json()["job"]
+        self.assertEqual(job["universities"], ["MIT"])
+        self.assertEqual(job["message"], "✓ 2 new items from MIT")
+
+    def test_concurrent_triggers_share_one_job(self):
+        with mock.patch.object(tasks.run_ivy_scrape, "apply_async") as enqueue:
+            first = self.client.post("/scrape/").json()
+            second = self.client.post("/scrape/").json()
+        self.assertEqual(first["job_id"], second["job_id"])
+        enqueue.assert_called_once_with(args=[first["job_id"]], task_id=first["job_id"])
+        job = self.client.get(first["status_url"]).json()["job"]
+        self.assertEqual(job["state"], "queued")
+
+    def test_finished_job_allows_a_new_one(self):
+        self._eager()
+        with mock.patch.object(logic, "_scrape_rss", return_value=0):
+            first = self.client.post("/scrape/").json()
+            second = self.client.post("/scrape/").json()
+        self.assertNotEqual(first["job_id"], second["job_id"])
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get("/scrape/status/nope/").status_code, 404)
+
+
+class FakeRoute:
+    def __init__(self, resource_type):
+        self.request = mock.Mock(resource_type=resource_type)
+        self.outcome = None
+
+    async def abort(self):
+        self.outcome = "aborted"
+
+    async def continue_(self):
+        self.outcome = "continued"
+
+
+class FakePage:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def goto(self, url, **kwargs):
+        self.url = url
+        if self.browser.gate is not None:
+            await self.browser.gate.wait()
+
+    async def wait_for_selector(self, selector, **kwargs):
+        self.browser.selectors.append(selector)
+
+    async def content(self):
+        return f"<ul><li><a href='{self.url}/1'>Rendered by {self.browser.name}</a></li></ul>"
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.handler = None
+
+    async def add_init_script(self, script):
+        pass
+
+    async def route(self, pattern, handler):
+        self.handler = handler
+
+    async def new_page(self):
+        return FakePage(self.browser)
+
+    async def close(self):
+        self.browser.open_contexts -= 1
+
+
+class FakeBrowser:
+    def __init__(self, name, gate=None):
+        self.name = name
+        self.gate = gate
+        self.closed = False
+        self.connected = True
+        self.open_contexts = 0
+        self.max_open = 0
+        self.contexts = []
+        self.selectors = []
+
+    async def new_context(self, **kwargs):
+        self.open_contexts += 1
+        self.max_open = max(self.max_open, self.open_contexts)
+        ctx = FakeContext(self)
+        self.contexts.append(ctx)
+        return ctx
+
+    def is_connected(self):
+        return self.connected and not self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowserPool(BrowserPool):
+    """BrowserPool launching FakeBrowsers instead of Chromium."""
+
+    def __init__(self, gate=None, **kwargs):
+        super().__init__(**kwargs)
+        self.gate = gate
+        self.launched = []
+
+    async def _launch(self):
+        browser = FakeBrowser(f"browser-{len(self.launched)}", self.gate)
+        self.launched.append(browser)
+        return browser
+
+
+class BrowserPoolTests(SimpleTestCase):
+    def make_pool(self, **kwargs):
+        pool = FakeBrowserPool(**kwargs)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_renders_reuse_one_browser(self):
+        pool = self.make_pool(max_pages=2, recycle_pages=10, max_age=3600)
+        html = pool.render("https://example.edu/news", "li")
+        pool.render("https://example.edu/events", "li")
+        self.assertIn("Rendered by browser-0", html)
+        self.assertEqual(len(pool.launched), 1)
+        browser = pool.launched[0]
+        self.assertEqual(browser.selectors, ["li", "li"])
+        self.assertEqual(len(browser.contexts), 2)
+        self.assertEqual(browser.open_contexts, 0)
+
+    def test_heavy_resources_are_blocked(self):
+        pool = self.make_pool()
+        pool.render("https://example.edu/news", "li")
+        handler = pool.launched[0].contexts[0].handler
+        for resource_type, outcome in [
+            ("image", "aborted"), ("font", "aborted"), ("media", "aborted"),
+            ("document", "continued"), ("script", "continued"),
+        ]:
+            route = FakeRoute(resource_type)
+            pool._call(handler(route))
+            self.assertEqual(route.outcome, outcome, resource_type)
+
+    def test_browser_recycled_after_page_budget(self):
+        pool = self.make_pool(recycle_pages=2, max_age=3600)
+        for i in range(5):
+            pool.render(f"https://example.edu/{i}", "li")
+        self.assertEqual(len(pool.launched), 3)
+        self.assertEqual([b.closed for b in pool.launched], [True, True, False])
+
+    def test_browser_recycled_after_max_age(self):
+        pool = self.make_pool(recycle_pages=100, max_age=0)
+        pool.render("https://example.edu/a", "li")
+        pool.render("https://example.edu/b", "li")
+        self.assertEqual(len(pool.launched), 2)
+        self.assertTrue(pool.launched[0].closed)
+
+    def test_disconnected_browser_is_relaunched(self):
+        pool = self.make_pool(recycle_pages=100, max_age=3600)
+        pool.render("https://example.edu/a", "li")
+        pool.launched[0].connected = False  # Chromium crashed
+        with self.assertLogs("scraper.browser", "WARNING"):
+            html = pool.render("https://example.edu/b", "li")
+        self.assertIn("Rendered by browser-1", html)
+        self.assertEqual(len(pool.launched), 2)
+        self.assertTrue(pool.launched[0].closed)
+        pool.render("https://example.edu/c", "li")
+        self.assertEqual(len(pool.launched), 2)
+
+    def make_gate(self, pool):
+        # asyncio.Event must be created on the pool's loop
+        async def make():
+            return asyncio.Event()
+        return pool._call(make())
+
+    def test_concurrent_renders_share_browser_up_to_max_pages(self):
+        pool = self.make_pool(max_pages=3, recycle_pages=100, max_age=3600)
+        gate = pool.gate = self.make_gate(pool)
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            futures = [executor.submit(pool.render, f"https://example.edu/{i}", "li") for i in range(6)]
+            deadline = time.monotonic() + 5
+            while not pool.launched or pool.launched[0].open_contexts < 3:
+                self.assertLess(time.monotonic(), deadline, "renders never started")
+                time.sleep(0.01)
+            pool._loop.call_soon_threadsafe(gate.set)
+            results = [f.result(timeout=5) for f in futures]
+        self.assertEqual(len(results), 6)
+        self.assertEqual(len(pool.launched), 1)
+        self.assertEqual(pool.launched[0].max_open, 3)
+
+    def test_retired_browser_closed_only_when_idle(self):
+        pool = self.make_pool(max_pages=2, recycle_pages=1, max_age=3600)
+        gate = pool.gate = self.make_gate(pool)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            slow = executor.submit(pool.render, "https://example.edu/slow", "li")
+            deadline = time.monotonic() + 5
+            while not pool.launched or pool.launched[0].open_contexts < 1:
+                self.assertLess(time.monotonic(), deadline, "render never started")
+                time.sleep(0.01)
+            first = pool.launched[0]
+            pool.gate = None  # only the first browser's page blocks
+            pool.render("https://example.edu/fast", "li")
+            # The recycled browser still has a page open, so it stays up
+            self.assertEqual(len(pool.launched), 2)
+            self.assertFalse(first.closed)
+            pool._loop.call_soon_threadsafe(gate.set)
+            slow.result(timeout=5)
+        self.assertTrue(first.closed)
+
+    def test_playwright_strategy_uses_pool(self):
+        pool = self.make_pool()
+        with mock.patch("scraper.browser.get_browser_pool", return_value=pool), \
+                mock.patch.object(ratelimit, "HOST_RATE", 0), \
+                mock.patch.object(logic, "_save_items", return_value=1) as save:
+            n = logic._scrape_with_playwright("https://example.edu/news", "li", "a", "Harvard")
+        self.assertEqual(n, 1)
+        items = save.call_args.args[0]
+        self.assertEqual(items, [("Rendered by browser-0", "https://example.edu/news/1", "")])
+
+
+class SourceFanOutTests(SimpleTestCase):
+    """Scrape jobs run end to end on a real worker over the in-memory broker."""
+
+    SOURCES = {
+        "Harvard": [
+            {"url": "https://news.harvard.edu/gazette/feed", "type": "rss"},
+            {"url": "https://www.harvard.edu/events", "type": "html",
+             "list_selector": "li", "title_selector": "a"},
+        ],
+        "MIT": [{"url": "https://news.mit.edu/rss/feed", "type": "rss"}],
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from celery.contrib.testing.worker import start_worker
+
+        # Settings come from Django under the CELERY_ namespace.  Cleanups run
+        # last-in first-out: the Redis URLs are restored before the pools
+        # and backend built from the memory ones are dropped.
+        conf = celery_app.conf
+        memory = {"CELERY_BROKER_URL": "memory://", "CELERY_RESULT_BACKEND": "cache+memory://"}
+        cls.addClassCleanup(cls._reset_celery_connections)
+        cls.addClassCleanup(conf.update, {k: conf[k] for k in memory})
+        conf.update(memory)
+        # Earlier (eager) tests already built a producer pool from Redis
+        cls._reset_celery_connections()
+        # The per-worker rate limit would space the test tasks seconds apart
+        rate_limit = tasks.scrape_source.rate_limit
+        tasks.scrape_source.rate_limit = None
+        cls.addClassCleanup(setattr, tasks.scrape_source, "rate_limit", rate_limit)
+        worker = start_worker(
+            celery_app, pool="threads", concurrency=4, perform_ping_check=False,
+            queues=["celery", tasks.SCRAPE_QUEUE, tasks.SCRAPE_BROWSER_QUEUE],
+        )
+        worker.__enter__()
+        cls.addClassCleanup(worker.__exit__, None, None, None)
+
+    @staticmethod
+    def _reset_celery_connections():
+        celery_app.close()
+        vars(celery_app).pop("amqp", None)  # cached_property holding the producer pool
+        celery_app._backend_cache = None
+        vars(celery_app._local).pop("backend", None)
+
+    def setUp(self):
+        cache.clear()
+        for patcher in (
+            use_sources(self.SOURCES),
+            mock.patch.object(ratelimit, "HOST_RATE", 0),
+            mock.patch.object(tasks, "refresh_stats"),
+            mock.patch.object(tasks, "without_open_circuits", side_effect=lambda sources: sources),
+            mock.patch.object(metrics, "record_run"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def wait_for_job(self, job_id, timeout=15):
+        deadline = time.monotonic() + timeout
+        while True:
+            job = get_job(job_id)
+            if job["state"] in FINISHED_STATES:
+                return job
+            self.assertLess(time.monotonic(), deadline, f"job stuck in {job['state']}")
+            time.sleep(0.05)
+
+    def test_one_task_per_source_aggregated_by_chord(self):
+        calls = []
+
+        def fake_source(self_, university, src):
+            calls.append((university, src.url, threading.current_thread().name))
+            return {"Harvard": 2, "MIT": 5}[university]
+
+        job_id, _ = start_job(list(self.SOURCES))
+        with mock.patch.object(IvyScraper, "scrape_source", autospec=True, side_effect=fake_source):
+            tasks.run_ivy_scrape.apply_async(args=[job_id], task_id=job_id)
+            job = self.wait_for_job(job_id)
+
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(job["state"], "done")
+        self.assertEqual(job["message"], "✓ 9 new items — Harvard: 4, MIT: 5")
+        self.assertEqual(job["progress"], {
+            "Harvard": {"status": "done", "new": 4},
+            "MIT": {"status": "done", "new": 5},
+        })
+        tasks.refresh_stats.assert_called_once_with()
+
+    def test_slow_source_does_not_serialise_the_job(self):
+        spans = []
+
+        def slow_source(self_, university, src):
+            started = time.monotonic()
+            time.sleep(0.5)
+            spans.append((started, time.monotonic()))
+            return 1
+
+        job_id, _ = start_job(list(self.SOURCES))
+        with mock.patch.object(IvyScraper, "scrape_source", autospec=True, side_effect=slow_source):
+            tasks.run_ivy_scrape.delay(job_id)
+            job = self.wait_for_job(job_id)
+        # Three half-second sources on a four-thread worker run side by side
+        self.assertEqual(len(spans), 3)
+        self.assertLess(max(s for s, _ in spans), min(e for _, e in spans))
+        self.assertEqual(job["new"], 3)
+
+    def test_dead_source_task_fails_the_job(self):
+        job_id, _ = start_job(["MIT"], scope="MIT")
+        with mock.patch.object(IvyScraper, "scrape_source", side_effect=RuntimeError("worker lost")):
+            tasks.run_scrape_university.delay("MIT", job_id)
+            job = self.wait_for_job(job_id)
+        self.assertEqual(job["state"], "error")
+        self.assertIn("worker lost", job["message"])
+
+    def test_sources_are_routed_by_type(self):
+        sigs = [
+            tasks._source_signature(uni, i, src, None)
+            for uni, srcs in as_sources(self.SOURCES).items() for i, src in enumerate(srcs)
+        ]
+        self.assertEqual(
+            [s.options["queue"] for s in sigs],
+            [tasks.SCRAPE_QUEUE, tasks.SCRAPE_BROWSER_QUEUE, tasks.SCRAPE_QUEUE],
+        )
+        self.assertEqual(sigs[1].options["time_limit"], tasks.BROWSER_TIME_LIMIT)
+
+
+class HostRateLimitTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        ratelimit._reset()
+        self.addCleanup(ratelimit._reset)
+        for patcher in (
+            mock.patch.object(ratelimit, "HOST_RATE", 10),
+            mock.patch.object(ratelimit, "HOST_BURST", 2),
+            mock.patch.object(ratelimit, "RATE_LIMIT_URL", ""),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_bucket_spends_its_burst_then_paces_the_host(self):
+        url = "https://news.mit.edu/rss/feed"
+        with mock.patch.object(ratelimit, "crawl_delay", return_value=0):
+            self.assertEqual(ratelimit.acquire(url), 0)
+            self.assertEqual(ratelimit.acquire("https://news.mit.edu/other"), 0)
+            self.assertEqual(ratelimit.acquire("https://news.yale.edu/news-rss"), 0)
+            self.assertGreater(ratelimit.delay(url), 0)
+            started = time.monotonic()
+            waited = ratelimit.acquire(url)
+        self.assertGreater(waited, 0.05)
+        self.assertGreaterEqual(time.monotonic() - started, waited)
+
+    def test_task_for_a_host_without_tokens_waits(self):
+        with mock.patch.object(ratelimit, "HOST_RATE", 0.1), \
+                mock.patch.object(ratelimit, "HOST_BURST", 1), \
+                mock.patch.object(ratelimit, "crawl_delay", return_value=0):
+            # Checking doesn't spend the token; the fetch does
+            self.assertEqual(tasks._host_wait("https://news.mit.edu/rss/feed"), 0)
+            self.assertEqual(tasks._host_wait("https://news.mit.edu/rss/feed"), 0)
+            ratelimit.acquire("https://news.mit.edu/rss/feed")
+            wait = tasks._host_wait("https://news.mit.edu/other")
+            self.assertEqual(tasks._host_wait("https://news.yale.edu/news-rss"), 0)
+        self.assertGreater(wait, 0)
+        self.assertLessEqual(wait, 10)
+
+    def test_robots_crawl_delay_slows_the_host_down(self):
+        with FeedServer() as server:
+            server.robots = "User-agent: *\nCrawl-delay: 4\nDisallow:\n"
+            self.assertEqual(ratelimit.bucket(server.url), (0.25, 1))
+            ratelimit._robots.clear()  # a new process reads the shared cache
+            self.assertEqual(ratelimit.bucket(server.url + "?page=2"), (0.25, 1))
+            self.assertEqual(server.robots_requests, 1)
+            # A delay looser than the configured rate changes nothing
+            server.robots = "User-agent: *\nCrawl-delay: 0.01\n"
+            cache.clear()
+            ratelimit._robots.clear()
+            self.assertEqual(ratelimit.bucket(server.url), (10, 2))
+
+    def test_missing_robots_file_means_no_delay(self):
+        with FeedServer() as server:
+            self.assertEqual(ratelimit.crawl_delay(server.url), 0)
+        self.assertEqual(server.requests, [])
+
+    def test_buckets_live_in_redis(self):
+        script = mock.Mock(return_value=b"1.5")
+        with mock.patch.object(ratelimit, "RATE_LIMIT_URL", "redis://redis:6379/0"), \
+                mock.patch.object(ratelimit, "_redis_script", return_value=script), \
+                mock.patch.object(ratelimit, "crawl_delay", return_value=0):
+            self.assertEqual(ratelimit.delay("https://news.mit.edu/rss/feed"), 1.5)
+        script.assert_called_once_with(keys=["scraper:bucket:news.mit.edu"], args=[10, 2, 0])
+
+    def test_unreachable_redis_falls_back_to_local_buckets(self):
+        script = mock.Mock(side_effect=ratelimit.redis.ConnectionError("refused"))
+        with mock.patch.object(ratelimit, "RATE_LIMIT_URL", "redis://redis:6379/0"), \
+                mock.patch.object(ratelimit, "_redis_script", return_value=script), \
+                mock.patch.object(ratelimit, "crawl_delay", return_value=0), \
+                self.assertLogs(ratelimit.logger, "WARNING"):
+            self.assertEqual(ratelimit.acquire("https://news.mit.edu/rss/feed"), 0)
+            self.assertEqual(ratelimit.acquire("https://news.mit.edu/rss/feed"), 0)
+            self.assertGreater(ratelimit.delay("https://news.mit.edu/rss/feed"), 0)
+        # Redis isn't asked again until the retry interval has passed
+        script.assert_called_once()
+
+    def test_scrapes_take_a_token_per_fetch(self):
+        with FeedServer() as server, \
+                mock.patch.object(ratelimit, "acquire", wraps=ratelimit.acquire) as acquire, \
+                mock.patch.object(logic, "_feed_request_headers", return_value=({}, None)), \
+                mock.patch.object(logic, "_save_items", return_value=0), \
+                mock.patch.object(logic, "_store_validators"):
+            _scrape_rss(server.url, "Harvard")
+        acquire.assert_called_once_with(server.url)
+
+
+class AdaptiveScheduleTests(TestCase):
+    URL = "https://news.mit.edu/rss/feed"
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def fetch(self, hours, new, ok=True):
+        self.now += timedelta(hours=hours)
+        return record_fetch(self.URL, new, ok, now=self.now)
+
+    def test_first_fetch_uses_default_interval(self):
+        state = self.fetch(0, 40)
+        self.assertEqual(state.interval, schedule.DEFAULT_INTERVAL)
+        self.assertEqual(state.item_rate, 0)
+        self.assertEqual(state.next_poll_at, self.now + timedelta(seconds=schedule.DEFAULT_INTERVAL))
+
+    def test_busy_feed_is_polled_faster(self):
+        self.fetch(0, 40)
+        state = self.fetch(1, 12)
+        self.assertLess(state.interval, schedule.DEFAULT_INTERVAL)
+        self.assertGreaterEqual(state.interval, schedule.MIN_INTERVAL)
+        self.assertEqual(state.last_new, 12)
+
+    def test_quiet_feed_backs_off_to_the_cap(self):
+        state = self.fetch(0, 40)
+        intervals = []
+        for _ in range(8):
+            state = self.fetch(state.interval / 3600, 0)
+            intervals.append(state.interval)
+        self.assertEqual(intervals[0], schedule.DEFAULT_INTERVAL * 2)
+        self.assertEqual(intervals[1], schedule.DEFAULT_INTERVAL * 4)
+        self.assertEqual(intervals[-1], schedule.MAX_INTERVAL)
+
+    def test_failures_back_off_without_losing_cadence(self):
+        self.fetch(0, 40)
+        delays = []
+        for _ in range(3):
+            state = self.fetch(0.1, 0, ok=False)
+            delays.append((state.next_poll_at - self.now).total_seconds())
+        self.assertEqual(delays, [schedule.MIN_INTERVAL * 2 ** i for i in (1, 2, 3)])
+        self.assertEqual(state.failures, 3)
+        self.assertEqual(state.interval, schedule.DEFAULT_INTERVAL)
+        state = self.fetch(0.1, 1)
+        self.assertEqual(state.failures, 0)
+
+    def test_claim_due_skips_sources_not_yet_due(self):
+        sources = as_sources({
+            "MIT": [{"url": self.URL, "type": "rss"}],
+            "Yale": [{"url": "https://news.yale.edu/news-rss", "type": "rss"}],
+        })
+        self.assertEqual(claim_due(sources, now=self.now), {uni: list(srcs) for uni, srcs in sources.items()})
+        # Claimed sources aren't handed out again while their fetch runs
+        self.assertEqual(claim_due(sources, now=self.now), {})
+        record_fetch(self.URL, 3, now=self.now)
+        later = self.now + timedelta(seconds=schedule.CLAIM_LEASE + 1)
+        self.assertEqual(claim_due(sources, now=later), {"Yale": list(sources["Yale"])})
+
+    def test_scrape_due_only_fetches_due_sources(self):
+        sources = {
+            "MIT": [{"url": self.URL, "type": "rss"}],
+            "Yale": [{"url": "https://news.yale.edu/news-rss", "type": "rss"}],
+        }
+
+        def feed(url, university, source_type="news_event", timeout=25):
+            if "yale" in url:
+                raise ValueError("boom")
+            return 4
+
+        with use_sources(sources), \
+                mock.patch.object(logic, "_scrape_rss", side_effect=feed) as scrape_rss, \
+                mock.patch.object(logic, "refresh_stats"):
+            self.assertEqual(IvyScraper().scrape_due(max_workers=1), {"MIT": 4, "Yale": 0})
+            self.assertEqual(IvyScraper().scrape_due(max_workers=1), {})
+        self.assertEqual(scrape_rss.call_count, 2)
+        states = {s.url: s for s in SourceState.objects.all()}
+        self.assertEqual(states[self.URL].last_new, 4)
+        self.assertEqual(states["https://news.yale.edu/news-rss"].failures, 1)
+
+    def test_beat_task_dispatches_due_sources(self):
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, "task_always_eager", False)
+        sources = {"MIT": [{"url": self.URL, "type": "rss"}]}
+        with use_sources(sources), \
+                mock.patch.object(ratelimit, "HOST_RATE", 0), \
+                mock.patch.object(logic, "_scrape_rss", return_value=2) as scrape_rss, \
+                mock.patch.object(tasks, "refresh_stats"):
+            self.assertEqual(tasks.run_due_scrapes.delay().get(), "Dispatched 1 sources")
+            self.assertEqual(tasks.run_due_scrapes.delay().get(), "No sources due")
+        scrape_rss.assert_called_once()
+        self.assertEqual(SourceState.objects.get().last_new, 2)
+
+
+class ScrapeBenchmarkTests(TestCase):
+    def test_every_source_has_recorded_payloads(self):
+        for university in registry.get_registry().universities:
+            with ReplayServer(university) as server:
+                self.assertEqual(set(server.payloads), {"/rss", "/atom", "/html"}, university)
+
+    def test_probe_attributes_stages_for_a_replayed_feed(self):
+        probe = Probe()
+        with ReplayServer("MIT") as server, probe.installed():
+            n = logic._scrape_rss(server.url("rss"), "MIT")
+        self.assertEqual(n, 40)
+        self.assertEqual(probe.items, 40)
+        for stage in ("fetch", "parse", "strip", "dedupe", "persist"):
+            self.assertGreater(probe.seconds[stage], 0, stage)
+        self.assertEqual(probe.queries["insert"], 2)  # the rows, then the validators
+
+    def test_replayed_html_page(self):
+        probe = Probe()
+        with ReplayServer("Yale") as server, probe.installed():
+            n = logic._scrape_with_requests(server.url("html"), LIST_SELECTOR, TITLE_SELECTOR, "Yale")
+        self.assertEqual(n, 40)
+        self.assertEqual(probe.items, 40)
+        self.assertGreater(probe.seconds["parse"], 0)
+        self.assertEqual(probe.seconds["strip"], 0)
+
+
+class ScrapeMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _scrape(self, server, label="Test feed"):
+        sources = {"Test": [{"url": server.url, "type": "rss", "label": label}]}
+        with mock.patch.object(logic, "refresh_stats"):
+            return IvyScraper().scrape_all(sources=as_sources(sources))
+
+    def test_run_records_stages_and_counters(self):
+        with FeedServer(etag=None, last_modified=None) as server:
+            self._scrape(server)
+            server.body = RSS_FEED.replace(b"</channel>", b"<item><title>New</title><link>https://news.example.edu/new</link></item></channel>")
+            self._scrape(server)
+
+        first, second = ScrapeRun.objects.order_by("id")
+        self.assertEqual((first.trigger, first.sources, first.new_items), ("scrape_all", 1, 2))
+        totals = first.metrics["totals"]
+        self.assertEqual(totals["counters"], {"bytes": len(RSS_FEED), "parsed": 2, "duplicates": 0, "inserted": 2})
+        for stage in ("request", "download", "parse", "strip", "dedupe", "persist"):
+            self.assertGreater(totals["stages"][stage], 0, stage)
+        self.assertEqual(first.source_runs.get().label, "Test feed")
+        self.assertEqual(second.metrics["totals"]["counters"]["duplicates"], 2)
+        self.assertEqual(second.new_items, 1)
+
+    def test_stage_time_is_exclusive(self):
+        with metrics.source_span("Test", "feed", "https://news.example.edu/feed") as sample:
+            with metrics.span("parse"):
+                with metrics.span("download"):
+                    time.sleep(0.05)
+        self.assertGreaterEqual(sample.stages["download"], 0.05)
+        self.assertLess(sample.stages["parse"], 0.01)
+        self.assertGreaterEqual(sample.seconds, sample.stages["download"])
+
+    def test_threads_report_into_the_run(self):
+        sources = {f"Uni{i}": [{"url": f"https://host{i}.example/feed", "type": "rss"}] for i in range(3)}
+        with mock.patch.object(logic, "_scrape_rss", return_value=0), \
+                mock.patch.object(logic.connection, "close"):
+            IvyScraper().scrape_all(max_workers=3, sources=as_sources(sources))
+        run = ScrapeRun.objects.get()
+        self.assertEqual(sorted(run.source_runs.values_list("university", flat=True)), ["Uni0", "Uni1", "Uni2"])
+
+    def test_celery_sources_are_folded_into_one_run(self):
+        sample = {
+            "university": "MIT", "source": "MIT News", "url": "https://news.mit.edu/rss/feed",
+            "started_at": timezone.now().isoformat(), "seconds": 0.2, "ok": True, "new": 3,
+            "status_code": 200, "error": "", "stages": {"request": 0.1}, "counters": {"inserted": 3},
+        }
+        failed = dict(
+            sample, source="MIT Events", url="https://news.mit.edu/events", ok=False, new=0,
+            status_code=503, error="HTTP 503", counters={},
+        )
+        with mock.patch.object(tasks, "refresh_stats"):
+            tasks.finish_scrape([["MIT", 3, [sample]], ["MIT", 0, [failed]]], ["MIT"], single=True)
+        run = ScrapeRun.objects.get()
+        self.assertEqual((run.trigger, run.sources, run.failures, run.new_items), ("celery", 2, 1, 3))
+
+    def test_metrics_endpoint_serves_prometheus_text(self):
+        with FeedServer() as server:
+            self._scrape(server, label='Feed "A"')
+        resp = self.client.get("/metrics")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], metrics.CONTENT_TYPE)
+        body = resp.content.decode()
+        self.assertIn("scraper_runs_total 1\n", body)
+        self.assertIn('scraper_items_inserted_total{university="Test",source="Feed \\"A\\""} 2\n', body)
+        self.assertIn('scraper_stage_duration_seconds_bucket{stage="parse",le="+Inf"} 1\n', body)
+        self.assertIn('scraper_source_duration_seconds_count{university="Test",source="Feed \\"A\\""} 1\n', body)
+
+
+    def test_totals_written_by_another_process_are_served(self):
+        sample = {
+            "university": "MIT", "source": "MIT News", "url": "https://news.mit.edu/rss/feed",
+            "started_at": timezone.now().isoformat(), "seconds": 0.2, "ok": True, "new": 3,
+            "status_code": 200, "error": "", "stages": {"request": 0.1}, "counters": {"inserted": 3},
+        }
+        # Any cache shared between processes will do in place of Redis
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location},
+        }):
+            worker = multiprocessing.get_context("fork").Process(target=metrics._merge_totals, args=([sample],))
+            worker.start()
+            worker.join(10)
+            self.assertEqual(worker.exitcode, 0)
+            body = self.client.get("/metrics").content.decode()
+        self.assertIn("scraper_runs_total 1\n", body)
+        self.assertIn('scraper_items_inserted_total{university="MIT",source="MIT News"} 3\n', body)
+
+    def test_failing_to_record_fetches_does_not_fail_the_scrape(self):
+        with FeedServer() as server, \
+                mock.patch.object(metrics, "record_fetches", side_effect=DatabaseError("metrics down")), \
+                self.assertLogs("scraper.metrics", "ERROR"):
+            results = self._scrape(server)
+        self.assertEqual(results, {"Test": 2})
+        self.assertEqual(Opportunity.objects.count(), 2)
+        self.assertFalse(ScrapeRun.objects.exists())
+
+
+class SourceHealthTests(TestCase):
+    URL = "https://news.mit.edu/rss/feed"
+    SOURCES = {"MIT": [{"url": URL, "type": "rss", "label": "MIT News"}]}
+
+    def setUp(self):
+        cache.clear()
+        for patcher in (
+            use_sources(self.SOURCES),
+            mock.patch.object(logic, "refresh_stats"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _http_error(self, status):
+        response = requests.Response()
+        response.status_code = status
+        return requests.HTTPError(response=response)
+
+    def test_run_outcomes_are_stored_per_source(self):
+        with mock.patch.object(logic, "_scrape_rss", side_effect=self._http_error(503)):
+            IvyScraper().scrape_one("MIT")
+        source_run = SourceRun.objects.get()
+        self.assertEqual((source_run.ok, source_run.status_code, source_run.error), (False, 503, "HTTP 503"))
+        state = SourceState.objects.get()
+        self.assertEqual((state.failures, state.last_status_code, state.last_error), (1, 503, "HTTP 503"))
+        self.assertIsNotNone(state.last_latency)
+
+    def test_run_history_is_written_in_bulk(self):
+        sources = {
+            f"Uni{i}": [{"url": f"https://host{i}.example/feed", "type": "rss"}] for i in range(5)
+        }
+        with mock.patch.object(logic, "_scrape_rss", return_value=1), \
+                CaptureQueriesContext(connection) as ctx:
+            IvyScraper().scrape_all(max_workers=1, sources=as_sources(sources))
+        self.assertEqual(SourceRun.objects.count(), 5)
+        self.assertEqual(SourceState.objects.count(), 5)
+        writes = [q["sql"] for q in ctx.captured_queries if not q["sql"].lstrip().upper().startswith("SELECT")]
+        # Breaker check and state lock are reads; one insert each for the
+        # states, the run and its source runs, plus transaction statements.
+        self.assertLessEqual(len([w for w in writes if w.lstrip().upper().startswith("INSERT")]), 3)
+
+    def test_html_source_failing_both_strategies_is_a_failure(self):
+        sources = {"MIT": [{"url": "https://news.mit.edu/events", "type": "html", "label": "MIT Events",
+                            "list_selector": "li", "title_selector": "a"}]}
+        with use_sources(sources), \
+                mock.patch.object(logic, "_scrape_with_requests", side_effect=self._http_error(503)), \
+                mock.patch.object(logic, "_scrape_with_playwright", side_effect=RuntimeError("no browser")):
+            self.assertEqual(IvyScraper().scrape_one("MIT"), 0)
+        source_run = SourceRun.objects.get()
+        self.assertEqual((source_run.ok, source_run.status_code, source_run.error), (False, 503, "HTTP 503"))
+        self.assertEqual(SourceState.objects.get().failures, 1)
+
+    def test_unknown_university_is_reported(self):
+        with self.assertLogs("scraper.logic", "WARNING") as logs:
+            self.assertEqual(IvyScraper().scrape_one("Yael"), 0)
+        self.assertIn("No sources configured for 'Yael'", logs.output[0])
+
+    def test_breaker_opens_after_repeated_failures_and_skips_the_source(self):
+        failing = mock.patch.object(logic, "_scrape_rss", side_effect=requests.Timeout())
+        with failing as scrape_rss:
+            for _ in range(schedule.BREAKER_THRESHOLD):
+                IvyScraper().scrape_one("MIT")
+            self.assertEqual(scrape_rss.call_count, schedule.BREAKER_THRESHOLD)
+            state = SourceState.objects.get()
+            self.assertGreater(state.circuit_open_until, timezone.now())
+            self.assertEqual(state.last_error, "Timed out")
+
+            # Open circuit: neither scrape_all nor a dashboard job touches it
+            self.assertEqual(IvyScraper().scrape_all(), {"MIT": 0})
+            self.assertEqual(tasks._fan_out(["MIT"]), "✓ 0 new items — none")
+            self.assertEqual(scrape_rss.call_count, schedule.BREAKER_THRESHOLD)
+
+    def test_trial_fetch_after_cooldown_closes_the_circuit(self):
+        SourceState.objects.create(
+            url=self.URL, failures=schedule.BREAKER_THRESHOLD,
+            circuit_open_until=timezone.now() - timedelta(seconds=1),
+        )
+        with mock.patch.object(logic, "_scrape_rss", return_value=2):
+            self.assertEqual(IvyScraper().scrape_one("MIT"), 2)
+        state = SourceState.objects.get()
+        self.assertEqual((state.failures, state.circuit_open_until), (0, None))
+
+
+class KnownHashCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(dedupe, "_known", dedupe.KnownHashes(max_size=1000))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _items(self, n, prefix="Story"):
+        return [(f"{prefix} {i}", f"https://news.example.edu/{prefix.lower()}-{i}", "") for i in range(n)]
+
+    def test_known_feed_costs_no_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            _save_items(self._items(50), "Harvard")
+        with self.assertNumQueries(0):
+            self.assertEqual(_save_items(self._items(50), "Harvard"), 0)
+        # Only unknown items reach the database
+        with self.assertNumQueries(1):
+            self.assertEqual(_save_items([("Renamed", "https://news.example.edu/story-1", "")], "Harvard"), 0)
+
+    def test_warm_loads_stored_hashes(self):
+        _save_items(self._items(20), "Harvard")
+        self.assertEqual(len(dedupe._known), 0)  # not committed yet
+        with self.captureOnCommitCallbacks(execute=True):
+            dedupe.warm()
+        with self.assertNumQueries(0):
+            dedupe.warm()
+            self.assertEqual(_save_items(self._items(20), "Harvard"), 0)
+
+    def test_rolled_back_inserts_are_not_learnt(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    _save_items(self._items(5), "Harvard")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(len(dedupe._known), 0)
+        self.assertEqual(_save_items(self._items(5), "Harvard"), 5)
+
+    def test_deleted_rows_are_forgotten(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            _save_items(self._items(5), "Harvard")
+        Opportunity.objects.filter(title="Story 3").delete()
+        self.assertEqual(len(dedupe._known), 0)
+        self.assertEqual(_save_items(self._items(5), "Harvard"), 1)
+
+    def test_memory_is_bounded_and_recent_hashes_survive(self):
+        known = dedupe.KnownHashes(max_size=10)
+        hashes = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(100)]
+        known.add_many(hashes)
+        self.assertLessEqual(len(known), 10)
+        self.assertIn(hashes[-1], known)
+        self.assertNotIn(hashes[0], known)
+
+
+class SourceRegistryTests(TestCase):
+    def setUp(self):
+        self.path = Path(self.enterContext(tempfile.TemporaryDirectory())) / "sources.toml"
+        for patcher in (
+            mock.patch.object(registry, "SOURCES_FILE", self.path),
+            mock.patch.object(registry, "_registry", None),
+            mock.patch.object(registry, "_loaded_from", None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write(self, text, bump=0):
+        self.path.write_text(text)
+        if bump:
+            stat = self.path.stat()
+            os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump * 10**9))
+
+    def test_shipped_registry(self):
+        shipped = registry.load_registry(Path(registry.__file__).with_name("sources.toml"))
+        self.assertEqual(shipped.universities, ["Harvard", "MIT", "Yale", "Princeton", "Cornell", "Dartmouth"])
+        self.assertEqual(shipped.base_url("Harvard"), "https://news.harvard.edu")
+        mit = shipped.sources["MIT"][0]
+        self.assertEqual((mit.label, mit.type, mit.source_type, mit.timeout), ("MIT News", "rss", "news_event", 25))
+        self.assertIs(shipped.by_url[mit.url], mit)
+
+    def test_reloads_only_when_the_file_changes(self):
+        self.write('[universities.MIT]\nsources = [{ url = "https://news.mit.edu/rss/feed" }]\n')
+        first = registry.get_registry()
+        self.assertIs(registry.get_registry(), first)
+        self.write(
+            '[universities.Yale]\nbase_url = "https://news.yale.edu"\n'
+            '[[universities.Yale.sources]]\nlabel = "Yale events"\nurl = "https://news.yale.edu/events"\n'
+            'type = "html"\nlist_selector = "article.news-item"\ntitle_selector = "h3 a"\n',
+            bump=1,
+        )
+        second = registry.get_registry()
+        self.assertEqual(second.universities, ["Yale"])
+        source = second.sources["Yale"][0]
+        self.assertEqual(source.list_select.pattern, "article.news-item")
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            source.url = "https://example.com"
+
+    def test_broken_edit_keeps_the_previous_registry(self):
+        self.write('[universities.MIT]\nsources = [{ url = "https://news.mit.edu/rss/feed" }]\n')
+        good = registry.get_registry()
+        for broken in (
+            '[universities.MIT\n',
+            '[universities.MIT]\nsources = [{ url = "https://x.example", type = "html", list_selector = "li[" , title_selector = "a" }]\n',
+            '[universities.MIT]\nsources = [{ url = "https://x.example", colour = "red" }]\n',
+        ):
+            with self.subTest(broken=broken):
+                self.write(broken, bump=1)
+                with self.assertLogs("scraper.registry", "ERROR"):
+                    self.assertIs(registry.get_registry(), good)
+
+    def test_wrong_shape_keeps_the_previous_registry(self):
+        self.write('[universities.MIT]\nsources = [{ url = "https://news.mit.edu/rss/feed" }]\n')
+        good = registry.get_registry()
+        for broken in (
+            '[universities.MIT]\nsources = ["https://news.mit.edu/rss/feed"]\n',
+            '[universities]\nMIT = "https://news.mit.edu/rss/feed"\n',
+            'universities = ["MIT"]\n',
+            '[universities.MIT]\nsources = { url = "https://news.mit.edu/rss/feed" }\n',
+            '[universities.MIT]\nsources = [{ url = "https://x.example", timeout = "fast" }]\n',
+            '[universities.MIT]\nsources = [{ url = 42 }]\n',
+        ):
+            with self.subTest(broken=broken):
+                self.write(broken, bump=1)
+                with self.assertLogs("scraper.registry", "ERROR"):
+                    self.assertIs(registry.get_registry(), good)
+                # Logged once; later calls keep serving the previous registry quietly
+                with self.assertNoLogs("scraper.registry", "ERROR"):
+                    self.assertIs(registry.get_registry(), good)
+
+    def test_missing_file_keeps_the_previous_registry(self):
+        self.write('[universities.MIT]\nsources = [{ url = "https://news.mit.edu/rss/feed" }]\n')
+        good = registry.get_registry()
+        self.path.unlink()
+        with self.assertLogs("scraper.registry", "ERROR"):
+            self.assertIs(registry.get_registry(), good)
+        self.assertIs(registry.get_registry(), good)
+
+    def test_source_round_trips_for_celery(self):
+        source = as_sources({"Yale": [{
+            "url": "https://news.yale.edu/events", "type": "html",
+            "list_selector": "li", "title_selector": "a", "max_per_host": 1,
+        }]})["Yale"][0]
+        copy = registry.Source.from_dict(json.loads(json.dumps(source.as_dict())))
+        self.assertEqual(copy, source)
+        self.assertEqual(copy.title_select.pattern, "a")
+
+    def test_per_source_poll_bounds(self):
+        url = "https://news.mit.edu/rss/feed"
+        now = timezone.now()
+        with use_sources({"MIT": [{"url": url, "max_interval": 2 * 3600}]}):
+            state = record_fetch(url, 40, now=now)
+            for _ in range(4):
+                now += timedelta(seconds=state.interval)
+                state = record_fetch(url, 0, now=now)
+        self.assertEqual(state.interval, 2 * 3600)
+
+
+class ClassifierTests(TestCase):
+    def test_most_specific_category_wins(self):
+        cases = {
+            "Summer internships in molecular biology": ("internship", ["internship"]),
+            "Postdoctoral Research Fellow in Physics": ("research_position", ["research_position"]),
+            "Graduate fellowship applications open": ("fellowship", ["fellowship"]),
+            "Tenure-track professor of history": ("academic_position", ["academic_position"]),
+            "Co-op positions with local startups": ("internship", ["internship", "job"]),
+            "Hiring: research assistants for the Kavli lab": ("research_position", ["research_position", "job"]),
+        }
+        for title, expected in cases.items():
+            with self.subTest(title=title):
+                self.assertEqual(classify(title), expected)
+
+    def test_whole_words_only(self):
+        for title in ("International students welcome week", "Commencement awardees announced",
+                      "Jobseekers forum", "Campus lecture series"):
+            with self.subTest(title=title):
+                self.assertEqual(classify(title), ("news_event", []))
+
+    def test_generic_words_need_an_opportunity_cue(self):
+        cases = {
+            "MIT engineers develop a new battery": ("news_event", []),
+            "Harvard names new director of admissions": ("news_event", []),
+            "Professor wins Nobel award": ("news_event", []),
+            "Apply now: associate director of communications": ("job", ["job"]),
+            "Seeking an assistant professor of linguistics": ("academic_position", ["academic_position"]),
+            "New opportunities for faculty in data science": ("academic_position", ["academic_position"]),
+        }
+        for title, expected in cases.items():
+            with self.subTest(title=title):
+                self.assertEqual(classify(title), expected)
+        self.assertEqual(classify("Director of the Center for Ethics", "Application deadline: March 1."),
+                         ("job", ["job"]))
+
+    def test_feed_fixture_news_stays_news(self):
+        for path in sorted(FEED_FIXTURES.glob("*.xml")):
+            for title, _, desc, html_parts in _iter_feed_entries([path.read_bytes()]):
+                description = logic._entry_description(desc, html_parts)
+                with self.subTest(feed=path.name, title=title):
+                    self.assertEqual(classify(title, description), ("news_event", []))
+
+    def test_description_and_default(self):
+        self.assertEqual(classify("Lab news", "We are hiring a lab manager."),
+                         ("research_position", ["research_position", "job"]))
+        self.assertEqual(classify("Lab news", default="job"), ("job", []))
+
+    def test_ingestion_classifies_new_items(self):
+        n = _save_items([
+            ("Summer internship program", "https://news.example.edu/intern", ""),
+            ("Dean welcomes new class", "https://news.example.edu/dean", ""),
+        ], "Harvard")
+        self.assertEqual(n, 2)
+        rows = dict(Opportunity.objects.values_list("url", "source_type"))
+        self.assertEqual(rows, {
+            "https://news.example.edu/intern": "internship",
+            "https://news.example.edu/dean": "news_event",
+        })
+        self.assertEqual(Opportunity.objects.get(url__endswith="intern").categories, ["internship"])
+
+    def test_backfill_command_reclassifies_in_chunks(self):
+        titles = ["Research scientist opening", "Dean welcomes new class", "Fellowship deadlines",
+                  "Homecoming recap", "Lecturer in economics"]
+        Opportunity.objects.bulk_create(
+            Opportunity(title=t, url=f"https://news.example.edu/{i}", university="Yale",
+                        source_type="news_event", content_hash=f"{i:064x}")
+            for i, t in enumerate(titles)
+        )
+        out = StringIO()
+        with mock.patch("scraper.management.commands.classify_opportunities.refresh_stats") as refresh, \
+                CaptureQueriesContext(connection) as queries:
+            call_command("classify_opportunities", chunk_size=2, stdout=out)
+        refresh.assert_called_once_with()
+        self.assertIn("Reclassified 3 of 5", out.getvalue())
+        # Three chunks of reads plus a final empty one
+        self.assertEqual(sum(q["sql"].startswith("SELECT") for q in queries.captured_queries), 4)
+        self.assertEqual(
+            list(Opportunity.objects.order_by("pk").values_list("source_type", flat=True)),
+            ["research_position", "news_event", "fellowship", "news_event", "academic_position"],
+        )
+        self.assertEqual(Opportunity.objects.get(title__startswith="Research").categories,
+                         ["research_position", "job"])
+
+    def test_backfill_restores_the_sources_configured_type(self):
+        rows = [
+            # Misclassified earlier (e.g. by an older taxonomy): no keyword matches now
+            ("Professor wins award", "https://news.yale.edu/award", "Yale", "academic_position"),
+            # From a careers page configured as jobs
+            ("Dining services update", "https://careers.yale.edu/dining", "Yale", "news_event"),
+            ("Homecoming recap", "https://example.org/homecoming", "Unknown", "fellowship"),
+        ]
+        Opportunity.objects.bulk_create(
+            Opportunity(title=t, url=url, university=u, source_type=st, categories=[st], content_hash=f"{i:064x}")
+            for i, (t, url, u, st) in enumerate(rows)
+        )
+        with use_sources({"Yale": [
+            {"url": "https://news.yale.edu/news-rss"},
+            {"url": "https://careers.yale.edu/feed", "source_type": "job"},
+        ]}), mock.patch("scraper.management.commands.classify_opportunities.refresh_stats"):
+            call_command("classify_opportunities", stdout=StringIO())
+        self.assertEqual(
+            list(Opportunity.objects.order_by("pk").values_list("source_type", "categories")),
+            [("news_event", []), ("job", []), ("news_event", [])],
+        )
+
+
+STORY = (
+    "Scientists map the genome of the ancient coelacanth",
+    "A team of biologists sequenced the full genome of the coelacanth, a deep-water fish once "
+    "thought extinct, and found genes linked to the evolution of limbs in early land animals.",
+)
+
+
+class NearDuplicateTests(TestCase):
+    def test_canonical_url(self):
+        cases = {
+            "HTTPS://News.Yale.edu:443/story/1?utm_source=rss&b=2&a=1&fbclid=x": "https://news.yale.edu/story/1?a=1&b=2",
+            "https://news.yale.edu?utm_medium=email": "https://news.yale.edu/",
+            "https://news.yale.edu/events#spring-concert": "https://news.yale.edu/events#spring-concert",
+            "https://news.yale.edu/search?q=a%20b&ref=home": "https://news.yale.edu/search?q=a%20b",
+        }
+        for url, expected in cases.items():
+            with self.subTest(url=url):
+                self.assertEqual(similarity.canonical_url(url), expected)
+
+    def test_signature_distance(self):
+        title, description = STORY
+        original = similarity.simhash(description)
+        # The same words, cased and punctuated differently
+        reworded = similarity.simhash(description.replace(", a deep-water", " — a Deep Water").upper())
+        unrelated = similarity.simhash("New dining hall opens on the north side of campus")
+        self.assertLessEqual(similarity.distance(original, reworded), similarity.SIMHASH_DISTANCE)
+        self.assertGreater(similarity.distance(original, unrelated), similarity.SIMHASH_DISTANCE)
+        self.assertIsNone(similarity.simhash("The weekly update"))
+        fields = similarity.signature_fields(title, description)
+        self.assertEqual(fields["simhash"] & 0xFFFF, fields[similarity.BAND_FIELDS[0]])
+        self.assertTrue(all(0 <= fields[name] < 2 ** 16 for name in similarity.BAND_FIELDS))
+        # Without a description the title is signed
+        self.assertEqual(similarity.signature_fields(title), similarity.signature_fields(title, "Read more"))
+        self.assertIsNotNone(similarity.signature_fields(title)["simhash"])
+
+    def test_word_order_matters(self):
+        # Same vocabulary, different sentences: a bag of words can't tell these apart
+        a = similarity.simhash("students research campus health policy data science program faculty work")
+        b = similarity.simhash("work faculty program science data policy health campus research students")
+        self.assertGreater(similarity.distance(a, b), similarity.SIMHASH_DISTANCE)
+
+    def test_title_similarity(self):
+        self.assertEqual(similarity.title_similarity(STORY[0], STORY[0] + "!"), 1)
+        self.assertGreaterEqual(similarity.title_similarity(STORY[0], "Scientists map genome of ancient coelacanth fish"),
+                                similarity.TITLE_SIMILARITY)
+        self.assertLess(similarity.title_similarity(STORY[0], "Students uncover early modern print culture"),
+                        similarity.TITLE_SIMILARITY)
+        self.assertEqual(similarity.title_similarity("", STORY[0]), 0)
+
+    def test_tracking_parameters_are_exact_duplicates(self):
+        _save_items([(STORY[0], "https://news.harvard.edu/story?utm_source=rss", STORY[1])], "Harvard")
+        n = _save_items([(STORY[0], "https://news.harvard.edu/story?utm_source=twitter&fbclid=1", STORY[1])], "Harvard")
+        self.assertEqual(n, 0)
+        self.assertEqual(Opportunity.objects.get().url, "https://news.harvard.edu/story")
+
+    def test_near_duplicates_are_suppressed_across_universities(self):
+        _save_items([(STORY[0], "https://news.harvard.edu/coelacanth", STORY[1])], "Harvard")
+        with mock.patch.object(similarity, "NEAR_DUPLICATES", "suppress"), \
+                metrics.source_span("Yale", "Yale News", "https://news.yale.edu/feed") as sample, \
+                self.assertNumQueries(6):  # lookups + savepoint + INSERT + inserted check + release
+            n = _save_items([
+                ("Scientists map genome of ancient coelacanth fish", "https://news.yale.edu/coelacanth", STORY[1]),
+                ("New dining hall opens on the north side of campus", "https://news.yale.edu/dining", ""),
+            ], "Yale")
+        self.assertEqual(n, 1)
+        self.assertEqual(sample.counters["near_duplicates"], 1)
+        self.assertEqual(Opportunity.objects.filter(university="Yale").get().url, "https://news.yale.edu/dining")
+
+    def test_similar_body_with_a_different_title_is_kept(self):
+        _save_items([(STORY[0], "https://news.harvard.edu/coelacanth", STORY[1])], "Harvard")
+        with mock.patch.object(similarity, "NEAR_DUPLICATES", "suppress"):
+            n = _save_items([("Lab tours resume for prospective students", "https://news.yale.edu/tours", STORY[1])], "Yale")
+        self.assertEqual(n, 1)
+        self.assertIsNone(Opportunity.objects.get(university="Yale").duplicate_of)
+
+    def test_distinct_fixture_stories_survive(self):
+        # Every fixture item is its own story, though the generated bodies
+        # share one small vocabulary
+        with mock.patch.object(similarity, "NEAR_DUPLICATES", "suppress"):
+            for path in sorted(FEED_FIXTURES.glob("*.xml")):
+                with metrics.source_span(path.stem, path.stem, path.name) as sample:
+                    n = logic._save_entries(_iter_feed_entries([path.read_bytes()]), path.stem, "news_event")
+                self.assertEqual((n, sample.counters.get("near_duplicates", 0)), (40, 0), path.name)
+        self.assertEqual(Opportunity.objects.filter(duplicate_of__isnull=True).count(), 240)
+        titles = ("Faculty members chart the origins of language", "Students uncover early modern print culture")
+        self.assertEqual(Opportunity.objects.filter(university="cornell", title__in=titles).count(), 2)
+
+    def test_linked_near_duplicates_are_hidden_from_listings(self):
+        _save_items([(STORY[0], "https://news.harvard.edu/coelacanth", STORY[1])], "Harvard")
+        with mock.patch.object(similarity, "NEAR_DUPLICATES", "link"):
+            n = _save_items([(STORY[0] + "!", "https://news.yale.edu/coelacanth", STORY[1])], "Yale")
+        self.assertEqual(n, 1)
+        original = Opportunity.objects.get(university="Harvard")
+        self.assertEqual(Opportunity.objects.get(university="Yale").duplicate_of, original)
+        results = self.client.get("/api/opportunities/").json()["results"]
+        self.assertEqual([row["id"] for row in results], [original.pk])
+        self.assertEqual(compute_stats()["total"], 1)
+
+    def test_near_duplicates_within_a_batch_follow_the_mode(self):
+        items = [
+            (STORY[0], "https://news.yale.edu/coelacanth", STORY[1]),
+            ("Scientists map genome of ancient coelacanth fish", "https://news.yale.edu/coelacanth-2", STORY[1]),
+        ]
+        for mode, expected in (("link", 2), ("suppress", 1), ("off", 2)):
+            with self.subTest(mode=mode), mock.patch.object(similarity, "NEAR_DUPLICATES", mode), \
+                    metrics.source_span("Yale", "Yale News", "https://news.yale.edu/feed") as sample:
+                Opportunity.objects.all().delete()
+                self.assertEqual(_save_items(items, "Yale"), expected)
+                self.assertEqual(sample.counters.get("near_duplicates", 0), int(mode != "off"))
+                first, *rest = Opportunity.objects.order_by("pk")
+                self.assertEqual([obj.duplicate_of_id for obj in rest], [first.pk] if mode == "link" else [None] * len(rest))
+
+    def test_batch_command_links_existing_duplicates(self):
+        title, description = STORY
+        rows = [
+            (title, "https://news.harvard.edu/coelacanth", description),
+            ("New dining hall opens on the north side of campus", "https://news.yale.edu/dining", ""),
+            (title + " fish", "https://news.yale.edu/coelacanth", description),
+            (title, "https://news.harvard.edu/coelacanth?utm_source=rss", description),
+            ("Dining hall renovation", "https://news.yale.edu/dining?utm_campaign=fall", ""),
+        ]
+        # Stored before signatures and canonical URLs existed
+        Opportunity.objects.bulk_create(
+            Opportunity(title=t, url=url, description=d, university="Yale", source_type="news_event",
+                        content_hash=hashlib.sha256(url.encode()).hexdigest())
+            for t, url, d in rows
+        )
+        ids = list(Opportunity.objects.order_by("pk").values_list("pk", flat=True))
+        out = StringIO()
+        with mock.patch("scraper.management.commands.dedupe_opportunities.refresh_stats"):
+            call_command("dedupe_opportunities", chunk_size=2, stdout=out)
+        self.assertIn("Linked 3 near-duplicates", out.getvalue())
+        links = dict(Opportunity.objects.order_by("pk").values_list("pk", "duplicate_of"))
+        self.assertEqual(links, {ids[0]: None, ids[1]: None, ids[2]: ids[0], ids[3]: ids[0], ids[4]: ids[1]})
+        self.assertFalse(Opportunity.objects.filter(simhash__isnull=True, duplicate_of__isnull=True)
+                         .exclude(pk=ids[1]).exists())
+
+        Opportunity.objects.update(duplicate_of=None)
+        call_command("dedupe_opportunities", delete=True, stdout=StringIO())
+        self.assertEqual(list(Opportunity.objects.order_by("pk").values_list("pk", flat=True)), ids[:2])
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        _save_items([
+            ("Summer internship program", "https://news.harvard.edu/intern", "Apply by May."),
+            ("Dean welcomes new class", "https://news.harvard.edu/dean", ""),
+        ], "Harvard")
+        _save_items([("Postdoctoral fellow, robotics", "https://news.mit.edu/postdoc", "")], "MIT")
+
+    def _get(self, **params):
+        response = self.client.get("/api/opportunities/export/", params)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def _ndjson(self, **params):
+        response, body = self._get(**params)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        return [json.loads(line) for line in body.decode().splitlines()]
+
+    def test_ndjson_streams_rows_oldest_first(self):
+        rows = self._ndjson()
+        self.assertEqual([row["url"] for row in rows], list(
+            Opportunity.objects.order_by("created_at", "id").values_list("url", flat=True)
+        ))
+        intern = rows[[row["url"] for row in rows].index("https://news.harvard.edu/intern")]
+        self.assertEqual(intern["source_type"], "internship")
+        self.assertEqual(intern["categories"], ["internship"])
+        self.assertIn("cursor", intern)
+
+    def test_filters_match_the_dashboard(self):
+        self.assertEqual([r["university"] for r in self._ndjson(university="MIT")], ["MIT"])
+        self.assertEqual([r["url"] for r in self._ndjson(source_type="internship")], ["https://news.harvard.edu/intern"])
+        self.assertEqual([r["url"] for r in self._ndjson(q="dean")], ["https://news.harvard.edu/dean"])
+
+    def test_since_resumes_after_the_last_synced_row(self):
+        first = self._ndjson()
+        self.assertEqual(self._ndjson(since=first[-1]["cursor"]), [])
+        _save_items([("Lecturer in economics", "https://news.yale.edu/lecturer", "")], "Yale")
+        rows = self._ndjson(since=first[-1]["cursor"])
+        self.assertEqual([row["url"] for row in rows], ["https://news.yale.edu/lecturer"])
+        self.assertEqual(
+            [row["url"] for row in self._ndjson(since=first[0]["cursor"])],
+            [row["url"] for row in first[1:] + rows],
+        )
+
+    def test_csv(self):
+        response, body = self._get(format="csv", university="Harvard")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn('filename="opportunities.csv"', response["Content-Disposition"])
+        header, *rows = list(csv.reader(body.decode().splitlines()))
+        self.assertEqual(header[:3], ["id", "title", "description"])
+        self.assertEqual(header[-1], "cursor")
+        self.assertEqual({row[1] for row in rows}, {"Summer internship program", "Dean welcomes new class"})
+
+    def test_gzip_when_accepted(self):
+        response = self.client.get("/api/opportunities/export/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        body = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(len(body.decode().splitlines()), 3)
+
+    def test_rows_are_read_in_chunks(self):
+        with mock.patch.object(export, "EXPORT_CHUNK_SIZE", 1), \
+                mock.patch.object(QuerySet, "iterator", autospec=True, side_effect=QuerySet.iterator) as iterator:
+            rows = self._ndjson()
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(iterator.call_args.kwargs, {"chunk_size": 1})
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get("/api/opportunities/export/", {"format": "xml"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/opportunities/export/", {"since": "garbage!"}).status_code, 400)
+
+
+class DashboardPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _save_items([(f"Story {i}", f"https://news.harvard.edu/{i}", "") for i in range(3)], "Harvard")
+        get_stats()
+
+    def test_repeat_views_are_served_from_the_page_cache(self):
+        first = self.client.get("/", {"university": "Harvard"})
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("no-cache", first["Cache-Control"])
+        with self.assertNumQueries(0):
+            second = self.client.get("/", {"university": "Harvard"})
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+        # Another filter combination is rendered separately
+        self.assertNotEqual(self.client.get("/", {"university": "MIT"}).content, first.content)
+
+    def test_conditional_requests_get_304_until_data_changes(self):
+        with mock.patch.object(pagecache, "_now", return_value=pagecache.data_version() + 2_000_000):
+            first = self.client.get("/")
+            self.assertTrue(first.has_header("Last-Modified"))
+            with self.assertNumQueries(0):
+                unchanged = self.client.get("/", HTTP_IF_NONE_MATCH=first["ETag"])
+            self.assertEqual(unchanged.status_code, 304)
+            self.assertEqual(self.client.get("/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            _save_items([("Fellowship deadlines", "https://news.mit.edu/f", "")], "MIT")
+        changed = self.client.get("/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+        self.assertIn(b"Fellowship deadlines", changed.content)
+
+    def test_last_modified_waits_for_the_changed_second_to_end(self):
+        second = 1_791_000_000
+        cache.set(pagecache.DATA_VERSION_KEY, second * 1_000_000 + 200_000, None)
+        with mock.patch.object(pagecache, "_now", return_value=second * 1_000_000 + 500_000):
+            first = self.client.get("/")
+            self.assertTrue(first.has_header("ETag"))
+            self.assertFalse(first.has_header("Last-Modified"))
+            # A second write within the same second is still seen by a client
+            # revalidating with If-Modified-Since only
+            Opportunity.objects.first().delete()
+            since = "Sat, 03 Oct 2026 04:00:00 GMT"  # ``second`` as an HTTP date
+            self.assertEqual(self.client.get("/", HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+        with mock.patch.object(pagecache, "_now", return_value=(second + 1) * 1_000_000):
+            later = self.client.get("/")
+            self.assertEqual(later["Last-Modified"], since)
+            self.assertEqual(self.client.get("/", HTTP_IF_MODIFIED_SINCE=since).status_code, 304)
+
+    def test_admin_edits_invalidate_pages(self):
+        etag = self.client.get("/")["ETag"]
+        Opportunity.objects.first().delete()
+        response = self.client.get("/")
+        self.assertNotEqual(response["ETag"], etag)
+        # The stats shown next to the rows are recounted for the new version
+        self.assertEqual(response.context["total_count"], 2)
+
+    def test_stats_recomputation_keeps_pages_valid(self):
+        first = self.client.get("/")
+        refresh_stats()
+        cache.delete(STATS_CACHE_KEY)  # stats TTL expired
+        self.assertEqual(self.client.get("/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+        get_stats()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+            self.assertEqual(self.client.get("/").content, first.content)
+
+    def test_error_pages_are_not_cached(self):
+        with mock.patch.object(cache, "set", wraps=cache.set) as cache_set:
+            self.assertEqual(self.client.get("/", {"cursor": "Zm9v"}).status_code, 400)
+        self.assertFalse(any(call.args[0].startswith("scraper:page:") for call in cache_set.call_args_list))
+
+
+class AsyncScraperTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(async_scraper, "refresh_stats")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _sources(self, *urls, type="rss"):
+        return as_sources({f"Uni{i}": [{"url": url, "type": type, "label": f"Feed {i}"}] for i, url in enumerate(urls)})
+
+    async def test_feed_and_page_are_scraped_into_one_run(self):
+        with FeedServer() as feed, ReplayServer("Yale") as site:
+            sources = as_sources({
+                "Test": [{"url": feed.url, "type": "rss", "label": "Test feed"}],
+                "Yale": [{"url": site.url("html"), "type": "html", "label": "Yale News",
+                          "list_selector": LIST_SELECTOR, "title_selector": TITLE_SELECTOR}],
+            })
+            results = await AsyncIvyScraper().scrape_all(sources=sources)
+
+        self.assertEqual(results, {"Test": 2, "Yale": 40})
+        self.assertEqual(await Opportunity.objects.acount(), 42)
+        run = await ScrapeRun.objects.aget()
+        self.assertEqual((run.trigger, run.sources, run.failures, run.new_items), ("scrape_all_async", 2, 0, 42))
+        self.assertEqual(run.metrics["totals"]["counters"]["parsed"], 42)
+        validator = await FeedValidator.objects.aget(url=feed.url)
+        self.assertEqual(validator.etag, '"v1"')
+
+    async def test_not_modified_feed_is_skipped(self):
+        with FeedServer() as server:
+            await AsyncIvyScraper().scrape_all(sources=self._sources(server.url))
+            results = await AsyncIvyScraper().scrape_all(sources=self._sources(server.url))
+
+        self.assertEqual(results, {"Uni0": 0})
+        self.assertEqual(server.requests[-1]["If-None-Match"], '"v1"')
+        self.assertEqual(await Opportunity.objects.acount(), 2)
+
+    async def test_retries_throttled_and_failing_answers(self):
+        with FeedServer() as server:
+            server.failures = [503, 429]
+            results = await AsyncIvyScraper().scrape_all(sources=self._sources(server.url))
+
+        self.assertEqual(results, {"Uni0": 2})
+        self.assertEqual(len(server.requests), 3)
+
+    async def test_http_errors_are_recorded_on_the_source_run(self):
+        with FeedServer() as server:
+            server.failures = [404]
+            results = await AsyncIvyScraper().scrape_all(sources=self._sources(server.url))
+
+        self.assertEqual(results, {"Uni0": 0})
+        source_run = await SourceRun.objects.aget()
+        self.assertEqual((source_run.ok, source_run.status_code, source_run.error), (False, 404, "HTTP 404"))
+
+    async def test_html_source_failing_both_strategies_is_a_failure(self):
+        with FeedServer() as server, \
+                mock.patch.object(AsyncIvyScraper, "_scrape_with_playwright", side_effect=RuntimeError("no browser")):
+            server.failures = [404]
+            sources = as_sources({"Uni0": [{"url": server.url, "type": "html", "label": "Events",
+                                            "list_selector": "li", "title_selector": "a"}]})
+            results = await AsyncIvyScraper().scrape_all(sources=sources)
+
+        self.assertEqual(results, {"Uni0": 0})
+        source_run = await SourceRun.objects.aget()
+        self.assertEqual((source_run.ok, source_run.status_code, source_run.error), (False, 404, "HTTP 404"))
+
+    async def test_unknown_university_is_reported(self):
+        with use_sources({}), self.assertLogs("scraper.async_scraper", "WARNING") as logs:
+            self.assertEqual(await AsyncIvyScraper().scrape_one("Yael"), 0)
+        self.assertIn("No sources configured for 'Yael'", logs.output[0])
+
+    async def test_fetches_share_the_loop_within_host_limits(self):
+        in_flight = peak = 0
+
+        async def tracked_feed(self, url, university, source_type="news_event", timeout=25):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            return 1
+
+        with mock.patch.object(AsyncIvyScraper, "_scrape_rss", tracked_feed):
+            results = await AsyncIvyScraper().scrape_all(
+                sources=self._sources(*(f"https://host{i}.example/feed" for i in range(8)))
+            )
+            self.assertEqual(sum(results.values()), 8)
+            self.assertEqual(peak, 8)
+
+            peak = 0
+            with mock.patch.object(logic, "SCRAPE_MAX_PER_HOST", 1):
+                await AsyncIvyScraper().scrape_all(
+                    sources=self._sources(*(f"https://same.example/feed{i}" for i in range(4)))
+                )
+            self.assertEqual(peak, 1)
+
+
+ARTICLE_HTML = """<html><head>
+<meta property="article:published_time" content="2026-09-14T09:30:00-04:00">
+<meta name="description" content="Short teaser">
+</head><body>
+<nav>Home | News | Apply by January 5, 1999</nav>
+<article>
+  <h1>Graduate fellowship applications open</h1>
+  <p>The Graduate School invites applications for its 2027 research fellowship.</p>
+  <p>Applications are due Nov. 15 and decisions follow in December.</p>
+  <script>var deadline = "2020-01-01";</script>
+</article>
+<footer>Contact us</footer>
+</body></html>"""
+
+
+class ArticleServer(StubServer):
+    """Serves article pages from ``pages`` ({path: html}); other paths are 404s."""
+
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = pages
+        self.requests = []
+
+    def handle(self, request):
+        if request.path == "/robots.txt":
+            request.send_error(404)
+            return
+        self.requests.append(request.path)
+        if request.path not in self.pages:
+            request.send_error(404)
+            return
+        self.respond(request, 200, self.pages[request.path].encode(), Content_Type="text/html; charset=utf-8")
+
+
+class EnrichmentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for patcher in (
+            mock.patch.object(enrich, "ENRICH", True),
+            mock.patch.object(ratelimit, "HOST_RATE", 0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_dates_are_read_in_common_formats(self):
+        reference = date(2026, 10, 1)
+        cases = {
+            "March 1, 2027": (2027, 3, 1),
+            "on 5th of June 2027": (2027, 6, 5),
+            "2027-02-28": (2027, 2, 28),
+            "by 12/15/26": (2026, 12, 15),
+            "Sept. 30": (2027, 9, 30),  # no year and already past: next year's
+            "Nov. 15 at noon": (2026, 11, 15),
+        }
+        for text, expected in cases.items():
+            self.assertEqual(enrich.parse_date(text, reference), date(*expected), text)
+        self.assertIsNone(enrich.parse_date("February 30, 2027"))
+        self.assertIsNone(enrich.parse_date("Room 12 of 40"))
+
+    def test_deadline_needs_a_cue_word(self):
+        reference = date(2026, 10, 1)
+        self.assertEqual(
+            enrich.find_deadline("Held on March 3, 2027. Apply by February 1, 2027.", reference).isoformat(),
+            "2027-02-01",
+        )
+        self.assertEqual(enrich.find_deadline("Nominations due: 1/10/2027", reference).isoformat(), "2027-01-10")
+        self.assertIsNone(enrich.find_deadline("The lecture is on March 3, 2027.", reference))
+
+    def test_article_page_is_summarised(self):
+        article = enrich.parse_article(ARTICLE_HTML)
+        self.assertTrue(article.summary.startswith("The Graduate School invites applications"))
+        self.assertNotIn("Home | News", article.summary)
+        self.assertNotIn("var deadline", article.summary)
+        self.assertEqual(article.published_at.isoformat(), "2026-09-14T09:30:00-04:00")
+        self.assertEqual(article.deadline.isoformat(), "2026-11-15")
+
+    def test_new_items_are_enriched_once_in_bulk(self):
+        with mock.patch.object(enrich, "ENRICH", False):
+            _save_items([("Archived story", "https://news.example.edu/old", "")], "Harvard")
+        with ArticleServer({"/fellowship": ARTICLE_HTML, "/talk": "<p>Weekly seminar in the Science Center.</p>"}) as server:
+            _save_items([
+                ("Graduate fellowship applications open", f"{server.base_url}/fellowship", "Teaser"),
+                ("Seminar", f"{server.base_url}/talk", "A much longer feed description than the page has" * 3),
+                ("Gone", f"{server.base_url}/missing", ""),
+            ], "Harvard")
+            with mock.patch.object(enrich, "ENRICH_BATCH", 2), CaptureQueriesContext(connection) as ctx:
+                counts = enrich.enrich_pending()
+            again = enrich.enrich_pending()
+
+        self.assertEqual(counts, {"done": 2, "failed": 1})
+        self.assertEqual(again, {"done": 0, "failed": 0})
+        self.assertEqual(sorted(server.requests), ["/fellowship", "/missing", "/talk"])
+        updates = [q for q in ctx.captured_queries if q["sql"].lstrip().upper().startswith("UPDATE")]
+        self.assertEqual(len(updates), 2)  # one per batch
+
+        fellowship = Opportunity.objects.get(url=f"{server.base_url}/fellowship")
+        self.assertEqual(fellowship.enrichment, "done")
+        self.assertTrue(fellowship.description.startswith("The Graduate School invites"))
+        self.assertEqual(fellowship.deadline, "2026-11-15")
+        self.assertEqual(fellowship.published_at.isoformat(), "2026-09-14T13:30:00+00:00")
+        self.assertEqual(fellowship.simhash, similarity.signature_fields(fellowship.title, fellowship.description)["simhash"])
+        # A feed description longer than the page's text is kept
+        self.assertTrue(Opportunity.objects.get(title="Seminar").description.startswith("A much longer"))
+        self.assertEqual(Opportunity.objects.get(title="Gone").enrichment, "failed")
+        self.assertEqual(Opportunity.objects.get(title="Archived story").enrichment, "")
+
+    def test_parsed_articles_are_cached(self):
+        with ArticleServer({"/fellowship": ARTICLE_HTML}) as server:
+            url = f"{server.base_url}/fellowship"
+            first = enrich.fetch_article(url)
+            self.assertEqual(enrich.fetch_article(url), first)
+        self.assertEqual(server.requests, ["/fellowship"])
+
+    def test_one_pass_at_a_time(self):
+        _save_items([("Story", "https://news.example.edu/story", "")], "Harvard")
+        cache.add(enrich.ENRICH_LOCK_KEY, 1)
+        with mock.patch.object(enrich, "fetch_article") as fetch:
+            self.assertEqual(enrich.enrich_pending(), {"done": 0, "failed": 0})
+        fetch.assert_not_called()
+        self.assertEqual(Opportunity.objects.get().enrichment, "pending")
+
+    def test_long_pass_keeps_its_lock_batch_by_batch(self):
+        _save_items([(f"Story {i}", f"https://news.example.edu/{i}", "") for i in range(3)], "Harvard")
+        with mock.patch.object(enrich, "ENRICH_BATCH", 1), \
+                mock.patch.object(enrich, "fetch_article", return_value=enrich.Article()), \
+                mock.patch.object(cache, "touch", wraps=cache.touch) as touch:
+            self.assertEqual(enrich.enrich_pending(), {"done": 3, "failed": 0})
+        # Before each of the three batches and the final (empty) read
+        self.assertEqual(touch.call_args_list, [mock.call(enrich.ENRICH_LOCK_KEY, enrich.ENRICH_LOCK_TTL)] * 4)
+        self.assertIsNone(cache.get(enrich.ENRICH_LOCK_KEY))
+
+    def test_pass_stops_when_its_lock_is_taken_over(self):
+        _save_items([(f"Story {i}", f"https://news.example.edu/{i}", "") for i in range(3)], "Harvard")
+
+        def fetch(url):
+            # The lock expired mid-batch and another worker took it
+            cache.set(enrich.ENRICH_LOCK_KEY, "other worker")
+            return enrich.Article()
+
+        with mock.patch.object(enrich, "ENRICH_BATCH", 1), \
+                mock.patch.object(enrich, "fetch_article", side_effect=fetch), \
+                self.assertLogs(enrich.logger, "WARNING"):
+            self.assertEqual(enrich.enrich_pending(), {"done": 1, "failed": 0})
+        self.assertEqual(cache.get(enrich.ENRICH_LOCK_KEY), "other worker")
+        self.assertEqual(Opportunity.objects.filter(enrichment="pending").count(), 2)
+
+    def test_scrape_runs_enrich_new_items(self):
+        sources = as_sources({"Test": [{"url": "https://news.example.edu/feed", "type": "rss"}]})
+        with mock.patch.object(logic, "_scrape_rss", return_value=2), \
+                mock.patch.object(logic, "refresh_stats"), \
+                mock.patch.object(enrich, "enrich_pending") as enrich_pending:
+            IvyScraper().scrape_all(sources=sources)
+        enrich_pending.assert_called_once_with()
+
+    def test_command_requeues_failures(self):
+        _save_items([("Story", "https://news.example.edu/story", "")], "Harvard")
+        Opportunity.objects.update(enrichment="failed")
+        with mock.patch.object(enrich, "fetch_article", return_value=enrich.Article("Full text of the story")):
+            call_command("enrich_opportunities", "--retry-failed", stdout=StringIO())
+        story = Opportunity.objects.get()
+        self.assertEqual((story.enrichment, story.description), ("done", "Full text of the story"))
@@ -0,0 +1,129 @@
+"""
+Fast HTML → plain text for feed descriptions.
+
+``html_to_text(html, limit)`` returns exactly what
+``BeautifulSoup(html, "html.parser").get_text(" ", strip=True)[:limit]``
+would, but drives the stdlib ``html.parser`` tokenizer directly instead of
+building a tree, and stops tokenizing once ``limit`` visible characters
+have been collected.
+"""
+
+from html.parser import HTMLParser
+
+from bs4.builder import HTMLTreeBuilder
+from bs4.dammit import EntitySubstitution
+
+# Tags whose strings BeautifulSoup keeps out of get_text()
+_HIDDEN_CONTAINERS = frozenset({"script", "style", "template", "rt", "rp"})
+_VOID_ELEMENTS = frozenset(HTMLTreeBuilder.empty_element_tags)
+_ENTITIES = EntitySubstitution.HTML_ENTITY_TO_CHARACTER
+
+
+class _Enough(Exception):
+    pass
+
+
+class _TextExtractor(HTMLParser):
+    """Collects stripped text nodes the way BeautifulSoup's tree builder splits them."""
+
+    def __init__(self, limit):
+        super().__init__(convert_charrefs=False)
+        self.limit = limit
+        self.parts = []
+        self.length = -1  # joined length, accounting for the " " separators
+        self._buf = []
+        self._stack = []  # open tags, popped like BeautifulSoup's _popToTag
+        self._hidden = 0  # open hidden containers on the stack
+
+    def _end_string(self, cdata=False):
+        if not self._buf:
+            return
+        text = "".join(self._buf).strip()
+        self._buf = []
+        # CDATA sections stay visible even inside hidden containers
+        if text and (cdata or not self._hidden):
+            self.parts.append(text)
+            self.length += len(text) + 1
+            if self.length >= self.limit:
+                raise _Enough
+
+    # ── tags ──────────────────────────────────────────────────
+    def handle_starttag(self, tag, attrs):
+        self._end_string()
+        if tag in _VOID_ELEMENTS:
+            return
+        self._stack.append(tag)
+        if tag in _HIDDEN_CONTAINERS:
+            self._hidden += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self._end_string()
+
+    def handle_endtag(self, tag):
+        self._end_string()
+        if tag not in self._stack:
+            return
+        while True:
+            name = self._stack.pop()
+            if name in _HIDDEN_CONTAINERS:
+                self._hidden -= 1
+            if name == tag:
+                break
+
+    # ── text ──────────────────────────────────────────────────
+    def handle_data(self, data):
+        self._buf.append(data)
+
+    def handle_charref(self, name):
+        if name[0] in "xX":
+            code = int(name.lstrip("xX"), 16)
+        else:
+            code = int(name)
+        data = None
+        if code < 256:
+            # Numeric references into windows-1252 (e.g. &#147;), as bs4 does
+            try:
+                data = bytes([code]).decode("windows-1252")
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(code)
+            except (ValueError, OverflowError):
+                pass
+        self._buf.append(data or "\N{REPLACEMENT CHARACTER}")
+
+    def handle_entityref(self, name):
+        character = _ENTITIES.get(name)
+        self._buf.append(character if character is not None else "&" + name)
+
+    def unknown_decl(self, data):
+        self._end_string()
+        if data.upper().startswith("CDATA["):
+            self._buf.append(data[len("CDATA["):])
+            self._end_string(cdata=True)
+
+    # Comments, doctypes and processing instructions end the current string
+    # but contribute no text.
+    def handle_comment(self, data):
+        self._end_string()
+
+    def handle_decl(self, data):
+        self._end_string()
+
+    def handle_pi(self, data):
+        self._end_string()
+
+
+def html_to_text(html, limit=500):
+    """Visible text of an HTML fragment, space-joined and cut to ``limit`` chars."""
+    if not html:
+        return ""
+    parser = _TextExtractor(limit)
+    try:
+        parser.feed(html)
+        parser.close()
+        parser._end_string()
+    except _Enough:
+        pass
+    return " ".join(parser.parts)[:limit]
@@ -1,12 +1,20 @@
 from django.shortcuts import render
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.urls import reverse
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.core.cache import cache
+from django.views.decorators.cache import cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition, require_GET, require_POST
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Count
+from . import pagecache, registry
+from .export import FORMATS as EXPORT_FORMATS, stream_export
 from .models import Opportunity
-from .logic import IvyScraper, SOURCES
-
-UNIVERSITIES = list(SOURCES.keys())
+from .jobs import finish_job, get_job, start_job
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_prometheus
+from .pagination import InvalidCursor, PAGE_SIZE, keyset_page
+from .search import search_opportunities
+from .stats import get_stats
+from .tasks import run_ivy_scrape, run_scrape_university
 
 SOURCE_TYPE_LABELS = {
     "job": "Staff & Faculty Jobs",
@@ -15,55 +23,177 @@ SOURCE_TYPE_LABELS = {
     "research_position": "Research & Postdoc",
     "academic_position": "Academic Positions",
 }
-def dashboard(request):
+
+
+def _filter_opportunities(request):
+    """Apply the shared q / university / source_type filters from the query string."""
     query      = request.GET.get("q", "").strip()
     uni_filter = request.GET.get("university", "")
     type_filter = request.GET.get("source_type", "")
 
-    qs = Opportunity.objects.all()
-    if query:
-        qs = qs.filter(title__icontains=query)
+    qs = Opportunity.objects.filter(duplicate_of__isnull=True)
     if uni_filter:
         qs = qs.filter(university=uni_filter)
     if type_filter:
         qs = qs.filter(source_type=type_filter)
+    if query:
+        qs = search_opportunities(qs, query)  # best matches first
+    return qs, query, uni_filter, type_filter
+
 
-    opportunities = qs.order_by("-created_at")[:80]
-    total_count = Opportunity.objects.count()
+def _page(request, qs, query):
+    """
+    One page of results plus the cursor for the next.  Browsing is keyset
+    paginated on (created_at, id); relevance-ranked search results can't be,
+    so a search returns its best PAGE_SIZE matches only.
+    """
+    if query:
+        return list(qs[:PAGE_SIZE]), None
+    return keyset_page(qs, request.GET.get("cursor") or None)
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=pagecache.etag, last_modified_func=pagecache.last_modified)
+def dashboard(request):
+    """
+    Rendered pages are cached per data version and URL (see
+    ``scraper.pagecache``), and carry the version as ETag / Last-Modified;
+    ``no-cache`` makes clients revalidate, which answers with a 304 until
+    the data changes.
+    """
+    key = pagecache.page_key(request)
+    content = cache.get(key)
+    if content is None:
+        response = _render_dashboard(request)
+        if response.status_code == 200:
+            cache.set(key, response.content, pagecache.PAGE_CACHE_TTL)
+        return response
+    return HttpResponse(content)
+
+
+def _render_dashboard(request):
+    qs, query, uni_filter, type_filter = _filter_opportunities(request)
+    try:
+        opportunities, next_cursor = _page(request, qs, query)
+    except InvalidCursor as exc:
+        return HttpResponseBadRequest(str(exc))
 
-    stats = (
-        Opportunity.objects.values("university")
-        .annotate(count=Count("id"))
-        .order_by("-count")
-    )
+    next_query = None
+    if next_cursor:
+        params = request.GET.copy()
+        params["cursor"] = next_cursor
+        next_query = params.urlencode()
+
+    stats = get_stats()
 
     context = {
         "opportunities": opportunities,
-        "total_count": total_count,
-        "stats": list(stats),
-        "universities": UNIVERSITIES,
+        "total_count": stats["total"],
+        "stats": stats["by_university"],
+        "type_stats": stats["by_source_type"],
+        "universities": registry.get_registry().universities,
         "query": query,
         "uni_filter": uni_filter,
         "type_filter": type_filter,
         "source_types": SOURCE_TYPE_LABELS,
+        "is_paged": bool(request.GET.get("cursor")),
+        "next_query": next_query,
     }
     return render(request, "scraper/dashboard.html", context)
 
 
+@require_GET
+def opportunities_api(request):
+    """JSON listing with the dashboard filters and keyset pagination."""
+    qs, query, _, _ = _filter_opportunities(request)
+    try:
+        rows, next_cursor = _page(request, qs, query)
+    except InvalidCursor as exc:
+        return JsonResponse({"status": "error", "message": str(exc)}, status=400)
+    results = [
+        {
+            "id": opp.pk,
+            "title": opp.title,
+            "description": opp.description,
+            "url": opp.url,
+            "university": opp.university,
+            "source_type": opp.source_type,
+            "deadline": opp.deadline,
+            "published_at": opp.published_at.isoformat() if opp.published_at else None,
+            "created_at": opp.created_at.isoformat(),
+        }
+        for opp in rows
+    ]
+    return JsonResponse({"status": "ok", "results": results, "next_cursor": next_cursor})
+
+
+@gzip_page
+@require_GET
+def export_opportunities(request):
+    """
+    Stream every row matching the dashboard filters as NDJSON (default) or
+    CSV (``format=csv``), oldest first; ``since`` takes the ``cursor`` of
+    the last row already synced.  Gzipped when the client accepts it.
+    """
+    fmt = request.GET.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse(
+            {"status": "error", "message": f"format must be one of {', '.join(EXPORT_FORMATS)}"}, status=400,
+        )
+    qs, _, _, _ = _filter_opportunities(request)
+    try:
+        content = stream_export(qs, fmt, request.GET.get("since") or None)
+    except InvalidCursor as exc:
+        return JsonResponse({"status": "error", "message": str(exc)}, status=400)
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[fmt][0])
+    response["Content-Disposition"] = f'attachment; filename="opportunities.{fmt}"'
+    return response
+
+
 @csrf_exempt
 @require_POST
 def trigger_scrape(request):
+    """
+    Queue a scrape on Celery and return its job id straight away.  A trigger
+    for a scope that is already queued or running joins the existing job.
+    """
     university = request.POST.get("university", "").strip()
-    scraper = IvyScraper()
-    try:
-        if university and university in UNIVERSITIES:
-            count = scraper.scrape_one(university)
-            msg = f"✓ {count} new items from {university}"
-        else:
-            results = scraper.scrape_all()
-            total = sum(results.values())
-            detail = ", ".join(f"{u}: {n}" for u, n in results.items() if n > 0) or "none"
-            msg = f"✓ {total} new items — {detail}"
-        return JsonResponse({"status": "ok", "message": msg})
-    except Exception as exc:
-        return JsonResponse({"status": "error", "message": str(exc)}, status=500)
+    universities = registry.get_registry().universities
+    if university and university in universities:
+        job_id, created = start_job([university], scope=university)
+        task, args = run_scrape_university, [university, job_id]
+        label = university
+    else:
+        job_id, created = start_job(universities)
+        task, args = run_ivy_scrape, [job_id]
+        label = "all universities"
+
+    if created:
+        try:
+            task.apply_async(args=args, task_id=job_id)
+        except Exception as exc:
+            finish_job(job_id, "error", str(exc))
+            return JsonResponse({"status": "error", "message": str(exc)}, status=500)
+        msg = f"Scrape of {label} queued"
+    else:
+        msg = f"A scrape of {label} is already running"
+    return JsonResponse({
+        "status": "ok",
+        "message": msg,
+        "job_id": job_id,
+        "status_url": reverse("scrape_status", args=[job_id]),
+    }, status=202)
+
+
+@require_GET
+def scrape_status(request, job_id):
+    job = get_job(job_id)
+    if job is None:
+        return JsonResponse({"status": "error", "message": "Unknown job"}, status=404)
+    return JsonResponse({"status": "ok", "job": job})
+
+
+@require_GET
+def metrics(request):
+    """Scrape run counters and latency histograms for Prometheus."""
+    return HttpResponse(render_prometheus(), content_type=METRICS_CONTENT_TYPE)